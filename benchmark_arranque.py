@@ -0,0 +1,89 @@
+# benchmark_arranque.py
+# Mide el costo de importación de cada módulo del proyecto en un intérprete
+# nuevo (python -X importtime) y verifica que el arranque de un análisis
+# pequeño (solo tablas de frecuencia) no cargue dependencias pesadas ni
+# supere PRESUPUESTO_ARRANQUE_S.
+#
+# Uso:
+#   python benchmark_arranque.py [--repeticiones 3] [--json ruta.json]
+# Termina con código 1 si el arranque del análisis pequeño incumple el presupuesto.
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+MODULOS = [
+    'src.data_loader', 'src.data_cleaner', 'src.data_cache', 'src.exporter', 'src.planificador',
+    'src.analysis_univariado', 'src.analysis_bivariado', 'src.inferencia', 'src.visualizations', 'main',
+]
+
+# Dependencias que solo deben cargarse en la función que las usa
+DEPENDENCIAS_PESADAS = ['keybert', 'sentence_transformers', 'torch', 'wordcloud', 'statsmodels', 'seaborn', 'plotly']
+
+# Lo que importa una ejecución que solo calcula tablas de frecuencia
+ANALISIS_PEQUENO = ['main', 'src.planificador', 'src.analysis_univariado']
+PRESUPUESTO_ARRANQUE_S = 2.0  # medido con -X importtime, que añade su propio costo
+N_PAQUETES_COSTOSOS = 5
+
+def medir_importacion(modulos):
+    """
+    Importa los módulos en un intérprete nuevo y devuelve el tiempo total, el
+    costo por paquete de primer nivel y las dependencias pesadas cargadas.
+    """
+    codigo = (f"import sys, json\nimport {', '.join(modulos)}\n"
+              f"print(json.dumps([m for m in {DEPENDENCIAS_PESADAS!r} if m in sys.modules]))")
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                            capture_output=True, text=True, check=True)
+    # Formato de -X importtime: "import time: propio | acumulado | nombre" (microsegundos)
+    por_paquete = defaultdict(int)
+    total = 0
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        por_paquete[nombre.strip().split('.')[0]] += int(propio)
+        # Las líneas sin sangría son los módulos importados directamente
+        if not nombre.startswith('  ', 1):
+            total += int(acumulado)
+    costosos = sorted(por_paquete.items(), key=lambda item: -item[1])[:N_PAQUETES_COSTOSOS]
+    return {
+        "tiempo_s": round(total / 1e6, 4),
+        "paquetes_costosos": {paquete: round(tiempo / 1e6, 4) for paquete, tiempo in costosos},
+        "dependencias_pesadas": json.loads(salida.stdout.strip().splitlines()[-1]),
+    }
+
+def medir(modulos, repeticiones):
+    """La medición más rápida de varias repeticiones (la menos afectada por el resto del sistema)."""
+    return min((medir_importacion(modulos) for _ in range(repeticiones)), key=lambda m: m["tiempo_s"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo de importación de los módulos del proyecto")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--json', help="Guardar también los resultados en este archivo")
+    args = parser.parse_args()
+
+    resultados = {"modulos": {}}
+    print(f"{'Módulo':<28}{'Tiempo (s)':>12}  Paquetes más costosos / dependencias pesadas")
+    for modulo in MODULOS:
+        medida = medir([modulo], args.repeticiones)
+        resultados["modulos"][modulo] = medida
+        paquetes = ', '.join(f"{p} {t:.2f}" for p, t in medida["paquetes_costosos"].items())
+        pesadas = f" [pesadas: {', '.join(medida['dependencias_pesadas'])}]" if medida["dependencias_pesadas"] else ""
+        print(f"{modulo:<28}{medida['tiempo_s']:>12.3f}  {paquetes}{pesadas}")
+
+    pequeno = medir(ANALISIS_PEQUENO, args.repeticiones)
+    cumple = pequeno["tiempo_s"] <= PRESUPUESTO_ARRANQUE_S and not pequeno["dependencias_pesadas"]
+    resultados["analisis_pequeno"] = {**pequeno, "modulos": ANALISIS_PEQUENO,
+                                      "presupuesto_s": PRESUPUESTO_ARRANQUE_S, "cumple": cumple}
+    print(f"\nArranque de un análisis pequeño ({', '.join(ANALISIS_PEQUENO)}): "
+          f"{pequeno['tiempo_s']:.3f} s (presupuesto {PRESUPUESTO_ARRANQUE_S} s)")
+    if pequeno["dependencias_pesadas"]:
+        print(f"❌ Carga dependencias pesadas: {', '.join(pequeno['dependencias_pesadas'])}")
+    print("✅ Dentro del presupuesto" if cumple else "❌ Fuera del presupuesto")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if cumple else 1)
@@ -0,0 +1,198 @@
+# demonio_analisis.py
+# Proceso de análisis de larga duración: importa una sola vez las dependencias
+# (scipy, statsmodels, seaborn, wordcloud) y el modelo KeyBERT, y atiende
+# trabajos (datos + plan) por un socket Unix. Cada trabajo se ejecuta con
+# run_pipeline y el resultado de cada nodo se envía al cliente en cuanto termina,
+# como líneas JSON.
+#
+# Uso:
+#   python demonio_analisis.py iniciar [--socket ruta]
+#   python demonio_analisis.py enviar --datos "entregas/2025-*.csv" [--plan plan.json] [--trabajadores 1]
+#   python demonio_analisis.py estado
+#   python demonio_analisis.py detener
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+import matplotlib
+matplotlib.use('Agg')
+
+from main import run_pipeline
+
+SOCKET_PATH = 'data/cache/demonio_analisis.sock'
+MODULOS_PRECARGA = ['scipy.stats', 'statsmodels.api', 'seaborn', 'wordcloud', 'src.analysis_univariado',
+                    'src.analysis_bivariado', 'src.inferencia', 'src.visualizations']
+
+def precalentar():
+    """Importa las dependencias de los análisis y carga el modelo KeyBERT (si está instalado)."""
+    import importlib
+    inicio = time.perf_counter()
+    for modulo in MODULOS_PRECARGA:
+        try:
+            importlib.import_module(modulo)
+        except ImportError as e:
+            print(f"⚠️ No se pudo precargar {modulo}: {e}")
+    try:
+        from src.visualizations import modelo_temas
+        modelo_temas()
+    except ImportError as e:
+        print(f"⚠️ Modelo KeyBERT no disponible: {e}")
+    return time.perf_counter() - inicio
+
+def _enviar(conexion, mensaje):
+    """Envía un mensaje JSON; devuelve False si el cliente ya se desconectó."""
+    try:
+        conexion.sendall((json.dumps(mensaje, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+        return True
+    except OSError:
+        return False
+
+def _ejecutar_trabajo(conexion, trabajo):
+    """Ejecuta un trabajo con run_pipeline y envía el resultado de cada nodo y el resumen final."""
+    config = dict(trabajo.get("config") or {})
+    if trabajo.get("datos"):
+        config['DATA_PATH'] = trabajo["datos"]
+    ruta_plan_temporal = None
+    plan = trabajo.get("plan")
+    if isinstance(plan, list):
+        # Plan enviado en el mensaje: se guarda en un archivo temporal para run_pipeline
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(plan, f, ensure_ascii=False)
+            ruta_plan_temporal = f.name
+        config['PLAN_PATH'] = ruta_plan_temporal
+    elif plan:
+        config['PLAN_PATH'] = plan
+
+    def al_terminar_nodo(nodo, resultado):
+        _enviar(conexion, {
+            "tipo": "nodo",
+            "id": nodo["id"],
+            "estado": resultado["estado"],
+            "error": resultado.get("error"),
+            "duracion_s": round(resultado.get("duracion", 0.0), 4),
+            "desde_cache": bool(resultado.get("desde_cache")),
+            "archivos": resultado.get("archivos", []),
+        })
+
+    inicio = time.perf_counter()
+    try:
+        resultados = run_pipeline(config, al_terminar_nodo=al_terminar_nodo)
+        plan_resultados = resultados.get("plan", {})
+        _enviar(conexion, {
+            "tipo": "fin",
+            "tiempo_s": round(time.perf_counter() - inicio, 4),
+            "registros": len(resultados["datos"]),
+            "completados": sum(1 for r in plan_resultados.values() if r["estado"] == "completado"),
+            "total": len(plan_resultados),
+            "configuracion": resultados["configuracion"],
+        })
+    except Exception as e:
+        _enviar(conexion, {"tipo": "error", "error": str(e), "traceback": traceback.format_exc()})
+    finally:
+        if ruta_plan_temporal is not None:
+            os.remove(ruta_plan_temporal)
+
+def servir(ruta_socket=SOCKET_PATH, precargar=True):
+    """
+    Atiende trabajos por el socket Unix hasta recibir {"accion": "detener"}.
+
+    Cada conexión envía una línea JSON con la acción:
+    {"accion": "analizar", "datos": ..., "plan": ruta o lista de nodos, "config": {...}},
+    {"accion": "estado"} o {"accion": "detener"}. Los trabajos se ejecutan de uno
+    en uno (las exportaciones de matplotlib y Excel son globales al proceso).
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise OSError("Esta plataforma no admite sockets Unix")
+    tiempo_precarga = precalentar() if precargar else 0.0
+    print(f"✅ Dependencias precargadas en {tiempo_precarga:.1f} s")
+
+    os.makedirs(os.path.dirname(ruta_socket) or '.', exist_ok=True)
+    if os.path.exists(ruta_socket):
+        os.remove(ruta_socket)
+    inicio = time.time()
+    trabajos = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as servidor:
+        servidor.bind(ruta_socket)
+        servidor.listen()
+        print(f"🟢 Demonio de análisis escuchando en {ruta_socket} (pid {os.getpid()})")
+        try:
+            while True:
+                conexion, _ = servidor.accept()
+                with conexion:
+                    try:
+                        with conexion.makefile('r', encoding='utf-8') as entrada:
+                            peticion = json.loads(entrada.readline() or '{}')
+                    except ValueError as e:
+                        _enviar(conexion, {"tipo": "error", "error": f"Petición inválida: {e}"})
+                        continue
+                    accion = peticion.get("accion", "analizar")
+                    if accion == "detener":
+                        _enviar(conexion, {"tipo": "detenido", "trabajos": trabajos})
+                        break
+                    if accion == "estado":
+                        _enviar(conexion, {"tipo": "estado", "pid": os.getpid(), "trabajos": trabajos,
+                                           "activo_s": round(time.time() - inicio, 1),
+                                           "precarga_s": round(tiempo_precarga, 2)})
+                        continue
+                    if accion != "analizar":
+                        _enviar(conexion, {"tipo": "error", "error": f"Acción desconocida: {accion}"})
+                        continue
+                    _ejecutar_trabajo(conexion, peticion)
+                    trabajos += 1
+        finally:
+            os.remove(ruta_socket)
+    print("🔴 Demonio de análisis detenido")
+
+def enviar_peticion(peticion, ruta_socket=SOCKET_PATH):
+    """Envía una petición al demonio y devuelve un generador con los mensajes de respuesta."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as cliente:
+        cliente.connect(ruta_socket)
+        cliente.sendall((json.dumps(peticion, ensure_ascii=False) + '\n').encode('utf-8'))
+        with cliente.makefile('r', encoding='utf-8') as respuesta:
+            for linea in respuesta:
+                yield json.loads(linea)
+
+def analizar(datos=None, plan=None, config=None, ruta_socket=SOCKET_PATH):
+    """
+    Envía un trabajo al demonio. Devuelve un generador con un mensaje por nodo
+    terminado ("tipo": "nodo") y uno final ("fin" o "error").
+    """
+    return enviar_peticion({"accion": "analizar", "datos": datos, "plan": plan, "config": config or {}}, ruta_socket)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Demonio de análisis de satisfacción Coltefinanciera")
+    parser.add_argument('accion', choices=['iniciar', 'enviar', 'estado', 'detener'])
+    parser.add_argument('--socket', default=SOCKET_PATH)
+    parser.add_argument('--datos', help="Archivo, directorio o patrón de datos del trabajo")
+    parser.add_argument('--plan', help="Plan de análisis del trabajo (por defecto el de main.py)")
+    parser.add_argument('--trabajadores', type=int, help="Procesos para el plan de análisis (1: secuencial)")
+    args = parser.parse_args()
+
+    if args.accion == 'iniciar':
+        servir(args.socket)
+        sys.exit(0)
+    try:
+        if args.accion == 'enviar':
+            config = {'MAX_TRABAJADORES': args.trabajadores} if args.trabajadores else {}
+            mensajes = analizar(args.datos, args.plan, config, args.socket)
+        else:
+            mensajes = enviar_peticion({"accion": args.accion}, args.socket)
+        final = None
+        for mensaje in mensajes:
+            if mensaje["tipo"] == "nodo":
+                simbolo = {"completado": "✅", "omitido": "⚠️"}.get(mensaje["estado"], "❌")
+                print(f"{simbolo} {mensaje['id']}: {mensaje['estado']} ({mensaje['duracion_s']:.1f} s)"
+                      + (f" - {mensaje['error']}" if mensaje["error"] else ""))
+            else:
+                final = mensaje
+                print(json.dumps(mensaje, ensure_ascii=False, indent=2))
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ No hay un demonio escuchando en {args.socket}. Inícielo con: python demonio_analisis.py iniciar")
+        sys.exit(1)
+    sys.exit(1 if final is None or final["tipo"] == "error" else 0)
@@ -17,9 +17,9 @@ PLOTLY_PREFIX = 'plotly_'
 # Asegurar que el directorio de salida existe
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def save_plotly_json(fig, filename):
-    """Guarda una figura de Plotly como JSON"""
-    filepath = os.path.join(OUTPUT_DIR, f"{PLOTLY_PREFIX}{filename}")
+def save_plotly_json(fig, filename, directorio=None):
+    """Guarda una figura de Plotly como JSON (en OUTPUT_DIR si no se indica el directorio)"""
+    filepath = os.path.join(directorio or OUTPUT_DIR, f"{PLOTLY_PREFIX}{filename}")
     
     # Convertir la figura a JSON
     fig_json = fig.to_json()
@@ -30,11 +30,11 @@ def save_plotly_json(fig, filename):
     
     print(f"✅ Guardado: {filepath}")
 
-def convert_json_table_to_plotly(json_filename, chart_type="bar", title="", xaxis_title="", yaxis_title=""):
+def convert_json_table_to_plotly(json_filename, chart_type="bar", title="", xaxis_title="", yaxis_title="", directorio=None):
     """Convierte una tabla JSON a un gráfico de Plotly"""
     try:
         # Cargar datos JSON
-        json_path = os.path.join(DATA_DIR, json_filename)
+        json_path = os.path.join(directorio or DATA_DIR, json_filename)
         with open(json_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             
@@ -83,7 +83,7 @@ def convert_json_table_to_plotly(json_filename, chart_type="bar", title="", xaxi
         
         # Guardar como JSON para Plotly
         output_filename = os.path.splitext(json_filename)[0] + '.json'
-        save_plotly_json(fig, output_filename)
+        save_plotly_json(fig, output_filename, directorio)
         
         return True
     
@@ -91,11 +91,11 @@ def convert_json_table_to_plotly(json_filename, chart_type="bar", title="", xaxi
         print(f"❌ Error al procesar {json_filename}: {str(e)}")
         return False
 
-def generate_wordcloud_plotly(json_filename):
+def generate_wordcloud_plotly(json_filename, directorio=None):
     """Genera un gráfico de barras horizontal para palabras clave"""
     try:
         # Cargar datos JSON
-        json_path = os.path.join(DATA_DIR, json_filename)
+        json_path = os.path.join(directorio or DATA_DIR, json_filename)
         with open(json_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             
@@ -128,7 +128,7 @@ def generate_wordcloud_plotly(json_filename):
         
         # Guardar como JSON para Plotly
         output_filename = "wordcloud.json"
-        save_plotly_json(fig, output_filename)
+        save_plotly_json(fig, output_filename, directorio)
         
         return True
     
@@ -136,11 +136,11 @@ def generate_wordcloud_plotly(json_filename):
         print(f"❌ Error al procesar la nube de palabras {json_filename}: {str(e)}")
         return False
 
-def process_inference_json(json_filename):
+def process_inference_json(json_filename, directorio=None):
     """Procesa un archivo JSON de inferencia y crea gráficos de Plotly"""
     try:
         # Cargar datos JSON
-        json_path = os.path.join(DATA_DIR, json_filename)
+        json_path = os.path.join(directorio or DATA_DIR, json_filename)
         with open(json_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
@@ -184,7 +184,7 @@ def process_inference_json(json_filename):
                     font=dict(size=12)
                 )
             
-            save_plotly_json(fig_means, f"inferencia_means_{os.path.splitext(json_filename)[0]}.json")
+            save_plotly_json(fig_means, f"inferencia_means_{os.path.splitext(json_filename)[0]}.json", directorio)
         
         # 2. Crear boxplot para distribución por grupo
         if "datos_por_grupo" in resultados:
@@ -211,7 +211,7 @@ def process_inference_json(json_filename):
                 margin=dict(l=50, r=50, t=80, b=50)
             )
             
-            save_plotly_json(fig_box, f"inferencia_box_{os.path.splitext(json_filename)[0]}.json")
+            save_plotly_json(fig_box, f"inferencia_box_{os.path.splitext(json_filename)[0]}.json", directorio)
         
         return True
     
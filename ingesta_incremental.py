@@ -0,0 +1,34 @@
+# ingesta_incremental.py
+# Añade un archivo de respuestas nuevas al resumen consolidado
+# (data/encuesta_satisfaccion.json) sin recalcular todo el histórico.
+#
+# Uso:
+#   python ingesta_incremental.py "ruta/respuestas_nuevas.csv" [...]
+
+import sys
+from src.acumuladores import ingerir_incremental
+
+ACUMULADORES_PATH = 'data/acumuladores_encuesta.json'
+RESUMEN_JSON_PATH = 'data/encuesta_satisfaccion.json'
+CUARENTENA_PATH = 'data/cuarentena_ingesta.csv'
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python ingesta_incremental.py <archivo_csv> [<archivo_csv> ...]")
+        sys.exit(1)
+
+    for archivo in sys.argv[1:]:
+        try:
+            resultado = ingerir_incremental(archivo, ACUMULADORES_PATH, RESUMEN_JSON_PATH,
+                                            ruta_cuarentena=CUARENTENA_PATH)
+        except Exception as e:
+            print(f"❌ Error al ingerir {archivo}: {e}")
+            sys.exit(1)
+        if resultado["omitido"]:
+            print(f"⚠️ {archivo} ya había sido ingerido; se omite.")
+        else:
+            print(f"✅ {archivo}: {resultado['filas_nuevas']} respuestas nuevas "
+                  f"(total acumulado: {resultado['total_encuestas']})")
+            if resultado["filas_rechazadas"] or resultado["duplicados_eliminados"]:
+                print(f"   {resultado['filas_rechazadas']} filas rechazadas por la validación "
+                      f"(ver {CUARENTENA_PATH}) y {resultado['duplicados_eliminados']} duplicadas")
@@ -1,11 +1,17 @@
 # main.py
-from src.data_loader import load_data
-from src.data_cleaner import clean_data
-from src.analysis_univariado import analisis_univariado
-from src.analysis_bivariado import bivariado_cat_cat, bivariado_cat_num
-from src.inferencia import comparar_grupos
-from src.visualizations import analisis_texto_pregunta5
+from src.data_cache import load_clean_data, digest_datos
+from src.acumuladores import acumuladores_vacios, actualizar_acumuladores, guardar_acumuladores, guardar_resumen, guardar_claves
+from src.data_cleaner import resumen_reporte_limpieza
+from src.almacen_sql import preparar_almacen
+from src.validacion import validar_datos, resumen_reporte_validacion
+from src.deduplicacion import deduplicar, resumen_reporte_deduplicacion, COLUMNAS_IDENTIDAD
+from src.planificador import cargar_plan, columnas_plan, ejecutar_plan
+from src.contexto import ContextoAnalisis
+from src.cache_artefactos import limpiar_obsoletos, digest_dataframe, CACHE_ARTEFACTOS_DIR
+from src.bitacora import iniciar_bitacora, registrar, cerrar_bitacora, cola_bitacora
+from src.metricas import iniciar_registro, iniciar_fase, registrar_analisis, guardar_metricas, opciones_medicion
 from src.exporter import export_all_figures_to_pdf
+import argparse
 import shutil
 import glob
 import webbrowser
@@ -27,24 +33,81 @@ EXPORT_EXCEL = 'resultados_analisis.xlsx'
 EXPORT_PDF = 'graficos_analisis.pdf'
 EXPORT_PNG_DIR = 'graficos/'
 EXPORT_JSON_DIR = 'data/'
-LOG_FILE = 'log_analisis.txt'
+LOG_FILE = 'log_analisis.jsonl'
+LOG_CONSOLA = True  # Mostrar también los mensajes del log en la consola
+CACHE_DIR = 'data/cache'
+ACUMULADORES_PATH = 'data/acumuladores_encuesta.json'
+ALMACEN_SQL_PATH = 'data/cache/encuesta.sqlite'
+CUARENTENA_PATH = 'data/cuarentena_validacion.csv'
+
+# Almacén SQL opcional: los análisis bivariados agregan en SQLite en lugar de
+# filtrar copias del DataFrame
+USAR_ALMACEN_SQL = False
+
+# Análisis configurados: plan declarativo (ver src/planificador.py)
+PLAN_PATH = 'plan_analisis.json'
+MAX_TRABAJADORES = None  # None: un proceso por núcleo; 1: ejecución secuencial
+# Con varios procesos, las columnas numéricas y los códigos de las categóricas
+# se ponen una sola vez en memoria compartida en lugar de copiarse a cada proceso
+MEMORIA_COMPARTIDA = True
+
+# Límites de tiempo del plan: los análisis que los superan se interrumpen y se
+# omiten ("timeout") sin detener el resto. LIMITE_NODO_S aplica a los nodos sin
+# 'limite_s' propio y PRESUPUESTO_PLAN_S al plan completo, que ejecuta primero
+# los nodos de mayor 'prioridad'. None: sin límite
+LIMITE_NODO_S = None
+PRESUPUESTO_PLAN_S = None
+
+# Caché de artefactos: los análisis cuyos datos, parámetros y código no
+# cambiaron reutilizan sus gráficos y tablas de la ejecución anterior
+USAR_CACHE_ARTEFACTOS = True
+
+# Métricas de rendimiento por fase y por análisis (run_metrics.json).
+# MEDIR_MEMORIA añade la memoria pico asignada (tracemalloc, unas 3 veces más
+# lento) y PERFILAR un perfil cProfile de cada fase y análisis en PERFILES_DIR
+METRICAS_PATH = 'run_metrics.json'
+MEDIR_MEMORIA = False
+PERFILAR = False
+PERFILES_DIR = 'perfiles'
+
+# Deduplicación de encuestados (misma CEDULA o EMAIL): 'ultima' conserva la
+# respuesta más reciente y 'primera' la más antigua
+DEDUPLICAR = True
+POLITICA_DEDUPLICACION = 'ultima'
+
+# Modo compacto: solo se leen las columnas que usan los análisis configurados,
+# las dimensiones se cargan como categóricas y las preguntas como float32
+COMPACTO = True
+COLUMNAS_FIJAS = {'FECHA_ENCUESTA', 'PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4', 'PREGUNTA_5'}
+
+# Reporte web: servidor local que se inicia al terminar (salvo en modo headless)
+PUERTO_SERVIDOR = 8000
+URL_REPORTE = f'http://localhost:{PUERTO_SERVIDOR}/reporte_web_coltefinanciera.html'
+
+# Claves que admite run_pipeline: los valores por defecto son las constantes de este módulo
+CLAVES_CONFIGURACION = [
+    'DATA_PATH', 'EXPORT_EXCEL', 'EXPORT_PDF', 'EXPORT_PNG_DIR', 'EXPORT_JSON_DIR', 'LOG_FILE', 'LOG_CONSOLA',
+    'CACHE_DIR', 'ACUMULADORES_PATH', 'ALMACEN_SQL_PATH', 'CUARENTENA_PATH', 'USAR_ALMACEN_SQL', 'PLAN_PATH',
+    'MAX_TRABAJADORES', 'MEMORIA_COMPARTIDA', 'LIMITE_NODO_S', 'PRESUPUESTO_PLAN_S', 'USAR_CACHE_ARTEFACTOS', 'CACHE_ARTEFACTOS_DIR', 'METRICAS_PATH', 'MEDIR_MEMORIA',
+    'PERFILAR', 'PERFILES_DIR', 'DEDUPLICAR', 'POLITICA_DEDUPLICACION', 'COMPACTO',
+]
+
+def configuracion(config=None):
+    """Configuración de una ejecución: las constantes del módulo con los valores de `config` encima."""
+    config = dict(config or {})
+    desconocidas = set(config) - set(CLAVES_CONFIGURACION)
+    if desconocidas:
+        raise ValueError(f"Claves de configuración desconocidas: {', '.join(sorted(desconocidas))}")
+    return {clave: config.get(clave, globals()[clave]) for clave in CLAVES_CONFIGURACION}
+
+def columnas_requeridas(plan, deduplicar):
+    """Columnas que se leen en modo compacto: las del plan, las del resumen consolidado y las de identidad."""
+    return sorted(columnas_plan(plan) | COLUMNAS_FIJAS | (set(COLUMNAS_IDENTIDAD) if deduplicar else set()))
 
 # Función para registrar en log
-def log_mensaje(mensaje, tipo="INFO", archivo_log=LOG_FILE):
-    """Registra un mensaje en el archivo de log con timestamp."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(archivo_log, 'a', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] [{tipo}] {mensaje}\n")
-    
-    # Imprimir en consola también, con colores según el tipo de mensaje
-    if tipo == "ERROR":
-        print(f"\033[91m[{timestamp}] [{tipo}] {mensaje}\033[0m")  # Rojo
-    elif tipo == "ADVERTENCIA":
-        print(f"\033[93m[{timestamp}] [{tipo}] {mensaje}\033[0m")  # Amarillo
-    elif tipo == "ÉXITO":
-        print(f"\033[92m[{timestamp}] [{tipo}] {mensaje}\033[0m")  # Verde
-    else:
-        print(f"[{timestamp}] [{tipo}] {mensaje}")
+def log_mensaje(mensaje, tipo="INFO", **campos):
+    """Registra un mensaje en el log (líneas JSON escritas en segundo plano, ver src/bitacora.py)."""
+    registrar(mensaje, tipo, **campos)
 
 # Función para mostrar progreso
 def mostrar_progreso(mensaje, completado, total):
@@ -62,479 +125,409 @@ def mostrar_progreso(mensaje, completado, total):
     if completado == total:
         print()
 
-# Antes de cualquier análisis, limpiar los gráficos y resultados previos
-def limpiar_graficos_y_resultados():
-    """Limpia archivos de resultados previos de análisis."""
-    log_mensaje("Iniciando limpieza de archivos de resultados previos")
-    try:
-        # Borrar todos los PNG de la carpeta graficos
-        eliminados = 0
-        for f in glob.glob('graficos/*.png'):
-            try:
-                os.remove(f)
-                eliminados += 1
-            except Exception as e:
-                log_mensaje(f"No se pudo borrar {f}: {str(e)}", "ADVERTENCIA")
-        log_mensaje(f"Se eliminaron {eliminados} archivos PNG de la carpeta 'graficos/'", "INFO")
-        
-        # Borrar todos los JSON de la carpeta data que sean tablas/resultados
-        eliminados = 0
-        json_patterns = ['data/tabla_*.json', 'data/inferencia_*.json', 'data/tabla_wordcloud_*.json', 'data/estadisticas_*.json', 'data/plotly_*.json']
-        for pattern in json_patterns:
-            for f in glob.glob(pattern):
-                try:
-                    os.remove(f)
-                    eliminados += 1
-                except Exception as e:
-                    log_mensaje(f"No se pudo borrar {f}: {str(e)}", "ADVERTENCIA")
-        log_mensaje(f"Se eliminaron {eliminados} archivos JSON de la carpeta 'data/'", "INFO")
-        
-        # Inicializar archivo de log
-        with open(LOG_FILE, 'w', encoding='utf-8') as f:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"[{timestamp}] [INFO] Iniciando análisis de satisfacción Coltefinanciera\n")
-            
-        log_mensaje("Limpieza de archivos previos completada", "ÉXITO")
-    except Exception as e:
-        log_mensaje(f"Error durante la limpieza de archivos: {str(e)}", "ERROR")
-        traceback.print_exc()
+def run_pipeline(config=None, al_terminar_nodo=None):
+    """
+    Ejecuta el análisis completo sin efectos fuera de sus archivos de salida:
+    carga, validación, plan de análisis, exportaciones (Excel, PDF, PNG, JSON),
+    log y métricas. No inicia el servidor web ni abre el navegador (ver main).
 
-# Llamar la función de limpieza al inicio del main
-limpiar_graficos_y_resultados()
+    Parameters
+    ----------
+    config : dict, optional
+        Valores que reemplazan a las constantes de este módulo, con el mismo
+        nombre (por ejemplo {'DATA_PATH': ..., 'MAX_TRABAJADORES': 1}); ver
+        CLAVES_CONFIGURACION
+    al_terminar_nodo : callable, optional
+        Se llama como al_terminar_nodo(nodo, resultado) cuando termina cada
+        nodo del plan (ver planificador.ejecutar_plan)
+
+    Returns
+    -------
+    dict
+        datos (DataFrame analizado), plan (resultado de cada nodo, con el valor
+        devuelto por su análisis), reportes de limpieza, validación y
+        deduplicación, métricas y la configuración usada
+
+    Raises
+    ------
+    ValueError
+        Si config tiene claves desconocidas
+    """
+    cfg = configuracion(config)
+    plan = cargar_plan(cfg['PLAN_PATH'])
+    # Los gráficos y tablas previos no se borran: los que siguen vigentes se
+    # reutilizan desde la caché y los obsoletos se eliminan al terminar el plan
+    iniciar_bitacora(cfg['LOG_FILE'], consola=cfg['LOG_CONSOLA'], reiniciar=True)
+    log_mensaje("Iniciando análisis de satisfacción Coltefinanciera", "INFO")
+    metricas = iniciar_registro(memoria=cfg['MEDIR_MEMORIA'], perfilar=cfg['PERFILAR'], perfiles_dir=cfg['PERFILES_DIR'])
+    resultados = {"configuracion": cfg, "reporte_deduplicacion": None, "metricas": None}
 
-try:
-    # 1. Carga y limpieza de datos
-    log_mensaje("FASE 1: CARGA Y LIMPIEZA DE DATOS", "INFO")
-    
-    log_mensaje(f"Cargando datos desde {DATA_PATH}", "INFO")
-    try:
-        df = load_data(DATA_PATH)
-        log_mensaje(f"Datos cargados exitosamente. {len(df)} registros encontrados", "ÉXITO")
-    except Exception as e:
-        log_mensaje(f"Error al cargar datos: {str(e)}", "ERROR")
-        traceback.print_exc()
-        sys.exit(1)
-    
-    log_mensaje("Limpiando y preparando datos", "INFO")
     try:
-        df = clean_data(df)
-        log_mensaje(f"Limpieza de datos completada. {len(df)} registros válidos después de limpieza", "ÉXITO")
-    except Exception as e:
-        log_mensaje(f"Error al limpiar datos: {str(e)}", "ERROR")
-        traceback.print_exc()
-        sys.exit(1)
-    
-    # 2. Análisis univariado
-    log_mensaje("\nFASE 2: ANÁLISIS UNIVARIADO", "INFO")
-    
-    to_analyze = [
-        'CIUDAD_AGENCIA', 'TIPO_EJECUTIVO', 'SEGMENTO',
-        'GENERO', 'ESTRATO', 'AGENCIA_EJECUTIVO', 'EDAD',
-        'PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4'
-    ]
-    
-    # Filtrar variables que existen en el dataframe
-    variables_existentes = [var for var in to_analyze if var in df.columns]
-    if len(variables_existentes) < len(to_analyze):
-        variables_faltantes = set(to_analyze) - set(variables_existentes)
-        log_mensaje(f"Advertencia: No se encontraron estas variables en los datos: {', '.join(variables_faltantes)}", "ADVERTENCIA")
-    
-    log_mensaje(f"Realizando análisis univariado para {len(variables_existentes)} variables", "INFO")
+        # 1. Carga y limpieza de datos
+        iniciar_fase(metricas, "FASE 1: CARGA Y LIMPIEZA DE DATOS")
+        log_mensaje("FASE 1: CARGA Y LIMPIEZA DE DATOS", "INFO")
     
-    # Análisis univariado con barra de progreso
-    for i, var in enumerate(variables_existentes):
-        mostrar_progreso("Análisis univariado", i, len(variables_existentes))
+        log_mensaje(f"Cargando datos desde {cfg['DATA_PATH']}", "INFO")
         try:
-            analisis_univariado(
-                df, var,
-                export_excel_path=EXPORT_EXCEL,
-                export_pdf_path=EXPORT_PDF,
-                export_png_dir=EXPORT_PNG_DIR,
-                export_json_dir=EXPORT_JSON_DIR
-            )
-            plt.close('all')  # Cerrar figura tras guardar
+            df, info_carga = load_clean_data(cfg['DATA_PATH'], cache_dir=cfg['CACHE_DIR'],
+                                              columnas=columnas_requeridas(plan, cfg['DEDUPLICAR']) if cfg['COMPACTO'] else None,
+                                              compacto=cfg['COMPACTO'])
+            if info_carga["desde_cache"]:
+                log_mensaje(f"Datos limpios recuperados de la caché. {len(df)} registros encontrados", "ÉXITO")
+            else:
+                log_mensaje(f"Datos cargados y limpiados exitosamente. {len(df)} registros válidos después de limpieza", "ÉXITO")
+            if info_carga["reporte_limpieza"]:
+                log_mensaje(f"Reporte de limpieza: {resumen_reporte_limpieza(info_carga['reporte_limpieza'])}", "INFO")
+        
+            # Validación: las filas que incumplen alguna regla van a cuarentena
+            df, reporte_validacion = validar_datos(df, ruta_cuarentena=cfg['CUARENTENA_PATH'])
+            tipo = "ADVERTENCIA" if reporte_validacion["filas_rechazadas"] else "INFO"
+            log_mensaje(f"Validación: {resumen_reporte_validacion(reporte_validacion)}", tipo)
+            if reporte_validacion["filas_rechazadas"]:
+                log_mensaje(f"Filas rechazadas guardadas en {cfg['CUARENTENA_PATH']}", "ADVERTENCIA")
+        
+            if cfg['DEDUPLICAR']:
+                df, reporte_deduplicacion = deduplicar(df, politica=cfg['POLITICA_DEDUPLICACION'])
+                log_mensaje(f"Deduplicación: {resumen_reporte_deduplicacion(reporte_deduplicacion)}", "INFO")
+                resultados["reporte_deduplicacion"] = reporte_deduplicacion
         except Exception as e:
-            log_mensaje(f"Error al analizar {var}: {str(e)}", "ERROR")
-            traceback.print_exc()
-    
-    mostrar_progreso("Análisis univariado", len(variables_existentes), len(variables_existentes))
-    log_mensaje("Análisis univariado completado", "ÉXITO")
-    
-    # 3. Análisis bivariado categórica-categórica
-    log_mensaje("\nFASE 3: ANÁLISIS BIVARIADO CATEGÓRICA-CATEGÓRICA", "INFO")
-    
-    bivariados_cat_cat = [
-        ('CIUDAD_AGENCIA', 'TIPO_EJECUTIVO'),
-        ('CIUDAD_AGENCIA', 'SEGMENTO'),
-        ('TIPO_EJECUTIVO', 'SEGMENTO'),
-        ('GENERO', 'CIUDAD_AGENCIA'),
-        ('GENERO', 'SEGMENTO'),
-        ('ESTRATO', 'SEGMENTO'),
-        ('GENERO', 'TIPO_EJECUTIVO'),
-        ('AGENCIA_EJECUTIVO', 'SEGMENTO')
-    ]
-    
-    # Filtrar análisis bivariados válidos
-    analisis_validos = []
-    for var1, var2 in bivariados_cat_cat:
-        if var1 in df.columns and var2 in df.columns:
-            analisis_validos.append((var1, var2))
-        else:
-            log_mensaje(f"Advertencia: No se puede realizar análisis bivariado {var1} vs {var2}. Una o ambas variables no existen", "ADVERTENCIA")
+            log_mensaje(f"Error al cargar o limpiar datos: {str(e)}", "ERROR")
+            raise
+        resultados.update({"datos": df, "reporte_limpieza": info_carga["reporte_limpieza"],
+                           "reporte_validacion": reporte_validacion})
+    
+        # Cada proceso de trabajo del plan abre su propia conexión al almacén
+        usar_almacen = False
+        if cfg['USAR_ALMACEN_SQL']:
+            try:
+                # La clave son los datos ya validados y deduplicados: la política de
+                # deduplicación o las reglas de validación cambian las filas sin cambiar el archivo
+                clave_almacen = digest_dataframe(df)
+                conexion_sql, reconstruido = preparar_almacen(df, cfg['ALMACEN_SQL_PATH'], clave_almacen)
+                conexion_sql.close()
+                usar_almacen = True
+                log_mensaje(f"Almacén SQL {'creado' if reconstruido else 'reutilizado'}: {cfg['ALMACEN_SQL_PATH']}", "INFO")
+            except Exception as e:
+                log_mensaje(f"No se pudo preparar el almacén SQL, se usará el DataFrame: {str(e)}", "ADVERTENCIA")
+    
+        # 2-6. Análisis del plan: univariados, bivariados, inferencia y texto libre.
+        # Los nodos independientes se ejecutan en paralelo (ver src/planificador.py)
+        iniciar_fase(metricas, "FASES 2-6: EJECUCIÓN DEL PLAN DE ANÁLISIS")
+        log_mensaje("\nFASES 2-6: EJECUCIÓN DEL PLAN DE ANÁLISIS", "INFO")
+    
+        def registrar_nodo(nodo, resultado, completados, total):
+            registrar_analisis(metricas, nodo, resultado)
+            if resultado["estado"] == "completado" and resultado.get("desde_cache"):
+                log_mensaje(f"Análisis {nodo['id']} recuperado de la caché", "INFO", nodo=nodo["id"])
+            elif resultado["estado"] == "completado":
+                log_mensaje(f"Análisis {nodo['id']} completado ({resultado['duracion']:.1f} s)", "INFO",
+                            nodo=nodo["id"], duracion_s=round(resultado["duracion"], 3))
+            elif resultado["estado"] == "omitido":
+                log_mensaje(f"Análisis {nodo['id']} omitido: {resultado['error']}", "ADVERTENCIA", nodo=nodo["id"])
+            else:
+                log_mensaje(f"Error en análisis {nodo['id']}: {resultado['error']}", "ERROR", nodo=nodo["id"])
+                if resultado.get("traceback"):
+                    print(resultado["traceback"])
+            mostrar_progreso("Plan de análisis", completados, total)
+            if al_terminar_nodo is not None:
+                al_terminar_nodo(nodo, resultado)
+    
+        log_mensaje(f"Ejecutando {len(plan)} análisis de {cfg['PLAN_PATH']}", "INFO")
+        # Conteos e índices por grupo compartidos por los análisis y el resumen consolidado
+        contexto = ContextoAnalisis(df)
+        resultados_plan = ejecutar_plan(
+            df, plan,
+            rutas={
+                "export_excel_path": cfg['EXPORT_EXCEL'],
+                "export_pdf_path": cfg['EXPORT_PDF'],
+                "export_png_dir": cfg['EXPORT_PNG_DIR'],
+                "export_json_dir": cfg['EXPORT_JSON_DIR'],
+            },
+            max_workers=cfg['MAX_TRABAJADORES'],
+            ruta_almacen_sql=cfg['ALMACEN_SQL_PATH'] if usar_almacen else None,
+            al_terminar_nodo=registrar_nodo,
+            cache_dir=cfg['CACHE_ARTEFACTOS_DIR'] if cfg['USAR_CACHE_ARTEFACTOS'] else None,
+            opciones_metricas=opciones_medicion(metricas),
+            cola_log=cola_bitacora(),
+            contexto=contexto,
+            limite_nodo_s=cfg['LIMITE_NODO_S'],
+            presupuesto_s=cfg['PRESUPUESTO_PLAN_S'],
+            memoria_compartida=cfg['MEMORIA_COMPARTIDA']
+        )
+        resultados["plan"] = resultados_plan
+        n_completados = sum(1 for r in resultados_plan.values() if r["estado"] == "completado")
+        n_desde_cache = sum(1 for r in resultados_plan.values() if r.get("desde_cache"))
+        n_tiempo_agotado = sum(1 for r in resultados_plan.values() if r.get("tiempo_agotado"))
+        log_mensaje(f"Plan de análisis completado: {n_completados} de {len(resultados_plan)} análisis "
+                    f"({n_desde_cache} recuperados de la caché, {n_tiempo_agotado} interrumpidos por tiempo)", "ÉXITO")
+    
+        if cfg['USAR_CACHE_ARTEFACTOS']:
+            try:
+                eliminados = limpiar_obsoletos(
+                    cfg['CACHE_ARTEFACTOS_DIR'], [archivo for r in resultados_plan.values() for archivo in r.get("archivos", [])])
+                log_mensaje(f"Se eliminaron {len(eliminados)} gráficos y tablas obsoletos", "INFO")
+            except Exception as e:
+                log_mensaje(f"Error al eliminar resultados obsoletos: {str(e)}", "ADVERTENCIA")
     
-    log_mensaje(f"Realizando {len(analisis_validos)} análisis bivariados categórica-categórica", "INFO")
+        # 7. Generar datos para visualización con Plotly
+        iniciar_fase(metricas, "FASE 7: GENERACIÓN DE DATOS PARA VISUALIZACIÓN INTERACTIVA")
+        log_mensaje("\nFASE 7: GENERACIÓN DE DATOS PARA VISUALIZACIÓN INTERACTIVA", "INFO")
     
-    # Análisis bivariado cat-cat con barra de progreso
-    for i, (var1, var2) in enumerate(analisis_validos):
-        mostrar_progreso("Análisis bivariado cat-cat", i, len(analisis_validos))
         try:
-            bivariado_cat_cat(
-                df, var1, var2, top_n=None,  # top_n=None para todo
-                export_excel_path=EXPORT_EXCEL,
-                export_pdf_path=EXPORT_PDF,
-                export_png_dir=EXPORT_PNG_DIR,
-                export_json_dir=EXPORT_JSON_DIR
-            )
-            plt.close('all')
-            log_mensaje(f"Análisis bivariado {var1} vs {var2} completado", "INFO")
+            # Las tablas de frecuencia de cada pregunta (tabla_PREGUNTA_*.json) las genera el plan
+            preguntas = ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']
+            preguntas_disponibles = [p for p in preguntas if p in df.columns]
+        
+            # Crear un archivo JSON consolidado para simplificar la carga en la interfaz web.
+            # Se reconstruyen los acumuladores desde el histórico completo; las cargas
+            # diarias posteriores los actualizan con ingesta_incremental.py
+            log_mensaje("Generando archivo consolidado de estadísticas", "INFO")
+            acumuladores = actualizar_acumuladores(acumuladores_vacios(preguntas_disponibles), df, contexto)
+            acumuladores["archivos_ingeridos"].append(digest_datos(cfg['DATA_PATH']))
+            guardar_acumuladores(acumuladores, cfg['ACUMULADORES_PATH'])
+            guardar_claves(df, cfg['ACUMULADORES_PATH'])
+            guardar_resumen(acumuladores, os.path.join(cfg['EXPORT_JSON_DIR'], "encuesta_satisfaccion.json"))
+        
+            log_mensaje("Archivo JSON consolidado generado exitosamente", "ÉXITO")
+        
         except Exception as e:
-            log_mensaje(f"Error en análisis bivariado {var1} vs {var2}: {str(e)}", "ERROR")
-            # Mostrar traceback para mejor diagnóstico
+            log_mensaje(f"Error al generar datos adicionales: {str(e)}", "ERROR")
             traceback.print_exc()
     
-    mostrar_progreso("Análisis bivariado cat-cat", len(analisis_validos), len(analisis_validos))
-    log_mensaje("Análisis bivariado categórica-categórica completado", "ÉXITO")
-    
-    # 4. Análisis bivariado categórica-numérica
-    log_mensaje("\nFASE 4: ANÁLISIS BIVARIADO CATEGÓRICA-NUMÉRICA", "INFO")
-    
-    bivariados_cat_num = [
-        ('CIUDAD_AGENCIA', 'PREGUNTA_1'),
-        ('TIPO_EJECUTIVO', 'PREGUNTA_1'),
-        ('SEGMENTO', 'PREGUNTA_1'),
-        ('GENERO', 'PREGUNTA_1'),
-        ('ESTRATO', 'PREGUNTA_1'),
-        ('AGENCIA_EJECUTIVO', 'PREGUNTA_1')
-    ]
-    
-    # Filtrar análisis bivariados válidos
-    analisis_validos = []
-    for var_cat, var_num in bivariados_cat_num:
-        if var_cat in df.columns and var_num in df.columns:
-            analisis_validos.append((var_cat, var_num))
-        else:
-            log_mensaje(f"Advertencia: No se puede realizar análisis bivariado {var_cat} vs {var_num}. Una o ambas variables no existen", "ADVERTENCIA")
-    
-    log_mensaje(f"Realizando {len(analisis_validos)} análisis bivariados categórica-numérica", "INFO")
-    
-    # Análisis bivariado cat-num con barra de progreso
-    for i, (var_cat, var_num) in enumerate(analisis_validos):
-        mostrar_progreso("Análisis bivariado cat-num", i, len(analisis_validos))
+        # Exportar todas las figuras acumuladas al PDF
+        iniciar_fase(metricas, "FASE 8: EXPORTACIÓN FINAL DE RESULTADOS")
+        log_mensaje("\nFASE 8: EXPORTACIÓN FINAL DE RESULTADOS", "INFO")
         try:
-            bivariado_cat_num(
-                df, var_cat, var_num, top_n=None,
-                export_excel_path=EXPORT_EXCEL,
-                export_pdf_path=EXPORT_PDF,
-                export_png_dir=EXPORT_PNG_DIR,
-                export_json_dir=EXPORT_JSON_DIR
-            )
-            plt.close('all')
-            log_mensaje(f"Análisis bivariado {var_cat} vs {var_num} completado", "INFO")
+            log_mensaje(f"Exportando todas las figuras al PDF: {cfg['EXPORT_PDF']}", "INFO")
+            export_all_figures_to_pdf(cfg['EXPORT_PDF'])
+            log_mensaje(f"PDF generado exitosamente: {cfg['EXPORT_PDF']}", "ÉXITO")
         except Exception as e:
-            log_mensaje(f"Error en análisis bivariado {var_cat} vs {var_num}: {str(e)}", "ERROR")
+            log_mensaje(f"Error al generar PDF: {str(e)}", "ERROR")
             traceback.print_exc()
     
-    mostrar_progreso("Análisis bivariado cat-num", len(analisis_validos), len(analisis_validos))
-    log_mensaje("Análisis bivariado categórica-numérica completado", "ÉXITO")
-    
-    # 5. Inferencia: comparación de satisfacción entre segmentos
-    log_mensaje("\nFASE 5: INFERENCIA ESTADÍSTICA", "INFO")
-    
-    if 'SEGMENTO' in df.columns and 'PREGUNTA_1' in df.columns:
-        log_mensaje("Realizando comparación estadística entre segmentos de clientes", "INFO")
+        # Cerrar todas las ventanas de matplotlib automáticamente (forzar cierre)
         try:
-            comparar_grupos(
-                df, 'SEGMENTO', 'PREGUNTA_1', 'Personas', 'Empresas',
-                export_excel_path=EXPORT_EXCEL,
-                export_pdf_path=EXPORT_PDF,
-                export_png_dir=EXPORT_PNG_DIR,
-                export_json_dir=EXPORT_JSON_DIR
-            )
             plt.close('all')
-            log_mensaje("Análisis inferencial completado exitosamente", "ÉXITO")
-        except Exception as e:
-            log_mensaje(f"Error en análisis inferencial SEGMENTO vs PREGUNTA_1: {str(e)}", "ERROR")
-            traceback.print_exc()
-    else:
-        log_mensaje("No se puede realizar análisis inferencial: variables SEGMENTO o PREGUNTA_1 no disponibles", "ADVERTENCIA")
-    
-    # 6. Análisis de texto libre en comentarios
-    log_mensaje("\nFASE 6: ANÁLISIS DE TEXTO LIBRE", "INFO")
-    
-    try:
-        log_mensaje("Realizando análisis de texto libre en comentarios", "INFO")
-        analisis_texto_pregunta5(
-            df,
-            export_excel_path=EXPORT_EXCEL,
-            export_pdf_path=EXPORT_PDF,
-            export_png_dir=EXPORT_PNG_DIR,
-            export_json_dir=EXPORT_JSON_DIR
-        )
-        plt.close('all')
-        log_mensaje("Análisis de texto completado exitosamente", "ÉXITO")
-    except Exception as e:
-        log_mensaje(f"Error al analizar comentarios: {str(e)}", "ERROR")
-        traceback.print_exc()
-    
-    # 7. Generar datos para visualización con Plotly
-    log_mensaje("\nFASE 7: GENERACIÓN DE DATOS PARA VISUALIZACIÓN INTERACTIVA", "INFO")
-    
-    try:
-        # Para cada pregunta, crear objeto JSON con distribución de frecuencias
-        preguntas = ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']
-        preguntas_disponibles = [p for p in preguntas if p in df.columns]
         
-        for i, pregunta in enumerate(preguntas_disponibles):
-            mostrar_progreso("Generando JSON para preguntas", i, len(preguntas_disponibles))
-            # Crear DataFrame con distribución de frecuencias
-            abs_freq = df[pregunta].value_counts().sort_index()
-            rel_freq = df[pregunta].value_counts(normalize=True).sort_index() * 100
-            tabla = pd.DataFrame({'Frec. Absoluta': abs_freq, 'Frec. Relativa (%)': rel_freq.round(2)})
-            tabla.reset_index().rename(columns={'index': pregunta}).to_json(
-                os.path.join(EXPORT_JSON_DIR, f"tabla_{pregunta}.json"),
-                orient='records', force_ascii=False, indent=2
-            )
-        
-        mostrar_progreso("Generando JSON para preguntas", len(preguntas_disponibles), len(preguntas_disponibles))
-        log_mensaje("JSON de distribución de frecuencias generados", "INFO")
-        
-        # Crear un archivo JSON consolidado para simplificar la carga en la interfaz web
-        log_mensaje("Generando archivo consolidado de estadísticas", "INFO")
-        datos_consolidados = {
-            "informacion_general": {
-                "fecha_generacion": pd.Timestamp.now().strftime("%Y-%m-%d"),
-                "total_encuestas": len(df),
-                "periodo_estudio": "01/01/2025 - 30/04/2025"  # Puedes calcular esto desde tus datos reales
-            },
-            "estadisticas_preguntas": {}
-        }
-        
-        # Añadir estadísticas de cada pregunta
-        for pregunta in preguntas_disponibles:
-            datos_consolidados["estadisticas_preguntas"][pregunta] = {
-                "media": float(df[pregunta].mean()),
-                "mediana": float(df[pregunta].median()),
-                "desviacion": float(df[pregunta].std()),
-                "min": float(df[pregunta].min()),
-                "max": float(df[pregunta].max()),
-                "n_validos": int(df[pregunta].count()),
-                "n_faltantes": int(df[pregunta].isna().sum())
-            }
-        
-        # Guardar el archivo consolidado
-        with open(os.path.join(EXPORT_JSON_DIR, "encuesta_satisfaccion.json"), 'w', encoding='utf-8') as f:
-            json.dump(datos_consolidados, f, ensure_ascii=False, indent=2)
-        
-        log_mensaje("Archivo JSON consolidado generado exitosamente", "ÉXITO")
-        
-    except Exception as e:
-        log_mensaje(f"Error al generar datos adicionales: {str(e)}", "ERROR")
-        traceback.print_exc()
+            # Método más robusto para cerrar figuras
+            try:
+                # Para versiones más nuevas
+                import matplotlib
+                if hasattr(matplotlib._pylab_helpers.Gcf, 'destroy_all_figs'):
+                    matplotlib._pylab_helpers.Gcf.destroy_all_figs()
+                # Para versiones más antiguas
+                elif hasattr(matplotlib._pylab_helpers.Gcf, 'figs'):
+                    for manager in list(matplotlib._pylab_helpers.Gcf.figs.values()):
+                        manager.destroy()
+            except Exception:
+                pass  # Si falla, seguimos adelante
+        except Exception as e:
+            log_mensaje(f"Error al cerrar ventanas de matplotlib: {str(e)}", "ADVERTENCIA")
     
-    # Exportar todas las figuras acumuladas al PDF
-    log_mensaje("\nFASE 8: EXPORTACIÓN FINAL DE RESULTADOS", "INFO")
-    try:
-        log_mensaje(f"Exportando todas las figuras al PDF: {EXPORT_PDF}", "INFO")
-        export_all_figures_to_pdf(EXPORT_PDF)
-        log_mensaje(f"PDF generado exitosamente: {EXPORT_PDF}", "ÉXITO")
-    except Exception as e:
-        log_mensaje(f"Error al generar PDF: {str(e)}", "ERROR")
-        traceback.print_exc()
+        iniciar_fase(metricas, "GENERACIÓN DE ARCHIVOS JSON PARA PLOTLY")
+        log_mensaje("\nGENERANDO ARCHIVOS JSON PARA VISUALIZACIONES INTERACTIVAS", "INFO")
     
-    # Cerrar todas las ventanas de matplotlib automáticamente (forzar cierre)
-    try:
-        plt.close('all')
-        
-        # Método más robusto para cerrar figuras
+        # Importar y ejecutar la generación de archivos JSON de Plotly
         try:
-            # Para versiones más nuevas
-            import matplotlib
-            if hasattr(matplotlib._pylab_helpers.Gcf, 'destroy_all_figs'):
-                matplotlib._pylab_helpers.Gcf.destroy_all_figs()
-            # Para versiones más antiguas
-            elif hasattr(matplotlib._pylab_helpers.Gcf, 'figs'):
-                for manager in list(matplotlib._pylab_helpers.Gcf.figs.values()):
-                    manager.destroy()
-        except Exception:
-            pass  # Si falla, seguimos adelante
-    except Exception as e:
-        log_mensaje(f"Error al cerrar ventanas de matplotlib: {str(e)}", "ADVERTENCIA")
-    
-    log_mensaje("\nGENERANDO ARCHIVOS JSON PARA VISUALIZACIONES INTERACTIVAS", "INFO")
-    
-    # Importar y ejecutar la generación de archivos JSON de Plotly
-    try:
-        # Importar funciones de generate_plotly_json.py
-        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-        from generate_plotly_json import (
-            convert_json_table_to_plotly,
-            generate_wordcloud_plotly,
-            process_inference_json,
-            DATA_DIR
-        )
+            # Importar funciones de generate_plotly_json.py
+            directorio_proyecto = os.path.dirname(os.path.abspath(__file__))
+            if directorio_proyecto not in sys.path:
+                sys.path.insert(0, directorio_proyecto)
+            from generate_plotly_json import (
+                convert_json_table_to_plotly,
+                generate_wordcloud_plotly,
+                process_inference_json
+            )
+            json_dir = cfg['EXPORT_JSON_DIR']
         
-        # Generar archivos JSON de Plotly
-        log_mensaje("Iniciando generación de archivos JSON para Plotly", "INFO")
+            # Generar archivos JSON de Plotly
+            log_mensaje("Iniciando generación de archivos JSON para Plotly", "INFO")
         
-        # 1. Procesar tablas simples (gráficos de barras/pie)
-        tabla_files = [f for f in os.listdir(DATA_DIR) if f.startswith("tabla_") and f.endswith(".json") 
-                      and not f.startswith("tabla_wordcloud_")]
+            # 1. Procesar tablas simples (gráficos de barras/pie)
+            tabla_files = [f for f in os.listdir(json_dir) if f.startswith("tabla_") and f.endswith(".json") 
+                          and not f.startswith("tabla_wordcloud_")]
         
-        for i, json_file in enumerate(tabla_files):
-            mostrar_progreso("Generando visualizaciones interactivas", i, len(tabla_files))
-            try:
-                if "PREGUNTA" in json_file and not "_vs_" in json_file:
-                    # Para preguntas usar gráfico de barras
-                    convert_json_table_to_plotly(
-                        json_file, 
-                        chart_type="bar", 
-                        title=f"Distribución de {json_file.replace('tabla_', '').replace('.json', '')}",
-                        yaxis_title="Cantidad"
-                    )
-                elif ("SEGMENTO" in json_file or "GENERO" in json_file or "ESTRATO" in json_file) and not "_vs_" in json_file:
-                    # Para segmento, género y estrato usar gráfico de pie
-                    convert_json_table_to_plotly(
-                        json_file, 
-                        chart_type="pie", 
-                        title=f"Distribución por {json_file.replace('tabla_', '').replace('.json', '')}"
-                    )
-                else:
-                    # Para el resto usar gráfico de barras
-                    convert_json_table_to_plotly(
-                        json_file, 
-                        chart_type="bar", 
-                        title=f"Distribución de {json_file.replace('tabla_', '').replace('.json', '')}",
-                        yaxis_title="Cantidad"
-                    )
-            except Exception as e:
-                log_mensaje(f"Error al generar visualización para {json_file}: {str(e)}", "ADVERTENCIA")
+            for i, json_file in enumerate(tabla_files):
+                mostrar_progreso("Generando visualizaciones interactivas", i, len(tabla_files))
+                try:
+                    if "PREGUNTA" in json_file and not "_vs_" in json_file:
+                        # Para preguntas usar gráfico de barras
+                        convert_json_table_to_plotly(
+                            json_file, 
+                            chart_type="bar", 
+                            title=f"Distribución de {json_file.replace('tabla_', '').replace('.json', '')}",
+                            yaxis_title="Cantidad",
+                            directorio=json_dir
+                        )
+                    elif ("SEGMENTO" in json_file or "GENERO" in json_file or "ESTRATO" in json_file) and not "_vs_" in json_file:
+                        # Para segmento, género y estrato usar gráfico de pie
+                        convert_json_table_to_plotly(
+                            json_file, 
+                            chart_type="pie", 
+                            title=f"Distribución por {json_file.replace('tabla_', '').replace('.json', '')}",
+                            directorio=json_dir
+                        )
+                    else:
+                        # Para el resto usar gráfico de barras
+                        convert_json_table_to_plotly(
+                            json_file, 
+                            chart_type="bar", 
+                            title=f"Distribución de {json_file.replace('tabla_', '').replace('.json', '')}",
+                            yaxis_title="Cantidad",
+                            directorio=json_dir
+                        )
+                except Exception as e:
+                    log_mensaje(f"Error al generar visualización para {json_file}: {str(e)}", "ADVERTENCIA")
                 
-        mostrar_progreso("Generando visualizaciones interactivas", len(tabla_files), len(tabla_files))
+            mostrar_progreso("Generando visualizaciones interactivas", len(tabla_files), len(tabla_files))
         
-        # 2. Procesar nube de palabras
-        wordcloud_files = [f for f in os.listdir(DATA_DIR) if f.startswith("tabla_wordcloud_") and f.endswith(".json")]
-        log_mensaje(f"Generando {len(wordcloud_files)} nubes de palabras interactivas", "INFO")
+            # 2. Procesar nube de palabras
+            wordcloud_files = [f for f in os.listdir(json_dir) if f.startswith("tabla_wordcloud_") and f.endswith(".json")]
+            log_mensaje(f"Generando {len(wordcloud_files)} nubes de palabras interactivas", "INFO")
         
-        for wc_file in wordcloud_files:
-            try:
-                generate_wordcloud_plotly(wc_file)
-                log_mensaje(f"Nube de palabras generada para {wc_file}", "INFO")
-            except Exception as e:
-                log_mensaje(f"Error al generar nube de palabras para {wc_file}: {str(e)}", "ADVERTENCIA")
+            for wc_file in wordcloud_files:
+                try:
+                    generate_wordcloud_plotly(wc_file, json_dir)
+                    log_mensaje(f"Nube de palabras generada para {wc_file}", "INFO")
+                except Exception as e:
+                    log_mensaje(f"Error al generar nube de palabras para {wc_file}: {str(e)}", "ADVERTENCIA")
         
-        # 3. Procesar archivos de inferencia
-        inference_files = [f for f in os.listdir(DATA_DIR) if f.startswith("inferencia_") and f.endswith(".json")]
-        log_mensaje(f"Procesando {len(inference_files)} archivos de inferencia estadística", "INFO")
+            # 3. Procesar archivos de inferencia
+            inference_files = [f for f in os.listdir(json_dir) if f.startswith("inferencia_") and f.endswith(".json")]
+            log_mensaje(f"Procesando {len(inference_files)} archivos de inferencia estadística", "INFO")
         
-        for inf_file in inference_files:
-            try:
-                process_inference_json(inf_file)
-                log_mensaje(f"Visualización de inferencia generada para {inf_file}", "INFO")
-            except Exception as e:
-                log_mensaje(f"Error al procesar archivo de inferencia {inf_file}: {str(e)}", "ADVERTENCIA")
+            for inf_file in inference_files:
+                try:
+                    process_inference_json(inf_file, json_dir)
+                    log_mensaje(f"Visualización de inferencia generada para {inf_file}", "INFO")
+                except Exception as e:
+                    log_mensaje(f"Error al procesar archivo de inferencia {inf_file}: {str(e)}", "ADVERTENCIA")
         
-        log_mensaje("Generación de archivos JSON para Plotly completada exitosamente", "ÉXITO")
+            log_mensaje("Generación de archivos JSON para Plotly completada exitosamente", "ÉXITO")
     
-    except Exception as e:
-        log_mensaje(f"Error al generar los archivos JSON de Plotly: {str(e)}", "ERROR")
-        traceback.print_exc()
+        except Exception as e:
+            log_mensaje(f"Error al generar los archivos JSON de Plotly: {str(e)}", "ERROR")
+            traceback.print_exc()
     
-        # A partir de aquí, iniciar servidor web y abrir reporte
+        try:
+            resumen_metricas = guardar_metricas(metricas, cfg['METRICAS_PATH'])
+            resultados["metricas"] = resumen_metricas
+            log_mensaje(f"Métricas de la ejecución guardadas en {cfg['METRICAS_PATH']} "
+                        f"({resumen_metricas['tiempo_total_s']:.1f} s en total)", "INFO")
+        except Exception as e:
+            log_mensaje(f"No se pudieron guardar las métricas de la ejecución: {str(e)}", "ADVERTENCIA")
+    
+        # Resumen final
+        log_mensaje("\n" + "="*80, "INFO")
+        log_mensaje("ANÁLISIS DE SATISFACCIÓN COMPLETADO EXITOSAMENTE", "ÉXITO")
+        log_mensaje("="*80, "INFO")
+        log_mensaje("Resultados generados:", "INFO")
+        log_mensaje(f"1. Archivo Excel: {cfg['EXPORT_EXCEL']}", "INFO")
+        log_mensaje(f"2. Archivo PDF: {cfg['EXPORT_PDF']}", "INFO")
+        log_mensaje(f"3. Gráficos PNG: {cfg['EXPORT_PNG_DIR']}", "INFO")
+        log_mensaje(f"4. Datos JSON: {cfg['EXPORT_JSON_DIR']}", "INFO")
+        log_mensaje(f"5. Archivo de log: {cfg['LOG_FILE']}", "INFO")
+        log_mensaje(f"6. Métricas de rendimiento: {cfg['METRICAS_PATH']}", "INFO")
+        log_mensaje("="*80, "INFO")
+
+    except Exception as e:
+        # Capturar cualquier error no manejado
+        log_mensaje(f"ERROR CRÍTICO NO MANEJADO: {str(e)}", "ERROR")
+        log_mensaje("El proceso se ha detenido debido a un error crítico", "ERROR")
+        raise
+    finally:
+        # Escribir los mensajes pendientes del log
+        cerrar_bitacora()
+    return resultados
+
+def iniciar_servidor_y_abrir_reporte(log_file=LOG_FILE, consola=LOG_CONSOLA):
+    """
+    Inicia una sola vez el servidor web local (si el puerto está libre), espera
+    a que responda y abre el reporte en el navegador.
+    """
+    iniciar_bitacora(log_file, consola=consola, reiniciar=False)
     log_mensaje("\nINICIANDO SERVIDOR WEB Y ABRIENDO EL REPORTE EN EL NAVEGADOR", "INFO")
-    
-    # Iniciar el servidor web
     try:
-        # Verificar si ya hay un servidor corriendo en el puerto 8000
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        result = sock.connect_ex(('127.0.0.1', 8000))
-        sock.close()
-        
-        if result != 0:  # El puerto no está en uso
-            log_mensaje("Iniciando servidor web en http://localhost:8000", "INFO")
-            
+        # Verificar si ya hay un servidor corriendo en el puerto
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            puerto_libre = sock.connect_ex(('127.0.0.1', PUERTO_SERVIDOR)) != 0
+
+        if puerto_libre:
+            log_mensaje(f"Iniciando servidor web en http://localhost:{PUERTO_SERVIDOR}", "INFO")
             # Usar el script dedicado para el servidor si existe
             if os.path.exists('start_server.py'):
-                if os.name == 'nt':  # Windows
-                    os.system('start /B python start_server.py')
-                else:  # Linux/Mac
-                    os.system('python start_server.py &')
+                comando = [sys.executable, 'start_server.py']
             else:
-                # Método alternativo usando http.server
-                if os.name == 'nt':  # Windows
-                    os.system('start /B python -m http.server 8000')
-                else:  # Linux/Mac
-                    os.system('python -m http.server 8000 &')
-            
+                comando = [sys.executable, '-m', 'http.server', str(PUERTO_SERVIDOR)]
+            subprocess.Popen(comando)
+
             # Esperar a que el servidor esté listo
-            log_mensaje("Esperando a que el servidor web esté listo...", "INFO")
-            for i in range(10):
+            import urllib.request
+            for _ in range(50):
                 try:
-                    import urllib.request
-                    urllib.request.urlopen('http://localhost:8000', timeout=1)
+                    urllib.request.urlopen(f'http://localhost:{PUERTO_SERVIDOR}', timeout=1)
                     log_mensaje("Servidor web iniciado correctamente", "ÉXITO")
                     break
-                except:
-                    log_mensaje(f"Intento {i+1}/10: Esperando a que el servidor esté listo...", "INFO")
-                    time.sleep(1)
+                except Exception:
+                    time.sleep(0.2)
             else:
                 log_mensaje("No se pudo confirmar que el servidor web esté listo, pero se intentará abrir el navegador de todos modos", "ADVERTENCIA")
         else:
-            log_mensaje("Ya hay un servidor web ejecutándose en el puerto 8000", "INFO")
-        
+            log_mensaje(f"Ya hay un servidor web ejecutándose en el puerto {PUERTO_SERVIDOR}", "INFO")
+
         # Abrir el reporte en el navegador web
-        time.sleep(1)
-        url = 'http://localhost:8000/reporte_web_coltefinanciera.html'
-        log_mensaje(f"Abriendo reporte web en: {url}", "INFO")
-        webbrowser.open(url)
+        log_mensaje(f"Abriendo reporte web en: {URL_REPORTE}", "INFO")
+        webbrowser.open(URL_REPORTE)
         log_mensaje("Reporte web abierto en el navegador", "ÉXITO")
     except Exception as e:
         log_mensaje(f"Error al iniciar servidor o abrir navegador: {str(e)}", "ERROR")
         log_mensaje("Puede abrir manualmente el reporte ejecutando un servidor local", "ADVERTENCIA")
-    
-    # Usar el script dedicado para el servidor si existe
-    if os.path.exists('start_server.py'):
-        try:
-            subprocess.Popen([sys.executable, 'start_server.py'])
-            log_mensaje("Servidor dedicado iniciado con start_server.py", "ÉXITO")
-        except Exception as e:
-            log_mensaje(f"Error al iniciar el servidor dedicado: {str(e)}", "ERROR")
-    
-    # Resumen final
-    log_mensaje("\n" + "="*80, "INFO")
-    log_mensaje("ANÁLISIS DE SATISFACCIÓN COMPLETADO EXITOSAMENTE", "ÉXITO")
-    log_mensaje("="*80, "INFO")
-    log_mensaje("Resultados generados:", "INFO")
-    log_mensaje(f"1. Archivo Excel: {EXPORT_EXCEL}", "INFO")
-    log_mensaje(f"2. Archivo PDF: {EXPORT_PDF}", "INFO")
-    log_mensaje(f"3. Gráficos PNG: {EXPORT_PNG_DIR}", "INFO")
-    log_mensaje(f"4. Datos JSON: {EXPORT_JSON_DIR}", "INFO")
-    log_mensaje(f"5. Visualización web: http://localhost:8000/reporte_web_coltefinanciera.html", "INFO")
-    log_mensaje(f"6. Archivo de log: {LOG_FILE}", "INFO")
-    log_mensaje("="*80, "INFO")
+    finally:
+        cerrar_bitacora()
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos: ejecuta run_pipeline y, salvo
+    con --headless, inicia el servidor web y abre el reporte.
+    """
+    parser = argparse.ArgumentParser(description="Análisis de satisfacción Coltefinanciera")
+    parser.add_argument('--headless', action='store_true',
+                        help="Solo cálculos y exportaciones: no inicia el servidor web ni abre el navegador")
+    parser.add_argument('--datos', help=f"Archivo, directorio o patrón de datos (por defecto {DATA_PATH})")
+    parser.add_argument('--trabajadores', type=int, help="Procesos para el plan de análisis (1: secuencial)")
+    parser.add_argument('--presupuesto', type=float,
+                        help="Segundos para el plan de análisis; lo que no termine a tiempo se omite")
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.datos:
+        config['DATA_PATH'] = args.datos
+    if args.trabajadores:
+        config['MAX_TRABAJADORES'] = args.trabajadores
+    if args.presupuesto:
+        config['PRESUPUESTO_PLAN_S'] = args.presupuesto
+    try:
+        run_pipeline(config)
+    except Exception:
+        traceback.print_exc()
+        sys.exit(1)
+
+    if args.headless:
+        return
+    iniciar_servidor_y_abrir_reporte()
+
+    # Final del script - Mostrar mensaje de éxito
+    print("\n" + "="*80)
+    print("PROYECTO EJECUTADO CORRECTAMENTE")
+    print("="*80)
+    print("\n🎉 ¡El análisis se ha completado con éxito!")
+    print("📊 Datos procesados y visualizaciones generadas")
+    print("📄 Reporte web abierto en el navegador")
+    print(f"🌐 Servidor web ejecutándose en http://localhost:{PUERTO_SERVIDOR}")
+    print("\nPara detener el servidor, cierra la ventana de la consola o presiona Ctrl+C")
+
 
-except Exception as e:
-    # Capturar cualquier error no manejado
-    log_mensaje(f"ERROR CRÍTICO NO MANEJADO: {str(e)}", "ERROR")
-    log_mensaje("Detalles del error:", "ERROR")
-    traceback.print_exc()
-    log_mensaje("El proceso se ha detenido debido a un error crítico", "ERROR")
-    sys.exit(1)
-        # Final del script - Mostrar mensaje de éxito
-print("\n" + "="*80)
-print("PROYECTO EJECUTADO CORRECTAMENTE")
-print("="*80)
-print("\n🎉 ¡El análisis se ha completado con éxito!")
-print("📊 Datos procesados y visualizaciones generadas")
-print("📄 Reporte web abierto en el navegador")
-print("🌐 Servidor web ejecutándose en http://localhost:8000")
-print("\nPara detener el servidor, cierra la ventana de la consola o presiona Ctrl+C")
+# La guarda evita que los procesos de trabajo del plan (que en Windows
+# importan este módulo) vuelvan a ejecutar el análisis
+if __name__ == "__main__":
+    main()
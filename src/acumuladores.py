@@ -0,0 +1,287 @@
+# acumuladores.py
+"""
+Acumuladores persistentes para el resumen consolidado de la encuesta.
+
+Permiten actualizar `data/encuesta_satisfaccion.json` con lotes de respuestas
+nuevas sin recalcular sobre todo el histórico: para cada pregunta se guardan
+el conteo, la media y la suma de cuadrados de Welford, el mínimo, el máximo y
+un histograma de valores con el que se obtiene la mediana exacta (las
+respuestas son una escala Likert con pocos valores distintos). El costo de
+cada actualización depende del tamaño del lote, no del histórico. Para no
+contar dos veces a un encuestado, los hashes de sus claves de identidad (ver
+deduplicacion.hash_claves) se guardan en una tabla SQLite indexada junto a los
+acumuladores, en la que cada lote consulta solo sus propias claves.
+"""
+
+import itertools
+import json
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from src.data_loader import load_data
+from src.data_cache import digest_datos
+from src.data_cleaner import clean_chunks, COLUMNAS_PREGUNTAS
+from src.validacion import validar_datos
+from src.deduplicacion import deduplicar, hash_claves, COLUMNAS_IDENTIDAD
+
+VERSION_ACUMULADORES = 1
+FORMATO_PERIODO = '%d/%m/%Y'
+RUTA_CUARENTENA_INGESTA = 'data/cuarentena_ingesta.csv'
+TABLA_CLAVES = 'claves_encuestados'
+# Columnas que lee la ingesta: las del resumen, las que valida validar_datos y las de identidad
+COLUMNAS_INGESTA = COLUMNAS_PREGUNTAS + ['FECHA_ENCUESTA', 'SEGMENTO', 'GENERO', 'ESTRATO'] + COLUMNAS_IDENTIDAD
+
+def acumuladores_vacios(preguntas=COLUMNAS_PREGUNTAS):
+    """Crea la estructura de acumuladores sin observaciones."""
+    return {
+        "version": VERSION_ACUMULADORES,
+        "total_encuestas": 0,
+        "fecha_min": None,
+        "fecha_max": None,
+        "archivos_ingeridos": [],
+        "preguntas": {
+            pregunta: {
+                "n": 0,
+                "n_faltantes": 0,
+                "media": 0.0,
+                "m2": 0.0,
+                "min": None,
+                "max": None,
+                "histograma": {}
+            } for pregunta in preguntas
+        }
+    }
+
+def _combinar_pregunta(acum, valores, conteos=None):
+    """
+    Combina un lote de valores (sin nulos) en el acumulador de una pregunta (Chan et al.).
+    `conteos` (frecuencia de cada valor, ver ContextoAnalisis.conteos) evita volver a contarlos.
+    """
+    n_lote = len(valores)
+    if n_lote == 0:
+        return
+    media_lote = float(valores.mean())
+    m2_lote = float(((valores - media_lote) ** 2).sum())
+
+    n_total = acum["n"] + n_lote
+    delta = media_lote - acum["media"]
+    acum["media"] += delta * n_lote / n_total
+    acum["m2"] += m2_lote + delta ** 2 * acum["n"] * n_lote / n_total
+    acum["n"] = n_total
+
+    minimo, maximo = float(valores.min()), float(valores.max())
+    acum["min"] = minimo if acum["min"] is None else min(acum["min"], minimo)
+    acum["max"] = maximo if acum["max"] is None else max(acum["max"], maximo)
+
+    if conteos is None:
+        unicos, conteos = np.unique(valores, return_counts=True)
+    else:
+        conteos = conteos[conteos > 0].sort_index()
+        unicos, conteos = conteos.index, conteos.to_numpy()
+    histograma = acum["histograma"]
+    for valor, conteo in zip(unicos, conteos):
+        clave = repr(float(valor))
+        histograma[clave] = histograma.get(clave, 0) + int(conteo)
+
+def actualizar_acumuladores(acumuladores, df, contexto=None):
+    """
+    Incorpora las filas de un DataFrame limpio (ver clean_data) a los acumuladores.
+    Con `contexto` (ver src/contexto.py) se reutilizan los conteos de valores
+    que ya calcularon los análisis.
+
+    Modifica y devuelve el mismo diccionario.
+    """
+    acumuladores["total_encuestas"] += int(len(df))
+    for pregunta, acum in acumuladores["preguntas"].items():
+        if pregunta not in df.columns:
+            continue
+        columna = df[pregunta].to_numpy(dtype='float64', na_value=np.nan)
+        validos = columna[~np.isnan(columna)]
+        acum["n_faltantes"] += int(len(columna) - len(validos))
+        _combinar_pregunta(acum, validos, contexto.conteos(pregunta) if contexto is not None else None)
+
+    if 'FECHA_ENCUESTA' in df.columns and df['FECHA_ENCUESTA'].notna().any():
+        fecha_min = df['FECHA_ENCUESTA'].min()
+        fecha_max = df['FECHA_ENCUESTA'].max()
+        if acumuladores["fecha_min"] is not None:
+            fecha_min = min(fecha_min, pd.Timestamp(acumuladores["fecha_min"]))
+            fecha_max = max(fecha_max, pd.Timestamp(acumuladores["fecha_max"]))
+        acumuladores["fecha_min"] = fecha_min.isoformat()
+        acumuladores["fecha_max"] = fecha_max.isoformat()
+    return acumuladores
+
+def _mediana_histograma(histograma, n):
+    """Mediana exacta (misma convención que pandas) a partir de un histograma de valores."""
+    claves = sorted(histograma, key=float)
+    valores = np.array([float(clave) for clave in claves])
+    acumulado = np.cumsum([histograma[clave] for clave in claves])
+    # Posiciones (base 0) de los dos valores centrales de la muestra ordenada
+    bajo = valores[np.searchsorted(acumulado, (n - 1) // 2, side='right')]
+    alto = valores[np.searchsorted(acumulado, n // 2, side='right')]
+    return (bajo + alto) / 2
+
+def estadisticas_pregunta(acum):
+    """Estadísticas de una pregunta con el formato de encuesta_satisfaccion.json."""
+    n = acum["n"]
+    if n == 0:
+        media = mediana = desviacion = minimo = maximo = float('nan')
+    else:
+        media = acum["media"]
+        mediana = float(_mediana_histograma(acum["histograma"], n))
+        desviacion = float(np.sqrt(acum["m2"] / (n - 1))) if n > 1 else float('nan')
+        minimo, maximo = acum["min"], acum["max"]
+    return {
+        "media": float(media),
+        "mediana": mediana,
+        "desviacion": desviacion,
+        "min": float(minimo),
+        "max": float(maximo),
+        "n_validos": int(n),
+        "n_faltantes": int(acum["n_faltantes"])
+    }
+
+def resumen_consolidado(acumuladores):
+    """Construye el contenido de encuesta_satisfaccion.json desde los acumuladores."""
+    if acumuladores["fecha_min"] is not None:
+        periodo = (f"{pd.Timestamp(acumuladores['fecha_min']).strftime(FORMATO_PERIODO)} - "
+                   f"{pd.Timestamp(acumuladores['fecha_max']).strftime(FORMATO_PERIODO)}")
+    else:
+        periodo = "Sin fechas válidas"
+    return {
+        "informacion_general": {
+            "fecha_generacion": datetime.now().strftime("%Y-%m-%d"),
+            "total_encuestas": int(acumuladores["total_encuestas"]),
+            "periodo_estudio": periodo
+        },
+        "estadisticas_preguntas": {
+            pregunta: estadisticas_pregunta(acum)
+            for pregunta, acum in acumuladores["preguntas"].items()
+            if acum["n"] + acum["n_faltantes"] > 0
+        }
+    }
+
+def cargar_acumuladores(ruta):
+    """Lee los acumuladores persistidos, o devuelve acumuladores vacíos si no existen."""
+    if not os.path.exists(ruta):
+        return acumuladores_vacios()
+    with open(ruta, 'r', encoding='utf-8') as f:
+        acumuladores = json.load(f)
+    if acumuladores.get("version") != VERSION_ACUMULADORES:
+        raise ValueError(f"Versión de acumuladores no soportada en {ruta}: {acumuladores.get('version')}")
+    return acumuladores
+
+def guardar_acumuladores(acumuladores, ruta):
+    """Persiste los acumuladores de forma atómica."""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    ruta_temporal = ruta + '.tmp'
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        json.dump(acumuladores, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta)
+
+def guardar_resumen(acumuladores, ruta_json):
+    """Escribe encuesta_satisfaccion.json a partir de los acumuladores."""
+    with open(ruta_json, 'w', encoding='utf-8') as f:
+        json.dump(resumen_consolidado(acumuladores), f, ensure_ascii=False, indent=2)
+
+def ruta_claves(ruta_acumuladores):
+    """Base SQLite de las claves de identidad registradas, junto al archivo de acumuladores."""
+    return os.path.splitext(ruta_acumuladores)[0] + '_claves.sqlite'
+
+def abrir_claves(ruta, reiniciar=False):
+    """Abre (o crea) la tabla de hashes de claves de identidad, con clave primaria (columna, hash)."""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    if reiniciar and os.path.exists(ruta):
+        os.remove(ruta)
+    conexion = sqlite3.connect(ruta)
+    conexion.execute(f'CREATE TABLE IF NOT EXISTS "{TABLA_CLAVES}" '
+                     '(columna TEXT, hash INTEGER, PRIMARY KEY (columna, hash)) WITHOUT ROWID')
+    return conexion
+
+def _filas_claves(df):
+    """Pares (columna, hash) de las claves de identidad de df; SQLite guarda enteros de 64 bits con signo."""
+    for col, hashes in hash_claves(df).items():
+        yield from zip(itertools.repeat(col), hashes.view(np.int64).tolist())
+
+def registrar_claves(conexion, df):
+    """Añade las claves de identidad de df a la tabla (sin confirmar la transacción)."""
+    conexion.executemany(f'INSERT OR IGNORE INTO "{TABLA_CLAVES}" VALUES (?, ?)', _filas_claves(df))
+
+def claves_registradas(conexion, df):
+    """
+    Hashes de las claves de identidad de df que ya están registradas, por
+    columna (ver deduplicar): solo se buscan en el índice las claves del lote.
+    """
+    conexion.execute('CREATE TEMP TABLE IF NOT EXISTS lote (columna TEXT, hash INTEGER, '
+                     'PRIMARY KEY (columna, hash)) WITHOUT ROWID')
+    conexion.execute('DELETE FROM lote')
+    conexion.executemany('INSERT OR IGNORE INTO lote VALUES (?, ?)', _filas_claves(df))
+    consulta = (f'SELECT lote.columna, lote.hash FROM lote JOIN "{TABLA_CLAVES}" AS registradas '
+                'ON registradas.columna = lote.columna AND registradas.hash = lote.hash')
+    claves = {}
+    for col, valor in conexion.execute(consulta):
+        claves.setdefault(col, []).append(valor)
+    return {col: np.array(valores, dtype=np.int64).view(np.uint64) for col, valores in claves.items()}
+
+def guardar_claves(df, ruta_acumuladores):
+    """Reemplaza las claves registradas por las de df (reconstrucción desde el histórico completo)."""
+    conexion = abrir_claves(ruta_claves(ruta_acumuladores), reiniciar=True)
+    try:
+        registrar_claves(conexion, df)
+        conexion.commit()
+    finally:
+        conexion.close()
+
+def ingerir_incremental(filepath, ruta_acumuladores, ruta_json, chunksize=100_000,
+                        ruta_cuarentena=RUTA_CUARENTENA_INGESTA, politica='ultima'):
+    """
+    Añade las respuestas de un archivo nuevo a los acumuladores persistidos y
+    reescribe el resumen consolidado.
+
+    El archivo se procesa por bloques (ver data_loader.iter_chunks). Un archivo
+    cuyo contenido ya fue ingerido se omite para no contar dos veces sus filas.
+    Cada bloque pasa por las mismas reglas que el análisis completo: las filas
+    inválidas se añaden a `ruta_cuarentena` (ver validar_datos), que reúne las
+    rechazadas de todas las ingestas, y los duplicados se eliminan con
+    deduplicar. Como los acumuladores no permiten retirar una respuesta ya
+    contada, las de encuestados registrados en ingestas o bloques anteriores
+    (ver claves_registradas) se descartan; `politica` solo elige entre las
+    respuestas nuevas de un mismo encuestado dentro de un bloque.
+
+    Returns
+    -------
+    dict
+        Resumen de la ingesta: filas añadidas, rechazadas por la validación y
+        duplicadas, y si el archivo fue omitido
+    """
+    acumuladores = cargar_acumuladores(ruta_acumuladores)
+    digest = digest_datos(filepath)
+    if digest in acumuladores["archivos_ingeridos"]:
+        return {"archivo": filepath, "omitido": True, "filas_nuevas": 0, "filas_rechazadas": 0,
+                "duplicados_eliminados": 0, "total_encuestas": acumuladores["total_encuestas"]}
+
+    filas_nuevas = filas_rechazadas = duplicados = 0
+    conexion = abrir_claves(ruta_claves(ruta_acumuladores))
+    try:
+        for chunk in clean_chunks(load_data(filepath, chunksize=chunksize, columnas=COLUMNAS_INGESTA)):
+            chunk, reporte_validacion = validar_datos(chunk, ruta_cuarentena=ruta_cuarentena, anexar=True)
+            chunk, reporte_deduplicacion = deduplicar(chunk, politica=politica,
+                                                      claves_previas=claves_registradas(conexion, chunk))
+            actualizar_acumuladores(acumuladores, chunk)
+            registrar_claves(conexion, chunk)
+            filas_nuevas += len(chunk)
+            filas_rechazadas += reporte_validacion["filas_rechazadas"]
+            duplicados += reporte_deduplicacion["duplicados_eliminados"]
+        acumuladores["archivos_ingeridos"].append(digest)
+
+        guardar_acumuladores(acumuladores, ruta_acumuladores)
+        # Las claves se confirman después de los acumuladores: si la ingesta se
+        # interrumpe antes, la base no tiene claves de filas que no se contaron
+        conexion.commit()
+    finally:
+        conexion.close()
+    guardar_resumen(acumuladores, ruta_json)
+    return {"archivo": filepath, "omitido": False, "filas_nuevas": filas_nuevas,
+            "filas_rechazadas": filas_rechazadas, "duplicados_eliminados": duplicados,
+            "total_encuestas": acumuladores["total_encuestas"]}
@@ -0,0 +1,145 @@
+# almacen_sql.py
+"""
+Almacén SQL embebido (SQLite) con la encuesta limpia.
+
+Es opcional: guarda el DataFrame limpio en un archivo .sqlite, sin servidor,
+con índices sobre las dimensiones usadas para agrupar, y permite que los
+análisis bivariados calculen tablas de contingencia y agregados por grupo en
+la propia base en lugar de filtrar copias del DataFrame en Python.
+"""
+
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+TABLA_ENCUESTA = 'encuesta'
+TABLA_METADATOS = 'metadatos'
+COLUMNAS_INDEXADAS = ['SEGMENTO', 'CIUDAD_AGENCIA', 'AGENCIA_EJECUTIVO', 'FECHA_ENCUESTA']
+
+def _columna(conexion, nombre):
+    """Devuelve el identificador SQL entrecomillado de una columna existente de la tabla."""
+    columnas = {fila[1] for fila in conexion.execute(f'PRAGMA table_info("{TABLA_ENCUESTA}")')}
+    if nombre not in columnas:
+        raise KeyError(f"La columna {nombre} no existe en el almacén SQL")
+    return '"' + nombre + '"'
+
+def _metadato(conexion, clave):
+    try:
+        fila = conexion.execute(f'SELECT valor FROM "{TABLA_METADATOS}" WHERE clave = ?', (clave,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return fila[0] if fila else None
+
+def crear_almacen(df, ruta, digest=None):
+    """
+    Escribe el DataFrame limpio en la base SQLite `ruta` (reemplazando su contenido)
+    y crea los índices de COLUMNAS_INDEXADAS que existan en los datos.
+    """
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    ruta_temporal = ruta + '.tmp'
+    if os.path.exists(ruta_temporal):
+        os.remove(ruta_temporal)
+    conexion = sqlite3.connect(ruta_temporal)
+    try:
+        df.to_sql(TABLA_ENCUESTA, conexion, index=False, chunksize=10_000)
+        for col in COLUMNAS_INDEXADAS:
+            if col in df.columns:
+                conexion.execute(f'CREATE INDEX "idx_{col.lower()}" ON "{TABLA_ENCUESTA}" ("{col}")')
+        conexion.execute(f'CREATE TABLE "{TABLA_METADATOS}" (clave TEXT PRIMARY KEY, valor TEXT)')
+        conexion.execute(f'INSERT INTO "{TABLA_METADATOS}" VALUES (?, ?)', ('digest', digest))
+        conexion.commit()
+    finally:
+        conexion.close()
+    os.replace(ruta_temporal, ruta)
+    return ruta
+
+def abrir_almacen(ruta):
+    """Abre una conexión de solo lectura al almacén."""
+    return sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+
+def preparar_almacen(df, ruta, digest):
+    """
+    Abre el almacén de `ruta`, reconstruyéndolo antes si no existe o si fue
+    creado a partir de otro archivo de origen (distinto digest).
+
+    Returns
+    -------
+    tuple
+        (conexion, reconstruido)
+    """
+    if os.path.exists(ruta):
+        conexion = abrir_almacen(ruta)
+        if _metadato(conexion, 'digest') == digest:
+            return conexion, False
+        conexion.close()
+    crear_almacen(df, ruta, digest)
+    return abrir_almacen(ruta), True
+
+def top_categorias_sql(conexion, var, top_n):
+    """
+    Las `top_n` categorías más frecuentes de `var` (todas si top_n es None), en el
+    mismo orden que value_counts().nlargest(top_n): por frecuencia y, en empate,
+    por orden de aparición.
+    """
+    col = _columna(conexion, var)
+    consulta = (f'SELECT {col} FROM "{TABLA_ENCUESTA}" WHERE {col} IS NOT NULL '
+                f'GROUP BY {col} ORDER BY COUNT(*) DESC, MIN(rowid)')
+    if top_n is not None:
+        consulta += f' LIMIT {int(top_n)}'
+    return [fila[0] for fila in conexion.execute(consulta)]
+
+def _filtro_categorias(col, categorias):
+    if categorias is None:
+        return '', []
+    return f' AND {col} IN ({", ".join("?" * len(categorias))})', list(categorias)
+
+def tabla_contingencia_sql(conexion, var1, var2, categorias=None):
+    """
+    Tabla de contingencia de frecuencias absolutas (como pd.crosstab) calculada
+    con GROUP BY en la base. Con `categorias` solo se consideran esas filas de var1.
+    """
+    col1, col2 = _columna(conexion, var1), _columna(conexion, var2)
+    filtro, parametros = _filtro_categorias(col1, categorias)
+    conteos = pd.read_sql_query(
+        f'SELECT {col1} AS fila, {col2} AS columna, COUNT(*) AS n FROM "{TABLA_ENCUESTA}" '
+        f'WHERE {col1} IS NOT NULL AND {col2} IS NOT NULL{filtro} GROUP BY {col1}, {col2}',
+        conexion, params=parametros)
+    tabla = conteos.pivot(index='fila', columns='columna', values='n').fillna(0).astype('int64')
+    tabla.index.name, tabla.columns.name = var1, var2
+    return tabla
+
+def agregados_grupo_sql(conexion, var_cat, var_num, categorias=None):
+    """
+    Conteo, mínimo, máximo, media y desviación estándar muestral de `var_num`
+    por cada categoría de `var_cat`, calculados en la base (dos pasadas:
+    medias y luego suma de cuadrados de las desviaciones).
+    """
+    cat, num = _columna(conexion, var_cat), _columna(conexion, var_num)
+    filtro, parametros = _filtro_categorias(cat, categorias)
+    agregados = pd.read_sql_query(
+        f'WITH medias AS ('
+        f'  SELECT {cat} AS grupo, COUNT({num}) AS cantidad, MIN({num}) AS Minimo,'
+        f'         MAX({num}) AS Maximo, AVG({num}) AS Promedio'
+        f'  FROM "{TABLA_ENCUESTA}" WHERE {cat} IS NOT NULL{filtro} GROUP BY {cat}) '
+        f'SELECT m.grupo, m.cantidad, m.Minimo, m.Maximo, m.Promedio,'
+        f'       SUM((t.{num} - m.Promedio) * (t.{num} - m.Promedio)) AS suma_cuadrados '
+        f'FROM "{TABLA_ENCUESTA}" t JOIN medias m ON t.{cat} = m.grupo '
+        f'GROUP BY m.grupo ORDER BY m.grupo',
+        conexion, params=parametros)
+    agregados = agregados.set_index('grupo')
+    agregados.index.name = var_cat
+    n = agregados['cantidad']
+    agregados['Desviacion'] = np.sqrt(agregados['suma_cuadrados'].astype('float64') / (n - 1).where(n > 1))
+    return agregados.drop(columns='suma_cuadrados')
+
+def valores_grupo_sql(conexion, var_cat, var_num, categorias=None):
+    """
+    Lee de la base solo las columnas `var_cat` y `var_num` de las filas de las
+    categorías indicadas (usa el índice de var_cat si existe).
+    """
+    cat, num = _columna(conexion, var_cat), _columna(conexion, var_num)
+    filtro, parametros = _filtro_categorias(cat, categorias)
+    return pd.read_sql_query(
+        f'SELECT {cat}, {num} FROM "{TABLA_ENCUESTA}" WHERE {cat} IS NOT NULL{filtro} ORDER BY rowid',
+        conexion, params=parametros)
@@ -13,18 +13,32 @@ Versión: 1.3
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import json
 import os
 from scipy import stats
 from scipy.stats import chi2_contingency, shapiro, mannwhitneyu, kruskal, levene, fisher_exact
-import statsmodels.api as sm
-from statsmodels.stats.multicomp import pairwise_tukeyhsd, MultiComparison
-from statsmodels.stats.power import TTestIndPower, tt_ind_solve_power
 from src.exporter import export_table_to_excel, add_figure_for_pdf, save_plot_to_png
+from src.almacen_sql import top_categorias_sql, tabla_contingencia_sql, agregados_grupo_sql, valores_grupo_sql
+from src.contexto import ContextoAnalisis
+from src.normalidad import shapiro_por_grupos
+from src.chi2_montecarlo import chi2_monte_carlo, SEMILLA
+from src.permutaciones import prueba_permutacion, SEMILLA as SEMILLA_PERMUTACION
+from src.bootstrap import intervalos_bootstrap
+
+METODOS_DIFERENCIAS = ('clasico', 'permutacion')
+NOMBRES_ESTADISTICOS_PERMUTACION = {'medias': 'diferencia de medias', 'medianas': 'diferencia de medianas', 'f': 'estadístico F'}
+
+def _asegurar_float64(df, columna):
+    """
+    Devuelve el DataFrame con `columna` en float64.
+
+    En modo compacto las preguntas se guardan como float32; los estadísticos
+    calculados sobre ese tipo no son serializables con json.dump.
+    """
+    if df[columna].dtype == 'float32':
+        return df.assign(**{columna: df[columna].astype('float64')})
+    return df
 
 # Funciones de validación de supuestos estadísticos
 
@@ -86,7 +100,8 @@ def verificar_normalidad(data, columna, alpha=0.05, plot=False):
         ax1.set_xlabel(columna)
         ax1.set_ylabel('Frecuencia')
         
-        # QQ-plot
+        # QQ-plot (statsmodels y seaborn se importan en las funciones que los usan)
+        import statsmodels.api as sm
         sm.qqplot(datos, line='s', ax=ax2)
         ax2.set_title('QQ-Plot')
         
@@ -117,6 +132,7 @@ def calcular_potencia_estadistica(d_cohen, n1, n2, alpha=0.05):
         interpretación y recomendaciones
     """
     # Calcular potencia con library statsmodels
+    from statsmodels.stats.power import TTestIndPower, tt_ind_solve_power
     power_analysis = TTestIndPower()
     potencia = power_analysis.solve_power(
         effect_size=abs(d_cohen),
@@ -155,7 +171,7 @@ def calcular_potencia_estadistica(d_cohen, n1, n2, alpha=0.05):
         "n_total_necesario": int(np.ceil(n_necesario * (1 + n2/n1)))
     }
 
-def verificar_normalidad_por_grupos(data, var_grupo, var_numerica, alpha=0.05):
+def verificar_normalidad_por_grupos(data, var_grupo, var_numerica, alpha=0.05, contexto=None):
     """
     Verifica la normalidad de una variable numérica en diferentes grupos.
     
@@ -169,35 +185,39 @@ def verificar_normalidad_por_grupos(data, var_grupo, var_numerica, alpha=0.05):
         Nombre de la columna numérica a verificar
     alpha : float, optional
         Nivel de significancia, por defecto 0.05
+    contexto : ContextoAnalisis, optional
+        Índices por grupo de data, o del DataFrame del que data se obtuvo
+        filtrando grupos completos (ver src/contexto.py); por defecto se crea uno
     
     Returns
     -------
     dict
         Resultados de las pruebas para cada grupo y recomendación general
     """
+    if contexto is None:
+        contexto = ContextoAnalisis(data)
     grupos = data[var_grupo].unique()
     resultados = {}
     
+    # Pruebas de todos los grupos, o las ya hechas por otro análisis del contexto
+    pruebas = shapiro_por_grupos(contexto, var_grupo, var_numerica, grupos)
     for grupo in grupos:
-        datos_grupo = data[data[var_grupo] == grupo][var_numerica].dropna()
+        n, estadistico, p_valor = pruebas[grupo]
         
         # Verificar que hay suficientes observaciones
-        if len(datos_grupo) < 3:
+        if p_valor is None:
             resultados[str(grupo)] = {
                 "es_normal": False,
                 "interpretacion": "Insuficientes observaciones",
                 "mensaje": "No se puede realizar la prueba de normalidad"
             }
             continue
-            
-        # Realizar prueba de normalidad
-        estadistico, p_valor = shapiro(datos_grupo)
         
         # Interpretar resultado
         es_normal = p_valor > alpha
         
         resultados[str(grupo)] = {
-            "n": len(datos_grupo),
+            "n": n,
             "estadistico": estadistico,
             "p_valor": p_valor,
             "es_normal": es_normal,
@@ -213,11 +233,12 @@ def verificar_normalidad_por_grupos(data, var_grupo, var_numerica, alpha=0.05):
         "recomendacion": "Usar pruebas paramétricas" if todos_normales else "Usar pruebas no paramétricas"
     }
 
-def calcular_chi2_contingency(df, var1, var2, alpha=0.05):
+def calcular_chi2_contingency(df, var1, var2, alpha=0.05, tabla=None, monte_carlo=True, semilla=SEMILLA):
     """
     Calcula la prueba Chi-cuadrado de independencia para dos variables categóricas.
     Si no se cumplen los requisitos para Chi-cuadrado (frecuencias esperadas >= 5),
-    utiliza la prueba exacta de Fisher como alternativa para tablas 2x2.
+    utiliza la prueba exacta de Fisher como alternativa para tablas 2x2 y, en
+    tablas mayores, estima el p-valor por Monte Carlo (ver src/chi2_montecarlo.py).
     
     Parameters
     ----------
@@ -229,6 +250,14 @@ def calcular_chi2_contingency(df, var1, var2, alpha=0.05):
         Nombre de la segunda variable categórica
     alpha : float, optional
         Nivel de significancia, por defecto 0.05
+    tabla : pandas.DataFrame, optional
+        Tabla de contingencia ya calculada de var1 vs var2; si se indica no se
+        vuelve a construir a partir de df
+    monte_carlo : bool, optional
+        Si es False, en tablas mayores que 2x2 con frecuencias esperadas bajas se
+        mantiene el p-valor asintótico (con advertencia), por defecto True
+    semilla : int, optional
+        Semilla de la simulación Monte Carlo
     
     Returns
     -------
@@ -237,10 +266,12 @@ def calcular_chi2_contingency(df, var1, var2, alpha=0.05):
         y el coeficiente V de Cramer como medida de tamaño del efecto
     """
     # Crear tabla de contingencia
-    tabla = pd.crosstab(df[var1], df[var2])
+    if tabla is None:
+        tabla = pd.crosstab(df[var1], df[var2])
     
-    # Verificar requisitos mínimos para chi-cuadrado
-    frecuencias_esperadas = chi2_contingency(tabla)[3]
+    # Verificar requisitos mínimos para chi-cuadrado (una sola prueba: sus
+    # frecuencias esperadas deciden si se usa el resultado)
+    chi2, p_chi2, dof, frecuencias_esperadas = chi2_contingency(tabla)
     requisito_cumplido = (frecuencias_esperadas >= 5).all()
     
     resultados = {
@@ -249,8 +280,7 @@ def calcular_chi2_contingency(df, var1, var2, alpha=0.05):
     
     # Decidir qué prueba usar
     if requisito_cumplido:
-        # Realizar prueba chi-cuadrado
-        chi2, p_valor, dof, expected = chi2_contingency(tabla)
+        p_valor = p_chi2
         prueba_usada = "Chi-cuadrado"
         
         resultados.update({
@@ -272,9 +302,25 @@ def calcular_chi2_contingency(df, var1, var2, alpha=0.05):
                 "p_valor": p_valor,
                 "advertencia": "Se utilizó la prueba exacta de Fisher porque no se cumplían requisitos para Chi-cuadrado"
             })
+        elif monte_carlo:
+            # Para tablas mayores, p-valor con tablas simuladas de iguales totales
+            simulacion = chi2_monte_carlo(tabla, alpha=alpha, semilla=semilla)
+            p_valor = simulacion["p_valor"]
+            prueba_usada = "Chi-cuadrado (Monte Carlo)"
+            
+            resultados.update({
+                "prueba_usada": prueba_usada,
+                "estadistico_chi2": chi2,
+                "p_valor": p_valor,
+                "p_valor_asintotico": p_chi2,
+                "grados_libertad": dof,
+                "simulaciones_monte_carlo": simulacion["simulaciones"],
+                "advertencia": (f"Algunas frecuencias esperadas son menores a 5. El p-valor se estimó con "
+                                f"{simulacion['simulaciones']} tablas simuladas con los mismos totales (Monte Carlo).")
+            })
         else:
             # Para tablas mayores, usar Chi-cuadrado pero con advertencia
-            chi2, p_valor, dof, expected = chi2_contingency(tabla)
+            p_valor = p_chi2
             prueba_usada = "Chi-cuadrado (con advertencia)"
             
             resultados.update({
@@ -320,11 +366,90 @@ def calcular_chi2_contingency(df, var1, var2, alpha=0.05):
     
     return resultados
 
-def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2=None, alpha=0.05):
+def _diferencias_por_permutacion(contexto, var_grupo, var_numerica, grupos_a_comparar, datos_por_grupo, alpha, estadistico, semilla):
+    """
+    Prueba de permutación de calcular_diferencias_grupos (metodo='permutacion'):
+    estadísticas por grupo, p-valor por permutaciones (ver src/permutaciones.py)
+    y tamaño del efecto (d de Cohen con dos grupos, eta cuadrado con más).
+    """
+    series = [contexto.valores_grupo(var_grupo, var_numerica, grupo) for grupo in grupos_a_comparar]
+    resultados = {"estadisticas": {
+        str(grupo): {"n": len(datos), "media": datos.mean(), "mediana": datos.median(), "desviacion": datos.std()}
+        for grupo, datos in zip(grupos_a_comparar, series)
+    }}
+    if estadistico is None:
+        estadistico = 'medias' if len(grupos_a_comparar) == 2 else 'f'
+    try:
+        permutacion = prueba_permutacion(datos_por_grupo, estadistico, alpha=alpha, semilla=semilla)
+    except ValueError as e:
+        resultados.update({
+            "prueba": "Permutación (fallida)",
+            "error": str(e),
+            "mensaje": "No se pudo realizar la prueba de permutación con los grupos indicados"
+        })
+        return resultados
+    
+    p_valor = permutacion["p_valor"]
+    valor_observado = permutacion["valor_observado"]
+    diferencia_significativa = p_valor < alpha
+    clave_estadistico = {'medias': 'diferencia_medias', 'medianas': 'diferencia_medianas', 'f': 'estadistico_f'}[estadistico]
+    resultados.update({
+        "prueba": f"Permutación ({NOMBRES_ESTADISTICOS_PERMUTACION[estadistico]})",
+        clave_estadistico: valor_observado,
+        "p_valor": p_valor,
+        "intervalo_p_valor": permutacion["intervalo_p_valor"],
+        "permutaciones": permutacion["simulaciones"],
+        "diferencia_significativa": diferencia_significativa,
+    })
+    
+    if len(grupos_a_comparar) == 2:
+        datos1, datos2 = series
+        d_cohen = abs(datos1.mean() - datos2.mean()) / np.sqrt((datos1.var() + datos2.var()) / 2)
+        if d_cohen < 0.2:
+            interpretacion_efecto = "efecto insignificante"
+        elif d_cohen < 0.5:
+            interpretacion_efecto = "efecto pequeño"
+        elif d_cohen < 0.8:
+            interpretacion_efecto = "efecto moderado"
+        else:
+            interpretacion_efecto = "efecto grande"
+        resultados.update({
+            "tamaño_efecto_d": d_cohen,
+            "analisis_potencia": calcular_potencia_estadistica(d_cohen, len(datos1), len(datos2), alpha),
+        })
+    else:
+        # Con más de dos grupos el estadístico es F: eta cuadrado (suma de
+        # cuadrados entre grupos / total) se obtiene de él
+        k = len(grupos_a_comparar)
+        n_total = sum(len(datos) for datos in datos_por_grupo)
+        f_stat = valor_observado
+        eta_cuadrado = 1.0 if np.isinf(f_stat) else f_stat * (k - 1) / (f_stat * (k - 1) + n_total - k)
+        if eta_cuadrado < 0.01:
+            interpretacion_efecto = "efecto insignificante"
+        elif eta_cuadrado < 0.06:
+            interpretacion_efecto = "efecto pequeño"
+        elif eta_cuadrado < 0.14:
+            interpretacion_efecto = "efecto moderado"
+        else:
+            interpretacion_efecto = "efecto grande"
+        resultados.update({
+            "tamaño_efecto_eta_cuadrado": eta_cuadrado,
+            "posthoc": None,
+        })
+    
+    resultados.update({
+        "interpretacion_efecto": interpretacion_efecto,
+        "interpretacion": f"Hay {'una' if diferencia_significativa else 'no hay'} diferencia significativa entre los grupos (p={p_valor:.4f}, {permutacion['simulaciones']} permutaciones, {interpretacion_efecto})"
+    })
+    return resultados
+
+def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2=None, alpha=0.05, contexto=None,
+                                metodo='clasico', estadistico=None, semilla=SEMILLA_PERMUTACION):
     """
     Calcula diferencias entre grupos para una variable numérica.
     Selecciona automáticamente entre pruebas paramétricas y no paramétricas
-    basándose en la normalidad y homogeneidad de varianzas de los datos.
+    basándose en la normalidad y homogeneidad de varianzas de los datos, o
+    usa una prueba de permutación, que no supone ninguna distribución.
     
     Parameters
     ----------
@@ -340,6 +465,19 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
         Segundo grupo a comparar (para comparación de dos grupos)
     alpha : float, optional
         Nivel de significancia, por defecto 0.05
+    contexto : ContextoAnalisis, optional
+        Índices por grupo de df, o del DataFrame del que df se obtuvo filtrando
+        grupos completos (ver src/contexto.py); por defecto se crea uno
+    metodo : str, optional
+        'clasico' (t de Student, Welch, Mann-Whitney, ANOVA o Kruskal-Wallis
+        según los supuestos) o 'permutacion' (ver src/permutaciones.py), por
+        defecto 'clasico'. Las pruebas de normalidad y de varianzas se informan
+        en ambos casos
+    estadistico : str, optional
+        Estadístico de la prueba de permutación: 'medias' o 'medianas' (dos
+        grupos) o 'f'; por defecto 'medias' con dos grupos y 'f' con más
+    semilla : int, optional
+        Semilla de la prueba de permutación
     
     Returns
     -------
@@ -347,8 +485,14 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
         Resultados de la prueba incluyendo estadístico, p-valor, interpretación
         y medida de tamaño del efecto
     """
+    if metodo not in METODOS_DIFERENCIAS:
+        raise ValueError(f"Método de comparación desconocido: {metodo!r} (opciones: {', '.join(METODOS_DIFERENCIAS)})")
+    df = _asegurar_float64(df, var_numerica)
+    if contexto is None:
+        contexto = ContextoAnalisis(df)
+    
     # Comprobar normalidad por grupos
-    normalidad = verificar_normalidad_por_grupos(df, var_grupo, var_numerica, alpha)
+    normalidad = verificar_normalidad_por_grupos(df, var_grupo, var_numerica, alpha, contexto=contexto)
     
     # Identificar grupos a comparar
     grupos = df[var_grupo].unique()
@@ -363,7 +507,7 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
         comparacion_dos_grupos = len(grupos) == 2
     
     # Recopilar datos para cada grupo y verificar homogeneidad de varianzas
-    datos_por_grupo = [df[df[var_grupo] == grupo][var_numerica].dropna().values for grupo in grupos_a_comparar]
+    datos_por_grupo = [contexto.valores_grupo(var_grupo, var_numerica, grupo).to_numpy() for grupo in grupos_a_comparar]
     
     # Verificar homogeneidad de varianzas solo si hay suficientes observaciones
     homogeneidad_varianza = {"test_realizado": False}
@@ -392,11 +536,16 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
         "grupos_comparados": grupos_a_comparar
     }
     
+    if metodo == 'permutacion':
+        resultados.update(_diferencias_por_permutacion(contexto, var_grupo, var_numerica, grupos_a_comparar,
+                                                       datos_por_grupo, alpha, estadistico, semilla))
+        return resultados
+    
     # Para dos grupos
     if comparacion_dos_grupos:
         grupo1, grupo2 = grupos_a_comparar
-        datos1 = df[df[var_grupo] == grupo1][var_numerica].dropna()
-        datos2 = df[df[var_grupo] == grupo2][var_numerica].dropna()
+        datos1 = contexto.valores_grupo(var_grupo, var_numerica, grupo1)
+        datos2 = contexto.valores_grupo(var_grupo, var_numerica, grupo2)
         
         # Estadísticas descriptivas
         stats1 = {
@@ -558,7 +707,7 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
         # Estadísticas por grupo
         stats_grupos = {}
         for grupo in grupos_a_comparar:
-            datos = df[df[var_grupo] == grupo][var_numerica].dropna()
+            datos = contexto.valores_grupo(var_grupo, var_numerica, grupo)
             stats_grupos[str(grupo)] = {
                 "n": len(datos),
                 "media": datos.mean(),
@@ -611,6 +760,7 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
                         })
                         
                         # Realizar Tukey HSD y también crear objeto MultiComparison para más detalle
+                        from statsmodels.stats.multicomp import pairwise_tukeyhsd, MultiComparison
                         tukey = pairwise_tukeyhsd(df_posthoc['valor'], df_posthoc['grupo'], alpha=alpha)
                         mc = MultiComparison(df_posthoc['valor'], df_posthoc['grupo'])
                         tukey_summary = mc.tukeyhsd(alpha=alpha)
@@ -625,8 +775,8 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
                                 tukey.reject)):
                             
                             # Calcular d de Cohen para cada comparación
-                            datos_grupo1 = df_top[df_top[var_grupo] == group1][var_numerica].dropna()
-                            datos_grupo2 = df_top[df_top[var_grupo] == group2][var_numerica].dropna()
+                            datos_grupo1 = contexto.valores_grupo(var_grupo, var_numerica, group1)
+                            datos_grupo2 = contexto.valores_grupo(var_grupo, var_numerica, group2)
                             
                             # Varianza combinada
                             n1, n2 = len(datos_grupo1), len(datos_grupo2)
@@ -858,7 +1008,7 @@ def calcular_diferencias_grupos(df, var_grupo, var_numerica, grupo1=None, grupo2
     
     return resultados
 
-def bivariado_cat_cat(df, var1, var2, top_n=5, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None):
+def bivariado_cat_cat(df, var1, var2, top_n=5, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None, conexion_sql=None, contexto=None):
     """
     Realiza análisis bivariado entre dos variables categóricas y genera visualizaciones.
     
@@ -877,6 +1027,11 @@ def bivariado_cat_cat(df, var1, var2, top_n=5, export_excel_path=None, export_pd
         export_pdf_path (str, opcional): Ruta donde exportar gráficos en PDF
         export_png_dir (str, opcional): Directorio donde guardar imágenes PNG
         export_json_dir (str, opcional): Directorio donde guardar JSON para web
+        conexion_sql (sqlite3.Connection, opcional): Conexión al almacén SQL
+            (ver almacen_sql.preparar_almacen). Si se indica, las categorías más
+            frecuentes y la tabla de contingencia se calculan en la base y df no se usa.
+        contexto (ContextoAnalisis, opcional): Conteos e índices por grupo de df
+            ya calculados (ver src/contexto.py); por defecto se crea uno.
         
     Returns:
         pandas.DataFrame: Tabla de contingencia normalizada por filas
@@ -885,18 +1040,24 @@ def bivariado_cat_cat(df, var1, var2, top_n=5, export_excel_path=None, export_pd
         >>> bivariado_cat_cat(encuestas_df, 'CIUDAD_AGENCIA', 'SEGMENTO', 
                              export_json_dir='data')
     """
-    # Filtrar solo las top_n categorías más frecuentes de var1, o usar todas si top_n es None
-    if top_n is None:
-        df_top = df.copy()  # Usar todas las categorías
+    if conexion_sql is not None:
+        # Agregar en la base: top_n categorías y conteos por par de categorías
+        top_vals = None if top_n is None else top_categorias_sql(conexion_sql, var1, top_n)
+        cross_tab_abs = tabla_contingencia_sql(conexion_sql, var1, var2, top_vals)
     else:
-        top_vals = df[var1].value_counts().nlargest(top_n).index
-        df_top = df[df[var1].isin(top_vals)]
+        # Filtrar solo las top_n categorías más frecuentes de var1, o usar todas si top_n es None
+        if top_n is None:
+            df_top = df  # Usar todas las categorías
+        else:
+            contexto = contexto if contexto is not None else ContextoAnalisis(df)
+            top_vals = contexto.conteos(var1).nlargest(top_n).index
+            df_top = contexto.filas_grupos(var1, top_vals)
+        cross_tab_abs = pd.crosstab(df_top[var1], df_top[var2])
     
-    # Crear tabla de contingencia absoluta y porcentual
-    cross_tab_abs = pd.crosstab(df_top[var1], df_top[var2])
-    cross_tab_pct = pd.crosstab(df_top[var1], df_top[var2], normalize='index') * 100
+    # Tabla de contingencia porcentual a partir de la absoluta
+    cross_tab_pct = cross_tab_abs.div(cross_tab_abs.sum(axis=1), axis=0) * 100
       # Realizar prueba de chi-cuadrado para verificar independencia
-    resultados_chi2 = calcular_chi2_contingency(df_top, var1, var2)
+    resultados_chi2 = calcular_chi2_contingency(None, var1, var2, tabla=cross_tab_abs)
     
     # Imprimir información detallada en consola
     print(f"\n{'='*80}")
@@ -1117,7 +1278,7 @@ def bivariado_cat_cat(df, var1, var2, top_n=5, export_excel_path=None, export_pd
     return cross_tab_pct
 
 
-def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None):
+def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None, conexion_sql=None, contexto=None, metodo='clasico', metodo_ic=None):
     """
     Realiza análisis bivariado entre una variable categórica y una numérica.
     
@@ -1137,6 +1298,17 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
         export_pdf_path (str, opcional): Ruta donde exportar gráficos en PDF
         export_png_dir (str, opcional): Directorio donde guardar imágenes PNG
         export_json_dir (str, opcional): Directorio donde guardar JSON para web
+        conexion_sql (sqlite3.Connection, opcional): Conexión al almacén SQL
+            (ver almacen_sql.preparar_almacen). Si se indica, los agregados por
+            grupo se calculan en la base y de ella solo se leen las dos columnas
+            analizadas (para cuartiles, pruebas y gráficos); df no se usa.
+        contexto (ContextoAnalisis, opcional): Conteos e índices por grupo de df
+            ya calculados (ver src/contexto.py); por defecto se crea uno.
+        metodo (str, opcional): Prueba de diferencias entre grupos, 'clasico' o
+            'permutacion' (ver calcular_diferencias_grupos). Por defecto 'clasico'.
+        metodo_ic (str, opcional): 'percentil' o 'bca' añade a la tabla resumen
+            intervalos bootstrap de Q1, mediana y Q3 de cada categoría
+            (ver src/bootstrap.py). Por defecto None (sin ellos).
         
     Returns:
         pandas.DataFrame: Tabla resumen con estadísticas por categoría
@@ -1145,37 +1317,71 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
         >>> bivariado_cat_num(encuestas_df, 'SEGMENTO', 'PREGUNTA_1', 
                              export_json_dir='data')
     """
-    # Filtrar solo las top_n categorías más frecuentes de var_cat, o usar todas si top_n es None
-    if top_n is None:
-        df_top = df.copy()  # Usar todas las categorías
+    if conexion_sql is not None:
+        top_vals = None if top_n is None else top_categorias_sql(conexion_sql, var_cat, top_n)
+        df_top = valores_grupo_sql(conexion_sql, var_cat, var_num, top_vals)
+        # Los valores leídos de la base tienen su propio índice
+        contexto = ContextoAnalisis(df_top)
     else:
-        top_vals = df[var_cat].value_counts().nlargest(top_n).index
-        df_top = df[df[var_cat].isin(top_vals)]
+        contexto = contexto if contexto is not None else ContextoAnalisis(df)
+        if top_n is None:
+            # Filtrar solo las top_n categorías más frecuentes de var_cat, o usar todas si top_n es None
+            df_top = df  # Usar todas las categorías
+        else:
+            top_vals = contexto.conteos(var_cat).nlargest(top_n).index
+            df_top = contexto.filas_grupos(var_cat, top_vals)
+    df_top = _asegurar_float64(df_top, var_num)
       # Verificar supuestos estadísticos para var_num
     normalidad_global = verificar_normalidad(df_top, var_num)
-    normalidad_por_grupos = verificar_normalidad_por_grupos(df_top, var_cat, var_num)
+    normalidad_por_grupos = verificar_normalidad_por_grupos(df_top, var_cat, var_num, contexto=contexto)
     
     # Calcular diferencias entre grupos con el análisis estadístico completo
-    resultados_diff = calcular_diferencias_grupos(df_top, var_cat, var_num)
+    resultados_diff = calcular_diferencias_grupos(df_top, var_cat, var_num, contexto=contexto, metodo=metodo)
     
     # Generar estadísticas descriptivas por grupo con el análisis de potencia
-    summary = df_top.groupby(var_cat)[var_num].agg(
-        cantidad='count',
-        Minimo='min',
-        Q1=lambda x: x.quantile(0.25),
-        Mediana='median',
-        Promedio='mean',
-        Q3=lambda x: x.quantile(0.75),
-        Maximo='max',
-        Desviacion='std',
-        Error_estandar=lambda x: x.std() / np.sqrt(x.count()),  # Error estándar de la media
-    )
+    if conexion_sql is not None:
+        # Conteo, extremos, media y desviación desde la base; los cuartiles
+        # se calculan sobre los valores ya leídos
+        agregados = agregados_grupo_sql(conexion_sql, var_cat, var_num, top_vals)
+        cuartiles = df_top.groupby(var_cat)[var_num].quantile([0.25, 0.5, 0.75]).unstack()
+        summary = pd.DataFrame({
+            'cantidad': agregados['cantidad'],
+            'Minimo': agregados['Minimo'],
+            'Q1': cuartiles[0.25],
+            'Mediana': cuartiles[0.5],
+            'Promedio': agregados['Promedio'],
+            'Q3': cuartiles[0.75],
+            'Maximo': agregados['Maximo'],
+            'Desviacion': agregados['Desviacion'],
+            'Error_estandar': agregados['Desviacion'] / np.sqrt(agregados['cantidad']),
+        })
+    else:
+        summary = df_top.groupby(var_cat, observed=True)[var_num].agg(
+            cantidad='count',
+            Minimo='min',
+            Q1=lambda x: x.quantile(0.25),
+            Mediana='median',
+            Promedio='mean',
+            Q3=lambda x: x.quantile(0.75),
+            Maximo='max',
+            Desviacion='std',
+            Error_estandar=lambda x: x.std() / np.sqrt(x.count()),  # Error estándar de la media
+        )
     
     # Añadir intervalos de confianza del 95%
     t_critical = stats.t.ppf(0.975, summary['cantidad'] - 1)  # Valor crítico de t para 95% de confianza
     summary['IC_95_inf'] = summary['Promedio'] - t_critical * summary['Error_estandar']
     summary['IC_95_sup'] = summary['Promedio'] + t_critical * summary['Error_estandar']
     
+    if metodo_ic:
+        # Intervalos bootstrap de los cuartiles de todas las categorías en una sola llamada
+        valores_por_grupo = contexto.valores_por_grupo(var_cat, var_num)
+        intervalos = intervalos_bootstrap({grupo: valores_por_grupo.get(grupo, []) for grupo in summary.index},
+                                          ('q1', 'mediana', 'q3'), metodo=metodo_ic)
+        for nombre, columna in (('q1', 'Q1'), ('mediana', 'Mediana'), ('q3', 'Q3')):
+            summary[f'IC_{columna}_inf'] = [intervalos[grupo][nombre]['ic_inf'] for grupo in summary.index]
+            summary[f'IC_{columna}_sup'] = [intervalos[grupo][nombre]['ic_sup'] for grupo in summary.index]
+    
     # Imprimir información detallada en consola
     print(f"\n{'='*80}")
     print(f"ANÁLISIS BIVARIADO: {var_cat.upper()} vs {var_num.upper()}")
@@ -1213,6 +1419,12 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
         print(f"   - Estadístico F: {resultados_diff['estadistico_f']:.3f}")
     elif 'estadistico_h' in resultados_diff:
         print(f"   - Estadístico H: {resultados_diff['estadistico_h']:.3f}")
+    elif 'diferencia_medias' in resultados_diff:
+        print(f"   - Diferencia de medias: {resultados_diff['diferencia_medias']:.3f}")
+    elif 'diferencia_medianas' in resultados_diff:
+        print(f"   - Diferencia de medianas: {resultados_diff['diferencia_medianas']:.3f}")
+    if 'permutaciones' in resultados_diff:
+        print(f"   - Permutaciones: {resultados_diff['permutaciones']}")
     
     # Información sobre el tamaño del efecto    print(f"   - {resultados_diff['interpretacion_efecto']}")
     
@@ -1239,6 +1451,7 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
     ax1 = plt.subplot(gs[0])
     
     # Boxplot con notch para visualizar intervalos de confianza de la mediana
+    import seaborn as sns
     sns.boxplot(data=df_top, x=var_cat, y=var_num, palette="coolwarm", notch=True, ax=ax1)
     
     # Añadir puntos individuales con jitter para mejor visualización
@@ -1341,7 +1554,7 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
         # Calcular datos para box plot en Plotly
         boxplot_data = []
         for category in df_top[var_cat].unique():
-            category_data = df_top[df_top[var_cat] == category][var_num].dropna()
+            category_data = contexto.valores_grupo(var_cat, var_num, category)
             if len(category_data) > 0:
                 boxplot_data.append({
                     "type": "box",
@@ -1434,6 +1647,12 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
         elif 'estadistico_h' in resultados_diff:
             resultados_estadisticos["prueba_diferencia"]["estadistico_h"] = resultados_diff["estadistico_h"]
             resultados_estadisticos["prueba_diferencia"]["tamaño_efecto_eta_cuadrado"] = resultados_diff.get("tamaño_efecto_eta_cuadrado", None)
+        elif 'diferencia_medias' in resultados_diff or 'diferencia_medianas' in resultados_diff:
+            clave = 'diferencia_medias' if 'diferencia_medias' in resultados_diff else 'diferencia_medianas'
+            resultados_estadisticos["prueba_diferencia"][clave] = resultados_diff[clave]
+            resultados_estadisticos["prueba_diferencia"]["tamaño_efecto_d"] = resultados_diff.get("tamaño_efecto_d", None)
+        if 'permutaciones' in resultados_diff:
+            resultados_estadisticos["prueba_diferencia"]["permutaciones"] = resultados_diff["permutaciones"]
             
         # Añadir resultados post-hoc si están disponibles
         if resultados_diff.get('posthoc') and 'comparaciones' in resultados_diff['posthoc']:
@@ -1476,6 +1695,10 @@ def bivariado_cat_num(df, var_cat, var_num, top_n=5, export_excel_path=None, exp
                     "ic_sup": float(summary.loc[categoria, 'IC_95_sup']),
                     "error_std": float(summary.loc[categoria, 'Error_estandar'])
                 })
+                if metodo_ic:
+                    for columna in ('Q1', 'Mediana', 'Q3'):
+                        datos_con_intervalos[-1][f"ic_{columna.lower()}"] = [float(summary.loc[categoria, f'IC_{columna}_inf']),
+                                                                             float(summary.loc[categoria, f'IC_{columna}_sup'])]
                 
             # Agregar metadata sobre significancia para marcar gráficamente
             significancia_entre_grupos = []
@@ -1,13 +1,15 @@
 # analysis_univariado.py
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 from src.exporter import export_table_to_excel, add_figure_for_pdf, save_plot_to_png
 import os
+from src.contexto import ContextoAnalisis
 
-def analisis_univariado(df, var_categorica, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None):
-    abs_freq = df[var_categorica].value_counts()
-    rel_freq = df[var_categorica].value_counts(normalize=True) * 100
+def analisis_univariado(df, var_categorica, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None, contexto=None):
+    # Los conteos quedan en el contexto para los demás análisis de la misma columna
+    contexto = contexto if contexto is not None else ContextoAnalisis(df)
+    abs_freq = contexto.conteos(var_categorica)
+    rel_freq = abs_freq / abs_freq.sum() * 100
     tabla = pd.DataFrame({'Frec. Absoluta': abs_freq, 'Frec. Relativa (%)': rel_freq.round(2)})
     print(f"\n{'='*60}")
     print(f"ANÁLISIS UNIVARIADO DE: {var_categorica.upper()}")
@@ -17,6 +19,7 @@ def analisis_univariado(df, var_categorica, export_excel_path=None, export_pdf_p
     print(f"- Categoría más frecuente: {abs_freq.idxmax()} ({rel_freq.max():.2f}%)")
     print(f"- Categoría menos frecuente: {abs_freq.idxmin()} ({rel_freq.min():.2f}%)")
     print(f"- Total de categorías: {len(abs_freq)}")
+    import seaborn as sns
     plt.figure(figsize=(10, 6))
     bars = sns.barplot(x=rel_freq.index, y=rel_freq.values, hue=rel_freq.index, palette="viridis", legend=False)
     plt.title(f'Distribución Relativa de {var_categorica}', fontsize=16, fontweight='bold')
@@ -42,3 +45,19 @@ def analisis_univariado(df, var_categorica, export_excel_path=None, export_pdf_p
             orient='records', force_ascii=False, indent=2
         )
     plt.close(fig)
+
+def tabla_frecuencias_pregunta(df, pregunta, export_json_dir, contexto=None):
+    """
+    Exporta la distribución de frecuencias de una pregunta ordenada por valor (tabla_<pregunta>.json).
+    Con `contexto` reutiliza los conteos que ya calculó el análisis univariado.
+    """
+    conteos = (contexto if contexto is not None else ContextoAnalisis(df)).conteos(pregunta)
+    abs_freq = conteos.sort_index()
+    rel_freq = (conteos / conteos.sum()).sort_index() * 100
+    tabla = pd.DataFrame({'Frec. Absoluta': abs_freq, 'Frec. Relativa (%)': rel_freq.round(2)})
+    os.makedirs(export_json_dir, exist_ok=True)
+    tabla.reset_index().rename(columns={'index': pregunta}).to_json(
+        os.path.join(export_json_dir, f"tabla_{pregunta}.json"),
+        orient='records', force_ascii=False, indent=2
+    )
+    return tabla
@@ -0,0 +1,151 @@
+# asociacion.py
+"""
+Matriz de asociación entre todas las variables categóricas de la encuesta.
+
+Cada columna se codifica una sola vez en enteros (ver ContextoAnalisis.codigos)
+y la tabla de contingencia de cada par se obtiene con un único np.bincount
+sobre el código combinado `codigo1 * k2 + codigo2`, sin construir un
+pd.crosstab por par. De cada tabla se calculan el Chi-cuadrado de
+independencia (con la corrección de Yates en tablas 2x2, como
+scipy.stats.chi2_contingency), su p-valor y la V de Cramer, para revisar
+todos los pares y no solo los que el plan analiza en detalle.
+"""
+
+import json
+import os
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from scipy import stats
+
+from src.contexto import ContextoAnalisis
+from src.exporter import export_table_to_excel, add_figure_for_pdf, save_plot_to_png
+
+def tabla_contingencia_codigos(codigos1, k1, codigos2, k2):
+    """
+    Tabla de contingencia (k1 x k2) de dos columnas codificadas (-1: nulo) con
+    un único bincount. Las filas y columnas sin observaciones se eliminan, como
+    en pd.crosstab.
+    """
+    validos = (codigos1 >= 0) & (codigos2 >= 0)
+    combinados = codigos1[validos].astype(np.int64) * k2 + codigos2[validos]
+    tabla = np.bincount(combinados, minlength=k1 * k2).reshape(k1, k2)
+    return tabla[tabla.sum(axis=1) > 0][:, tabla.sum(axis=0) > 0]
+
+def chi2_tabla(tabla):
+    """
+    Chi-cuadrado de independencia de una tabla de contingencia.
+
+    Returns
+    -------
+    dict
+        chi2, grados_libertad, p_valor, v_cramer, n y si todas las frecuencias
+        esperadas son >= 5. Con menos de dos filas o columnas no hay prueba y
+        los estadísticos son NaN
+    """
+    tabla = np.asarray(tabla, dtype=np.float64)
+    n = tabla.sum()
+    filas, columnas = tabla.shape
+    if filas < 2 or columnas < 2:
+        return {"chi2": np.nan, "grados_libertad": 0, "p_valor": np.nan, "v_cramer": np.nan,
+                "n": int(n), "requisito_frecuencias_cumplido": False}
+    esperadas = np.outer(tabla.sum(axis=1), tabla.sum(axis=0)) / n
+    grados_libertad = (filas - 1) * (columnas - 1)
+    observadas = tabla
+    if grados_libertad == 1:
+        # Corrección de Yates: acercar cada frecuencia observada 0.5 a la esperada
+        diferencia = esperadas - observadas
+        observadas = observadas + np.sign(diferencia) * np.minimum(0.5, np.abs(diferencia))
+    chi2 = float(((observadas - esperadas) ** 2 / esperadas).sum())
+    return {
+        "chi2": chi2,
+        "grados_libertad": grados_libertad,
+        "p_valor": float(stats.chi2.sf(chi2, grados_libertad)),
+        "v_cramer": float(np.sqrt(chi2 / (n * min(filas - 1, columnas - 1)))),
+        "n": int(n),
+        "requisito_frecuencias_cumplido": bool((esperadas >= 5).all()),
+    }
+
+def matriz_asociacion(df, variables, contexto=None):
+    """
+    Chi-cuadrado, p-valor y V de Cramer de todos los pares de variables categóricas.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Datos de la encuesta
+    variables : list
+        Columnas categóricas a cruzar entre sí
+    contexto : ContextoAnalisis, optional
+        Códigos de las columnas ya calculados (ver src/contexto.py); por defecto se crea uno
+
+    Returns
+    -------
+    dict
+        'chi2', 'p_valor' y 'v_cramer': matrices simétricas (DataFrame) indexadas
+        por las variables, con V = 1 en la diagonal; 'pares': una fila por par
+        con sus estadísticos, ordenada de mayor a menor V de Cramer
+    """
+    contexto = contexto if contexto is not None else ContextoAnalisis(df)
+    codigos = {var: contexto.codigos(var) for var in variables}
+    matrices = {clave: pd.DataFrame(np.nan, index=variables, columns=variables) for clave in ('chi2', 'p_valor', 'v_cramer')}
+    pares = []
+    for var1, var2 in combinations(variables, 2):
+        (codigos1, valores1), (codigos2, valores2) = codigos[var1], codigos[var2]
+        resultado = chi2_tabla(tabla_contingencia_codigos(codigos1, len(valores1), codigos2, len(valores2)))
+        for clave, matriz in matrices.items():
+            matriz.loc[var1, var2] = matriz.loc[var2, var1] = resultado[clave]
+        pares.append({"var1": var1, "var2": var2, **resultado})
+    for var in variables:
+        matrices["v_cramer"].loc[var, var] = 1.0
+    columnas_pares = ["var1", "var2", "n", "chi2", "grados_libertad", "p_valor", "v_cramer", "requisito_frecuencias_cumplido"]
+    tabla_pares = pd.DataFrame(pares, columns=columnas_pares).sort_values("v_cramer", ascending=False, ignore_index=True)
+    return {**matrices, "pares": tabla_pares}
+
+def analisis_asociacion(df, variables, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None, contexto=None):
+    """
+    Calcula la matriz de asociación de las variables, la muestra en consola y
+    exporta el mapa de calor de la V de Cramer y la tabla de pares.
+    Devuelve la tabla de pares (ver matriz_asociacion).
+    """
+    resultado = matriz_asociacion(df, variables, contexto=contexto)
+    pares = resultado["pares"]
+    print(f"\n{'='*80}")
+    print(f"MATRIZ DE ASOCIACIÓN ENTRE VARIABLES CATEGÓRICAS ({len(variables)} variables, {len(pares)} pares)")
+    print(f"{'='*80}")
+    print(pares.round(4).to_string(index=False))
+
+    v_cramer = resultado["v_cramer"]
+    fig, ax = plt.subplots(figsize=(10, 8))
+    imagen = ax.imshow(v_cramer.to_numpy(dtype=float), cmap='YlOrRd', vmin=0, vmax=1)
+    ax.set_xticks(range(len(variables)), variables, rotation=45, ha='right')
+    ax.set_yticks(range(len(variables)), variables)
+    for i in range(len(variables)):
+        for j in range(len(variables)):
+            valor = v_cramer.iat[i, j]
+            if not np.isnan(valor):
+                ax.text(j, i, f"{valor:.2f}", ha='center', va='center', fontsize=9,
+                        color='white' if valor > 0.6 else 'black')
+    fig.colorbar(imagen, ax=ax, label='V de Cramer')
+    ax.set_title('Asociación entre variables categóricas (V de Cramer)', fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    if export_pdf_path:
+        add_figure_for_pdf(fig)
+    if export_excel_path:
+        export_table_to_excel(pares, 'Asociacion_categoricas', export_excel_path)
+    if export_png_dir:
+        os.makedirs(export_png_dir, exist_ok=True)
+        save_plot_to_png(fig, os.path.join(export_png_dir, "asociacion_categoricas.png"))
+    if export_json_dir:
+        os.makedirs(export_json_dir, exist_ok=True)
+        datos = {
+            "variables": list(variables),
+            "v_cramer": [[None if np.isnan(v) else round(float(v), 4) for v in fila] for fila in v_cramer.to_numpy(dtype=float)],
+            "pares": json.loads(pares.to_json(orient='records', force_ascii=False)),
+        }
+        with open(os.path.join(export_json_dir, "asociacion_categoricas.json"), 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+    plt.close(fig)
+    return pares
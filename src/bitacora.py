@@ -0,0 +1,130 @@
+# bitacora.py
+"""
+Bitácora (log) estructurada de la ejecución.
+
+Los mensajes se encolan sin esperar E/S y un hilo de fondo los escribe por
+lotes en un archivo de líneas JSON (una por mensaje, con fecha, tipo, texto y
+pid) y, opcionalmente, en la consola con colores según el tipo. La cola es de
+multiprocessing: los procesos de trabajo del plan reciben la misma cola (ver
+conectar_trabajador) y sus mensajes pasan por el mismo hilo escritor, de modo
+que nunca se escribe el archivo desde dos procesos a la vez.
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+
+TAMANO_LOTE = 256
+INTERVALO_ESCRITURA = 0.2  # segundos máximos que un mensaje espera en la cola
+
+COLORES_CONSOLA = {
+    "ERROR": "\033[91m",        # Rojo
+    "ADVERTENCIA": "\033[93m",  # Amarillo
+    "ÉXITO": "\033[92m",        # Verde
+}
+
+# Bitácora de este proceso: en el principal incluye el hilo escritor; en un
+# proceso de trabajo, solo la cola
+_bitacora = None
+
+def _linea_consola(registro):
+    fecha = registro["fecha"][:19].replace('T', ' ')
+    linea = f"[{fecha}] [{registro['tipo']}] {registro['mensaje']}"
+    color = COLORES_CONSOLA.get(registro["tipo"])
+    return f"{color}{linea}\033[0m\n" if color else linea + "\n"
+
+def _escritor(cola, ruta, consola, tamano_lote, intervalo):
+    """Hilo de fondo: escribe los mensajes de la cola por lotes hasta recibir None."""
+    with open(ruta, 'a', encoding='utf-8') as archivo:
+        terminado = False
+        while not terminado:
+            try:
+                lote = [cola.get(timeout=intervalo)]
+            except queue.Empty:
+                continue
+            while len(lote) < tamano_lote:
+                try:
+                    lote.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            terminado = None in lote
+            registros = [registro for registro in lote if registro is not None]
+            archivo.write(''.join(json.dumps(registro, ensure_ascii=False) + '\n' for registro in registros))
+            archivo.flush()
+            if consola and registros:
+                sys.stdout.write(''.join(_linea_consola(registro) for registro in registros))
+                sys.stdout.flush()
+
+def iniciar_bitacora(ruta, consola=True, reiniciar=True, tamano_lote=TAMANO_LOTE, intervalo=INTERVALO_ESCRITURA):
+    """
+    Inicia la bitácora del proceso principal y su hilo escritor.
+
+    Parameters
+    ----------
+    ruta : str
+        Archivo de líneas JSON
+    consola : bool, optional
+        Mostrar también los mensajes en la consola, con colores según el tipo
+    reiniciar : bool, optional
+        Vaciar el archivo en lugar de añadir al final
+    tamano_lote : int, optional
+        Máximo de mensajes por escritura
+    intervalo : float, optional
+        Segundos que el hilo espera mensajes antes de volver a comprobar la cola
+
+    Returns
+    -------
+    multiprocessing.Queue
+        Cola de la bitácora, para conectar los procesos de trabajo
+    """
+    global _bitacora
+    cerrar_bitacora()
+    if reiniciar or not os.path.exists(ruta):
+        open(ruta, 'w', encoding='utf-8').close()
+    cola = multiprocessing.Queue()
+    hilo = threading.Thread(target=_escritor, args=(cola, ruta, consola, tamano_lote, intervalo),
+                            name='bitacora', daemon=True)
+    hilo.start()
+    _bitacora = {"cola": cola, "hilo": hilo, "pid": os.getpid()}
+    return cola
+
+def cola_bitacora():
+    """Cola de la bitácora activa, o None si no hay."""
+    return _bitacora["cola"] if _bitacora is not None else None
+
+def conectar_trabajador(cola):
+    """Hace que los mensajes de este proceso de trabajo vayan a la cola de la bitácora principal."""
+    global _bitacora
+    _bitacora = {"cola": cola, "hilo": None, "pid": os.getpid()} if cola is not None else None
+
+def registrar(mensaje, tipo="INFO", **campos):
+    """
+    Encola un mensaje con su fecha, tipo (INFO, ÉXITO, ADVERTENCIA, ERROR) y pid;
+    los `campos` adicionales se guardan tal cual en la línea JSON. Sin bitácora
+    activa no hace nada.
+    """
+    if _bitacora is None:
+        return
+    registro = {"fecha": datetime.now().isoformat(timespec='milliseconds'), "tipo": tipo,
+                "mensaje": mensaje, "pid": os.getpid()}
+    registro.update(campos)
+    _bitacora["cola"].put(registro)
+
+def cerrar_bitacora():
+    """Escribe los mensajes pendientes y detiene el hilo escritor (solo en el proceso que lo inició)."""
+    global _bitacora
+    if _bitacora is None or _bitacora["hilo"] is None or _bitacora["pid"] != os.getpid():
+        return
+    bitacora, _bitacora = _bitacora, None
+    bitacora["cola"].put(None)
+    bitacora["hilo"].join()
+    bitacora["cola"].close()
+    bitacora["cola"].join_thread()
+
+# Una sola vez por proceso: el demonio inicia una bitácora por trabajo
+atexit.register(cerrar_bitacora)
@@ -0,0 +1,185 @@
+# bootstrap.py
+"""
+Intervalos de confianza bootstrap (percentil y BCa) de estadísticos por grupo.
+
+En las preguntas Likert (enteros de 1 a 5, con muchos empates) el intervalo t
+de la media supone una distribución que los datos no tienen, y la mediana y
+los cuartiles no tienen intervalo. Aquí los valores de todos los grupos se
+ponen en un solo arreglo ordenado por grupo y cada bloque de remuestras es una
+matriz de índices, una remuestra por fila, en la que cada grupo se remuestrea
+dentro de su propio tramo: una sola indexación produce las remuestras de
+todos los grupos y cada estadístico se calcula por filas sobre el tramo de
+cada grupo. Las remuestras se generan en bloques de a lo sumo
+MAX_ELEMENTOS_BLOQUE índices para acotar la memoria; como cada fila es una
+remuestra completa, con más valores que MAX_ELEMENTOS_BLOQUE el bloque tiene
+una sola fila y lo supera.
+
+La aceleración del BCa usa el jackknife (el estadístico sin cada una de las n
+observaciones), que calculado fila a fila cuesta O(n²). Para la media se usa
+la fórmula cerrada y para la mediana y los cuartiles basta el rango del valor
+omitido; con otros estadísticos y pocos valores distintos se calcula una vez
+por valor distinto, pues omitir cualquiera de sus repeticiones da lo mismo.
+"""
+
+import numpy as np
+from scipy import stats
+
+SEMILLA = 20250103
+REMUESTRAS = 2000
+CONFIANZA = 0.95
+MAX_ELEMENTOS_BLOQUE = 2000000  # índices (y valores) por bloque de remuestras: 16 MB de cada uno
+METODOS = ('percentil', 'bca')
+MAX_VALORES_DISTINTOS = 100  # hasta aquí el jackknife se calcula una vez por valor distinto
+
+def _cuantil(q):
+    """Cuantil q (interpolación lineal, como pandas) por filas."""
+    def estadistico(x, axis=-1):
+        return np.quantile(x, q, axis=axis)
+    estadistico.cuantil = q
+    return estadistico
+
+# Funciones f(x, axis) que reducen un eje; las remuestras van por filas
+ESTADISTICOS = {
+    'media': np.mean,
+    'mediana': np.median,
+    'q1': _cuantil(0.25),
+    'q3': _cuantil(0.75),
+}
+
+def _jackknife_omitiendo(valores, funcion, omitidas):
+    """Estadístico de la muestra sin cada posición de `omitidas` (una por fila), por bloques."""
+    n = len(valores)
+    posiciones = np.arange(n - 1)
+    resultado = np.empty(len(omitidas))
+    filas = max(1, MAX_ELEMENTOS_BLOQUE // max(n - 1, 1))
+    for desde in range(0, len(omitidas), filas):
+        bloque = omitidas[desde:desde + filas]
+        # Fila r: todas las posiciones salvo bloque[r]
+        indices = posiciones + (posiciones >= bloque[:, np.newaxis])
+        resultado[desde:desde + len(bloque)] = funcion(valores[indices], axis=-1)
+    return resultado
+
+def _jackknife_cuantil(valores, q):
+    """
+    Cuantil q (interpolación lineal) sin cada observación, en O(n log n): en la
+    muestra de n - 1 se interpolan los valores ordenados j y j + 1, que según el
+    rango del valor omitido son los de posición j, j + 1 o j + 2 de la muestra completa.
+    """
+    n = len(valores)
+    orden = np.argsort(valores, kind='stable')
+    ordenados = valores[orden]
+    rangos = np.empty(n, dtype=np.int64)
+    rangos[orden] = np.arange(n)
+    posicion = (n - 2) * q
+    j = int(np.floor(posicion))
+    bajo = ordenados[np.where(rangos <= j, j + 1, j)]
+    alto = ordenados[np.minimum(np.where(rangos <= j + 1, j + 2, j + 1), n - 1)]
+    return bajo + (posicion - j) * (alto - bajo)
+
+def _jackknife(valores, funcion):
+    """Estadístico de cada muestra sin una observación, en el orden de `valores`."""
+    n = len(valores)
+    if funcion is np.mean:
+        return (valores.sum() - valores) / (n - 1)
+    cuantil = 0.5 if funcion is np.median else getattr(funcion, 'cuantil', None)
+    if cuantil is not None:
+        return _jackknife_cuantil(valores, cuantil)
+    distintos, primeras, inversa = np.unique(valores, return_index=True, return_inverse=True)
+    if len(distintos) <= MAX_VALORES_DISTINTOS:
+        # Omitir cualquiera de las repeticiones de un valor deja la misma muestra
+        return _jackknife_omitiendo(valores, funcion, primeras)[inversa]
+    return _jackknife_omitiendo(valores, funcion, np.arange(n))
+
+def _cuantiles_bca(replicas, estimacion, jackknife, alpha):
+    """Cuantiles de las réplicas que delimitan el intervalo BCa (sesgo z0 y aceleración a)."""
+    total = len(replicas)
+    # Proporción de réplicas por debajo de la estimación; los empates cuentan la mitad
+    proporcion = ((replicas < estimacion).sum() + 0.5 * (replicas == estimacion).sum()) / total
+    z0 = stats.norm.ppf(np.clip(proporcion, 0.5 / total, 1 - 0.5 / total))
+    diferencias = jackknife.mean() - jackknife
+    denominador = 6 * (diferencias ** 2).sum() ** 1.5
+    aceleracion = (diferencias ** 3).sum() / denominador if denominador > 0 else 0.0
+    z = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+    return stats.norm.cdf(z0 + (z0 + z) / (1 - aceleracion * (z0 + z)))
+
+def intervalos_bootstrap(datos_por_grupo, estadisticos=('media',), metodo='bca', confianza=CONFIANZA,
+                         remuestras=REMUESTRAS, semilla=SEMILLA):
+    """
+    Intervalos de confianza bootstrap de uno o varios estadísticos en cada grupo.
+
+    Parameters
+    ----------
+    datos_por_grupo : dict
+        Valores no nulos de cada grupo (arreglos o Series), por nombre de grupo
+    estadisticos : iterable, optional
+        Nombres de ESTADISTICOS ('media', 'mediana', 'q1', 'q3') o pares
+        (nombre, funcion) con funcion(x, axis) que reduce el eje indicado
+        (como np.mean), por defecto ('media',)
+    metodo : str, optional
+        'percentil' o 'bca' (corregido por sesgo y acelerado), por defecto 'bca'
+    confianza : float, optional
+        Nivel de confianza, por defecto 0.95
+    remuestras : int, optional
+        Remuestras de cada grupo, por defecto REMUESTRAS
+    semilla : int, optional
+        Semilla de las remuestras; el mismo valor reproduce los mismos intervalos
+
+    Returns
+    -------
+    dict
+        Por grupo y estadístico, {'estimacion', 'ic_inf', 'ic_sup'}. Con menos
+        de dos valores en el grupo los límites son NaN
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método de intervalo bootstrap desconocido: {metodo!r} (opciones: {', '.join(METODOS)})")
+    if not 0 < confianza < 1:
+        raise ValueError(f"La confianza debe estar entre 0 y 1: {confianza}")
+    funciones = []
+    for estadistico in estadisticos:
+        if isinstance(estadistico, str):
+            if estadistico not in ESTADISTICOS:
+                raise ValueError(f"Estadístico desconocido: {estadistico!r} (opciones: {', '.join(ESTADISTICOS)})")
+            funciones.append((estadistico, ESTADISTICOS[estadistico]))
+        else:
+            funciones.append(tuple(estadistico))
+
+    grupos = list(datos_por_grupo)
+    arreglos = [np.asarray(datos_por_grupo[grupo], dtype=np.float64) for grupo in grupos]
+    tamanos = np.array([len(arreglo) for arreglo in arreglos], dtype=np.int64)
+    valores = np.concatenate(arreglos) if arreglos else np.array([])
+    inicios = np.concatenate(([0], np.cumsum(tamanos)[:-1])).astype(np.int64)
+
+    # Cada posición de la remuestra toma un índice al azar dentro del tramo de su grupo
+    base = np.repeat(inicios, tamanos)
+    limites = np.repeat(tamanos, tamanos)
+    replicas = {(i, nombre): np.empty(remuestras) for i in range(len(grupos)) if tamanos[i] >= 2 for nombre, _ in funciones}
+    generador = np.random.default_rng(semilla)
+    # Al menos una remuestra por bloque, aunque sola supere MAX_ELEMENTOS_BLOQUE
+    filas = max(1, MAX_ELEMENTOS_BLOQUE // max(len(valores), 1))
+    for desde in range(0, remuestras if replicas else 0, filas):
+        hasta = min(desde + filas, remuestras)
+        matriz = valores[base + generador.integers(0, limites, size=(hasta - desde, len(valores)))]
+        for i, (inicio, n) in enumerate(zip(inicios, tamanos)):
+            if n < 2:
+                continue
+            tramo = matriz[:, inicio:inicio + n]
+            for nombre, funcion in funciones:
+                replicas[(i, nombre)][desde:hasta] = funcion(tramo, axis=-1)
+
+    alpha = 1 - confianza
+    resultados = {}
+    for i, grupo in enumerate(grupos):
+        resultados[grupo] = {}
+        for nombre, funcion in funciones:
+            estimacion = float(funcion(arreglos[i], axis=-1)) if tamanos[i] > 0 else np.nan
+            if tamanos[i] < 2:
+                resultados[grupo][nombre] = {"estimacion": estimacion, "ic_inf": np.nan, "ic_sup": np.nan}
+                continue
+            replicas_grupo = replicas[(i, nombre)]
+            if metodo == 'bca':
+                cuantiles = _cuantiles_bca(replicas_grupo, estimacion, _jackknife(arreglos[i], funcion), alpha)
+            else:
+                cuantiles = [alpha / 2, 1 - alpha / 2]
+            ic_inf, ic_sup = np.quantile(replicas_grupo, cuantiles)
+            resultados[grupo][nombre] = {"estimacion": estimacion, "ic_inf": float(ic_inf), "ic_sup": float(ic_sup)}
+    return resultados
@@ -0,0 +1,166 @@
+# cache_artefactos.py
+"""
+Caché de los artefactos del plan de análisis, direccionada por contenido.
+
+La clave de cada nodo es un digest de los datos de las columnas que usa, de su
+tipo y parámetros, de las exportaciones activas y del código fuente de los
+módulos que lo implementan. Si existe una entrada con esa clave, sus PNG/JSON
+se copian a las carpetas de salida y su resultado (con las hojas de Excel y
+figuras del PDF) se reutiliza sin ejecutar el análisis. El manifiesto de la
+última ejecución permite borrar solo las salidas que dejaron de generarse.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+from src.data_cache import digest_archivo
+
+VERSION_CACHE = 1
+CACHE_ARTEFACTOS_DIR = 'data/cache/artefactos'
+MANIFIESTO = 'manifiesto.json'
+DIAS_RETENCION = 30
+
+# Rutas de exportación cuyos archivos se guardan en la caché y subcarpeta de cada una en la entrada
+SUBCARPETAS = {'export_png_dir': 'png', 'export_json_dir': 'json'}
+
+def digest_columna(serie):
+    """Digest del nombre, tipo y valores (en orden) de una columna."""
+    h = hashlib.sha256(f"{serie.name}:{serie.dtype}:".encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(serie, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def digest_dataframe(df):
+    """Digest de todas las columnas de un DataFrame (ver digest_columna), en orden."""
+    h = hashlib.sha256(f"{len(df)}:".encode('utf-8'))
+    for col in df.columns:
+        h.update(f"{digest_columna(df[col])}:".encode('utf-8'))
+    return h.hexdigest()
+
+@lru_cache(maxsize=None)
+def digest_modulos(modulos):
+    """Digest del código fuente de los módulos indicados (tupla de nombres), sin importarlos."""
+    h = hashlib.sha256(f"{VERSION_CACHE}".encode('utf-8'))
+    for modulo in modulos:
+        h.update(f"{modulo}:{digest_archivo(importlib.util.find_spec(modulo).origin)}".encode('utf-8'))
+    return h.hexdigest()
+
+def clave_artefacto(tipo, parametros, digests_columnas, digest_codigo, exportaciones):
+    """Clave de caché de un nodo del plan."""
+    contenido = json.dumps({
+        "tipo": tipo,
+        "parametros": parametros,
+        "columnas": digests_columnas,
+        "codigo": digest_codigo,
+        "exportaciones": exportaciones,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+def _ruta_entrada(cache_dir, clave):
+    return os.path.join(cache_dir, clave[:32])
+
+def rutas_temporales(cache_dir, rutas):
+    """
+    Crea un directorio temporal en la caché y devuelve (directorio, rutas) con
+    las carpetas de PNG/JSON redirigidas a él, para que el nodo escriba sus
+    archivos aparte de los de otros procesos.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    directorio = tempfile.mkdtemp(prefix='tmp_', dir=cache_dir)
+    rutas_nodo = dict(rutas)
+    for clave_ruta, subcarpeta in SUBCARPETAS.items():
+        if rutas.get(clave_ruta) is not None:
+            rutas_nodo[clave_ruta] = os.path.join(directorio, subcarpeta)
+            os.makedirs(rutas_nodo[clave_ruta])
+    return directorio, rutas_nodo
+
+def guardar_artefacto(cache_dir, clave, directorio, resultado):
+    """
+    Convierte el directorio temporal de un nodo en la entrada de caché `clave`,
+    junto con su resultado serializado. Devuelve la ruta de la entrada, o None
+    si el resultado no se pudo serializar (el directorio temporal se conserva).
+    """
+    try:
+        with open(os.path.join(directorio, 'resultado.pkl'), 'wb') as f:
+            pickle.dump(resultado, f)
+    except Exception as e:
+        print(f"No se pudo guardar en la caché el resultado del nodo {resultado.get('id')}: {str(e)}")
+        return None
+    entrada = _ruta_entrada(cache_dir, clave)
+    try:
+        os.replace(directorio, entrada)
+    except OSError:
+        # Otra ejecución guardó la misma entrada
+        shutil.rmtree(directorio, ignore_errors=True)
+    return entrada
+
+def cargar_artefacto(cache_dir, clave):
+    """Devuelve (resultado, ruta de la entrada) si la clave está en la caché, o None."""
+    entrada = _ruta_entrada(cache_dir, clave)
+    try:
+        with open(os.path.join(entrada, 'resultado.pkl'), 'rb') as f:
+            resultado = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"No se pudo leer la entrada de caché {entrada}: {str(e)}. Se regenerará.")
+        shutil.rmtree(entrada, ignore_errors=True)
+        return None
+    os.utime(entrada)
+    return resultado, entrada
+
+def materializar_artefacto(directorio, rutas):
+    """Copia los PNG/JSON de una entrada (o directorio temporal) a las carpetas de salida."""
+    archivos = []
+    for clave_ruta, subcarpeta in SUBCARPETAS.items():
+        origen = os.path.join(directorio, subcarpeta)
+        if rutas.get(clave_ruta) is None or not os.path.isdir(origen):
+            continue
+        os.makedirs(rutas[clave_ruta], exist_ok=True)
+        for nombre in sorted(os.listdir(origen)):
+            destino = os.path.join(rutas[clave_ruta], nombre)
+            shutil.copyfile(os.path.join(origen, nombre), destino)
+            archivos.append(os.path.normpath(destino))
+    return archivos
+
+def limpiar_obsoletos(cache_dir, archivos_vigentes, dias_retencion=DIAS_RETENCION):
+    """
+    Borra las salidas de la ejecución anterior que esta ya no generó y las
+    entradas de caché sin usar en `dias_retencion` días; guarda el nuevo manifiesto.
+
+    Returns
+    -------
+    list
+        Archivos de salida eliminados
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    ruta_manifiesto = os.path.join(cache_dir, MANIFIESTO)
+    vigentes = sorted({os.path.normpath(archivo) for archivo in archivos_vigentes})
+    anteriores = []
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, 'r', encoding='utf-8') as f:
+            anteriores = json.load(f)
+
+    eliminados = []
+    for archivo in sorted(set(anteriores) - set(vigentes)):
+        if os.path.exists(archivo):
+            os.remove(archivo)
+            eliminados.append(archivo)
+
+    limite = time.time() - dias_retencion * 86400
+    for nombre in os.listdir(cache_dir):
+        entrada = os.path.join(cache_dir, nombre)
+        if os.path.isdir(entrada) and os.path.getmtime(entrada) < limite:
+            shutil.rmtree(entrada, ignore_errors=True)
+
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as f:
+        json.dump(vigentes, f, ensure_ascii=False, indent=2)
+    return eliminados
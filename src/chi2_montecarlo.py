@@ -0,0 +1,76 @@
+# chi2_montecarlo.py
+"""
+P-valor Monte Carlo del Chi-cuadrado de independencia para tablas RxC.
+
+Cuando hay frecuencias esperadas menores a 5 la distribución Chi-cuadrado
+asintótica deja de ser fiable y, en tablas mayores que 2x2, no hay prueba
+exacta de Fisher en scipy. Aquí el p-valor se estima como la proporción de
+tablas aleatorias con los mismos totales de fila y columna (algoritmo de
+Patefield, scipy.stats.random_table) cuyo estadístico es al menos el
+observado. Las tablas se simulan por lotes y el estadístico de cada lote se
+calcula de una vez con NumPy; la semilla de cada lote, el reparto entre
+procesos y la parada temprana están en src/simulacion.py.
+"""
+
+import numpy as np
+from scipy import stats
+
+from src.simulacion import generador_lote, p_valor_simulado, TRABAJADORES
+
+SEMILLA = 20250101
+TAMANO_LOTE = 2000  # tablas simuladas por lote
+MAX_SIMULACIONES = 100000
+CASI_UNO = 1 + 64 * np.finfo(float).eps  # tolerancia para empates con el estadístico observado
+
+def _estadistico_chi2(tablas, esperadas):
+    """Chi-cuadrado de Pearson (sin corrección de Yates) de una tabla o un lote de tablas."""
+    return ((tablas - esperadas) ** 2 / esperadas).sum(axis=(-2, -1))
+
+def _simular_lote(totales_filas, totales_columnas, observado, semilla, numero_lote, tamano):
+    """Número de tablas del lote cuyo estadístico alcanza el observado."""
+    generador = generador_lote(semilla, numero_lote)
+    tablas = stats.random_table(totales_filas, totales_columnas).rvs(tamano, random_state=generador)
+    esperadas = np.outer(totales_filas, totales_columnas) / totales_filas.sum()
+    return int((_estadistico_chi2(tablas, esperadas) * CASI_UNO >= observado).sum())
+
+def chi2_monte_carlo(tabla, alpha=0.05, semilla=SEMILLA, max_simulaciones=MAX_SIMULACIONES,
+                     tamano_lote=TAMANO_LOTE, trabajadores=TRABAJADORES):
+    """
+    Chi-cuadrado de independencia con p-valor simulado (Monte Carlo).
+
+    Parameters
+    ----------
+    tabla : array-like o pandas.DataFrame
+        Tabla de contingencia de frecuencias absolutas
+    alpha : float, optional
+        Nivel de significancia con que se decide la parada temprana
+    semilla : int, optional
+        Semilla de la simulación; el mismo valor reproduce el mismo p-valor
+    max_simulaciones : int, optional
+        Número máximo de tablas simuladas
+    tamano_lote : int, optional
+        Tablas simuladas por lote
+    trabajadores : int, optional
+        Procesos que simulan los lotes (ver simulacion.p_valor_simulado)
+
+    Returns
+    -------
+    dict
+        estadistico_chi2, grados_libertad y el resultado de la simulación:
+        p_valor, intervalo_p_valor, simulaciones, excedencias y detenido_antes
+    """
+    tabla = np.asarray(tabla, dtype=np.int64)
+    # Las filas y columnas vacías no aportan al estadístico ni a las tablas simuladas
+    tabla = tabla[tabla.sum(axis=1) > 0][:, tabla.sum(axis=0) > 0]
+    totales_filas, totales_columnas = tabla.sum(axis=1), tabla.sum(axis=0)
+    esperadas = np.outer(totales_filas, totales_columnas) / tabla.sum()
+    observado = float(_estadistico_chi2(tabla, esperadas)) if tabla.size else 0.0
+    grados_libertad = max(tabla.shape[0] - 1, 0) * max(tabla.shape[1] - 1, 0)
+    if grados_libertad == 0:
+        # Con una sola fila o columna todas las tablas posibles son la observada
+        return {"estadistico_chi2": observado, "grados_libertad": 0, "p_valor": 1.0,
+                "intervalo_p_valor": (1.0, 1.0), "simulaciones": 0, "excedencias": 0, "detenido_antes": False}
+
+    simulacion = p_valor_simulado(_simular_lote, (totales_filas, totales_columnas, observado), alpha,
+                                  semilla, max_simulaciones, tamano_lote, trabajadores)
+    return {"estadistico_chi2": observado, "grados_libertad": grados_libertad, **simulacion}
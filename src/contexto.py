@@ -0,0 +1,107 @@
+# contexto.py
+"""
+Contexto compartido por los análisis de un mismo DataFrame.
+
+Cada columna de agrupación se factoriza una sola vez en códigos enteros y en
+las posiciones de las filas de cada grupo; así, obtener los valores de un
+grupo cuesta lo que mide el grupo en lugar de recorrer toda la columna con
+`df[df[var_grupo] == grupo]`. Los conteos de valores de cada columna también
+se calculan una sola vez. El planificador crea un contexto por ejecución (uno
+por proceso de trabajo) y lo pasa a todos los análisis, que guardan en
+`pruebas` los resultados que otros análisis de los mismos datos pueden
+reutilizar (ver src/normalidad.py).
+"""
+
+import numpy as np
+import pandas as pd
+
+class ContextoAnalisis:
+    """
+    Códigos, índices por grupo y conteos de valores de las columnas de un
+    DataFrame, calculados la primera vez que se piden.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Datos de los análisis; no deben modificarse mientras se use el contexto
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._codigos = {}
+        self._indices = {}
+        self._particiones = {}
+        self._conteos = {}
+        self._valores = {}
+        self.pruebas = {}
+
+    def codigos(self, columna):
+        """
+        Factorización de una columna: (códigos, valores). Cada fila recibe la
+        posición de su valor en `valores` (en orden de aparición) y -1 si es nula.
+        """
+        if columna not in self._codigos:
+            self._codigos[columna] = pd.factorize(self.df[columna])
+        return self._codigos[columna]
+
+    def indices_grupos(self, columna):
+        """Posiciones (iloc, en orden ascendente) de las filas de cada valor de la columna."""
+        if columna not in self._indices:
+            codigos, valores = self.codigos(columna)
+            # Con los nulos desplazados al código 0, los códigos caben en un entero
+            # sin signo pequeño y el ordenamiento estable de numpy es de conteo (O(n))
+            desplazados = (codigos + 1).astype(np.min_scalar_type(len(valores)))
+            orden = np.argsort(desplazados, kind='stable')
+            limites = np.cumsum(np.bincount(desplazados, minlength=len(valores) + 1))
+            self._indices[columna] = {valor: orden[limites[i]:limites[i + 1]] for i, valor in enumerate(valores)}
+            self._particiones[columna] = (orden, limites)
+        return self._indices[columna]
+
+    def valores_por_grupo(self, columna_grupo, columna_valor):
+        """
+        Valores no nulos (float64) de `columna_valor` de cada grupo, en el orden
+        de las filas. Se obtienen con una sola lectura de la columna ordenada por
+        grupo, en lugar de filtrarla una vez por grupo.
+        """
+        clave = (columna_grupo, columna_valor)
+        if clave not in self._valores:
+            grupos = self.indices_grupos(columna_grupo)
+            orden, limites = self._particiones[columna_grupo]
+            valores = self.df[columna_valor].to_numpy(dtype='float64', na_value=np.nan)[orden]
+            por_grupo = {}
+            for i, grupo in enumerate(grupos):
+                segmento = valores[limites[i]:limites[i + 1]]
+                por_grupo[grupo] = segmento[~np.isnan(segmento)]
+            self._valores[clave] = por_grupo
+        return self._valores[clave]
+
+    def conteos(self, columna):
+        """
+        Frecuencia de cada valor de la columna (igual que `df[columna].value_counts()`),
+        sin las categorías que no tienen filas (por ejemplo, todas rechazadas
+        por la validación en una columna categórica del modo compacto).
+        """
+        if columna not in self._conteos:
+            conteos = self.df[columna].value_counts()
+            conteos = conteos[conteos > 0]
+            if isinstance(conteos.index, pd.CategoricalIndex):
+                conteos.index = conteos.index.remove_unused_categories()
+            self._conteos[columna] = conteos
+        return self._conteos[columna]
+
+    def posiciones_grupo(self, columna, grupo):
+        """Posiciones de las filas en que `columna` vale `grupo` (vacío si no aparece)."""
+        return self.indices_grupos(columna).get(grupo, np.array([], dtype=np.intp))
+
+    def valores_grupo(self, columna_grupo, columna_valor, grupo):
+        """
+        Valores no nulos (float64) de `columna_valor` en las filas del grupo;
+        equivale a `df[df[columna_grupo] == grupo][columna_valor].dropna()`.
+        """
+        serie = self.df[columna_valor].iloc[self.posiciones_grupo(columna_grupo, grupo)]
+        return serie.astype('float64').dropna()
+
+    def filas_grupos(self, columna, grupos):
+        """Filas cuyos valores de `columna` están en `grupos`, en su orden original."""
+        posiciones = [self.posiciones_grupo(columna, grupo) for grupo in grupos]
+        return self.df.iloc[np.sort(np.concatenate(posiciones))] if posiciones else self.df.iloc[:0]
@@ -0,0 +1,88 @@
+# data_cache.py
+import hashlib
+import json
+import os
+import pandas as pd
+from src.data_loader import load_data, es_multiple, listar_archivos
+from src.data_cleaner import clean_data, compactar_dataframe, CLEANER_VERSION
+
+CACHE_DIR = 'data/cache'
+
+def digest_archivo(filepath, tamano_bloque=1 << 20):
+    """Calcula el SHA-256 del contenido del archivo leyendo por bloques."""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def digest_datos(filepath):
+    """
+    Digest del contenido de los datos de filepath: el del archivo o, si es un
+    directorio o un patrón glob, el SHA-256 de los digests ordenados de sus
+    archivos (ver data_loader.listar_archivos).
+    """
+    if not es_multiple(filepath):
+        return digest_archivo(filepath)
+    rutas = listar_archivos(filepath)
+    if not rutas:
+        raise FileNotFoundError(f"No se encontraron archivos .csv o .xlsx en {filepath}")
+    return hashlib.sha256(':'.join(sorted(digest_archivo(ruta) for ruta in rutas)).encode('utf-8')).hexdigest()
+
+def ruta_cache(filepath, cache_dir=CACHE_DIR, columnas=None, compacto=False):
+    """Ruta del archivo Feather asociado al contenido de filepath (archivo, directorio o patrón), a CLEANER_VERSION
+    y a la proyección/representación solicitada."""
+    variante = f"{sorted(columnas) if columnas is not None else '*'}:{int(compacto)}"
+    clave = hashlib.sha256(f"{digest_datos(filepath)}:{CLEANER_VERSION}:{variante}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"limpio_{clave[:24]}.feather")
+
+def _cargar_y_limpiar(filepath, columnas, compacto):
+    df, reporte = clean_data(load_data(filepath, columnas=columnas, compacto=compacto), devolver_reporte=True)
+    if compacto:
+        compactar_dataframe(df)
+    return df, reporte
+
+def load_clean_data(filepath, cache_dir=CACHE_DIR, columnas=None, compacto=False):
+    """
+    Carga y limpia el CSV reutilizando una copia columnar (Feather) del
+    resultado de clean_data cuando el archivo fuente no ha cambiado.
+
+    Devuelve una tupla (DataFrame limpio, info) donde info indica si los datos
+    vinieron de la caché ("desde_cache") e incluye el reporte de clean_data
+    ("reporte_limpieza"), que se guarda junto al archivo Feather. Los parámetros
+    columnas y compacto se pasan a load_data y forman parte de la clave de caché.
+    Si pyarrow no está instalado se carga y limpia sin caché.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("pyarrow no está instalado; se omite la caché de datos limpios.")
+        df, reporte = _cargar_y_limpiar(filepath, columnas, compacto)
+        return df, {"desde_cache": False, "reporte_limpieza": reporte}
+
+    ruta = ruta_cache(filepath, cache_dir, columnas=columnas, compacto=compacto)
+    ruta_reporte = ruta + '.reporte.json'
+    if os.path.exists(ruta):
+        try:
+            df = pd.read_feather(ruta)
+            reporte = None
+            if os.path.exists(ruta_reporte):
+                with open(ruta_reporte, 'r', encoding='utf-8') as f:
+                    reporte = json.load(f)
+            return df, {"desde_cache": True, "reporte_limpieza": reporte}
+        except Exception as e:
+            print(f"No se pudo leer la caché {ruta}: {str(e)}. Se regenerará.")
+
+    df, reporte = _cargar_y_limpiar(filepath, columnas, compacto)
+    os.makedirs(cache_dir, exist_ok=True)
+    ruta_temporal = ruta + '.tmp'
+    try:
+        df.reset_index(drop=True).to_feather(ruta_temporal)
+        os.replace(ruta_temporal, ruta)
+        with open(ruta_reporte, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"No se pudo escribir la caché {ruta}: {str(e)}")
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+    return df, {"desde_cache": False, "reporte_limpieza": reporte}
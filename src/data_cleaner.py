@@ -1,12 +1,115 @@
 # data_cleaner.py
+import numpy as np
 import pandas as pd
+from src.data_loader import COLUMNAS_DIMENSION
 
-def clean_data(df):
-    """Limpia y transforma el DataFrame: convierte preguntas a float, fechas, extrae año/mes."""
-    cols_preguntas = ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']
+# Versión de las reglas de limpieza. Incrementarla invalida la caché de
+# datos limpios (ver data_cache.load_clean_data).
+CLEANER_VERSION = '2'
+
+COLUMNAS_PREGUNTAS = ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']
+FORMATO_FECHA_ENCUESTA = '%d/%m/%Y'
+
+def _convertir_valores_unicos(valores, convertir, vacio):
+    """
+    Convierte una serie de texto aplicando `convertir` una sola vez por valor distinto.
+
+    Devuelve el arreglo convertido, el número de valores distintos y el número
+    de valores no nulos que no se pudieron convertir.
+    """
+    codigos, unicos = pd.factorize(valores)
+    convertidos = np.asarray(convertir(pd.Series(unicos)))
+    # Añadir un valor vacío al final para los nulos (código -1)
+    convertidos = np.concatenate([convertidos, np.array([vacio], dtype=convertidos.dtype)])
+    codigos[codigos == -1] = len(unicos)
+    resultado = convertidos[codigos]
+    fallidos_unicos = pd.isna(convertidos[:-1])
+    n_fallidos = int(np.bincount(codigos, minlength=len(convertidos))[:-1][fallidos_unicos].sum())
+    return resultado, len(unicos), n_fallidos
+
+def _a_float_decimal_coma(serie):
+    return pd.to_numeric(serie.astype(str).str.replace(',', '.', regex=False), errors='coerce').to_numpy(dtype='float64')
+
+def _a_fecha(serie):
+    return pd.to_datetime(serie, format=FORMATO_FECHA_ENCUESTA, errors='coerce').to_numpy()
+
+def clean_data(df, devolver_reporte=False):
+    """
+    Limpia y transforma el DataFrame: convierte preguntas a float, fechas, extrae año/mes.
+
+    Las columnas se reemplazan sobre el mismo DataFrame. Las preguntas en texto se
+    convierten juntas en una sola pasada y cada fecha distinta se interpreta una
+    única vez. Los valores que no se pueden convertir quedan como NaN/NaT; si
+    devolver_reporte es True se devuelve también un diccionario con el detalle.
+    """
+    reporte = {"version": CLEANER_VERSION, "filas": int(len(df)), "preguntas": {}, "fechas": {}}
+
+    cols_preguntas = [c for c in COLUMNAS_PREGUNTAS if c in df.columns]
+    cols_texto = [c for c in cols_preguntas if not pd.api.types.is_numeric_dtype(df[c])]
     for col in cols_preguntas:
-        df[col] = df[col].astype(str).str.replace(',', '.').astype(float)
-    df['FECHA_ENCUESTA'] = pd.to_datetime(df['FECHA_ENCUESTA'], format='%d/%m/%Y', errors='coerce')
-    df['AÑO_ENCUESTA'] = df['FECHA_ENCUESTA'].dt.year
-    df['MES_ENCUESTA'] = df['FECHA_ENCUESTA'].dt.month
+        if col not in cols_texto:
+            reporte["preguntas"][col] = {"ya_numerica": True, "n_nulos": int(df[col].isna().sum())}
+    if cols_texto:
+        # Apilar todas las preguntas en una sola serie (columna por columna)
+        apiladas = pd.concat([df[c] for c in cols_texto], ignore_index=True)
+        convertidas, n_unicos, _ = _convertir_valores_unicos(apiladas, _a_float_decimal_coma, np.nan)
+        n = len(df)
+        nulos_origen = apiladas.isna().to_numpy()
+        for i, col in enumerate(cols_texto):
+            bloque = slice(i * n, (i + 1) * n)
+            valores = convertidas[bloque]
+            n_nulos_origen = int(nulos_origen[bloque].sum())
+            n_nulos = int(np.isnan(valores).sum())
+            df[col] = valores
+            reporte["preguntas"][col] = {
+                "n_convertidos": n - n_nulos,
+                "n_fallidos": n_nulos - n_nulos_origen,
+                "n_nulos_origen": n_nulos_origen,
+            }
+        reporte["valores_unicos_preguntas"] = n_unicos
+
+    if 'FECHA_ENCUESTA' in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df['FECHA_ENCUESTA']):
+            reporte["fechas"] = {"ya_fecha": True, "n_nulos": int(df['FECHA_ENCUESTA'].isna().sum())}
+        else:
+            fechas, n_unicos, n_fallidos = _convertir_valores_unicos(
+                df['FECHA_ENCUESTA'], _a_fecha, np.datetime64('NaT'))
+            df['FECHA_ENCUESTA'] = fechas
+            reporte["fechas"] = {"valores_unicos": n_unicos, "n_fallidos": n_fallidos}
+        df['AÑO_ENCUESTA'] = df['FECHA_ENCUESTA'].dt.year
+        df['MES_ENCUESTA'] = df['FECHA_ENCUESTA'].dt.month
+
+    if devolver_reporte:
+        return df, reporte
     return df
+
+def compactar_dataframe(df):
+    """
+    Reduce la memoria del DataFrame limpio sobre el mismo objeto: preguntas a
+    float32, dimensiones a categóricas y año/mes a enteros pequeños.
+    """
+    for col in COLUMNAS_PREGUNTAS:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    for col in COLUMNAS_DIMENSION:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col, tipo in (('AÑO_ENCUESTA', 'int16'), ('MES_ENCUESTA', 'int8')):
+        if col in df.columns and not df[col].isna().any():
+            df[col] = df[col].astype(tipo)
+    return df
+
+def resumen_reporte_limpieza(reporte):
+    """Resume en una línea los valores descartados por clean_data."""
+    fallidos_preguntas = sum(info.get("n_fallidos", 0) for info in reporte.get("preguntas", {}).values())
+    fechas = reporte.get("fechas", {})
+    partes = [f"{fallidos_preguntas} respuestas no numéricas"]
+    partes.append(f"{fechas.get('n_fallidos', 0)} fechas inválidas")
+    if "valores_unicos" in fechas:
+        partes.append(f"{fechas['valores_unicos']} fechas distintas interpretadas")
+    return ", ".join(partes)
+
+def clean_chunks(chunks):
+    """Aplica clean_data a cada bloque de un iterador (ver data_loader.iter_chunks)."""
+    for chunk in chunks:
+        yield clean_data(chunk)
@@ -1,6 +1,301 @@
 # data_loader.py
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
-def load_data(filepath):
-    """Carga el archivo CSV de satisfacción."""
-    return pd.read_csv(filepath, sep=';', encoding='utf-8-sig')
+# Esquema explícito de las columnas conocidas del CSV de la encuesta.
+# Las respuestas y fechas se leen como texto crudo ("3,0", "7/01/2025");
+# su conversión a float y datetime la hace data_cleaner.clean_data.
+ESQUEMA_COLUMNAS = {
+    'ID': 'Int64',
+    'FECHA_ENCUESTA': str,
+    'EMAIL': str,
+    'NOMBRE': str,
+    'CEDULA': str,
+    'FECHA_VINCULACION': str,
+    'SEGMENTO': str,
+    'CIUDAD_AGENCIA': str,
+    'AGENCIA_EJECUTIVO': str,
+    'TIPO_EJECUTIVO': str,
+    'EJECUTIVO': str,
+    'CIUDAD_RESIDENCIA': str,
+    'GENERO': str,
+    'FECHA_NACIMIENTO_FUNDACION': str,
+    'ESTRATO': 'Int8',
+    'PREGUNTA_1': str,
+    'PREGUNTA_2': str,
+    'PREGUNTA_3': str,
+    'PREGUNTA_4': str,
+    'PREGUNTA_5': str,
+}
+
+# Columnas de texto con pocos valores distintos que en modo compacto se
+# cargan como categóricas.
+COLUMNAS_DIMENSION = [
+    'SEGMENTO', 'CIUDAD_AGENCIA', 'AGENCIA_EJECUTIVO', 'TIPO_EJECUTIVO',
+    'CIUDAD_RESIDENCIA', 'GENERO'
+]
+
+# Correspondencia entre los encabezados de la exportación original de la
+# encuesta (CSV de la raíz y libro .xlsx) y el esquema canónico.
+MAPEO_COLUMNAS_EXPORTACION = {
+    'ID_RespuestaEncuesta': 'ID',
+    'FechaEncuesta': 'FECHA_ENCUESTA',
+    'Email': 'EMAIL',
+    'NombreCliente': 'NOMBRE',
+    'CedulaNit': 'CEDULA',
+    'FechaVinculacion': 'FECHA_VINCULACION',
+    'SegmentoCliente': 'SEGMENTO',
+    'CiudadAgencia': 'CIUDAD_AGENCIA',
+    'AgenciaEjecutivo': 'AGENCIA_EJECUTIVO',
+    'TipoEjecutivo': 'TIPO_EJECUTIVO',
+    'NombreEjecutivo': 'EJECUTIVO',
+    'CiudadResidenciaCliente': 'CIUDAD_RESIDENCIA',
+    'Genero': 'GENERO',
+    'EstratoSocioeconomico': 'ESTRATO',
+    'CalificacionClaridadInfo': 'PREGUNTA_1',
+    'ProbabilidadRecomendacion': 'PREGUNTA_2',
+    'SatisfaccionGeneral': 'PREGUNTA_3',
+    'ProbabilidadContinuar': 'PREGUNTA_4',
+    'SugerenciasComentarios': 'PREGUNTA_5',
+}
+
+_COLUMNAS_ORIGEN_EXPORTACION = {canonica: origen for origen, canonica in MAPEO_COLUMNAS_EXPORTACION.items()}
+
+# Valores que el esquema canónico asigna a las empresas, que en la
+# exportación original no tienen género ni estrato
+GENERO_EMPRESAS = 'No aplica'
+ESTRATO_EMPRESAS = 7
+
+TAMANO_CHUNK_DEFECTO = 100_000
+EXTENSIONES_DATOS = ('.csv', '.xlsx', '.xlsm')
+
+def _esquema(compacto):
+    esquema = dict(ESQUEMA_COLUMNAS)
+    if compacto:
+        for col in COLUMNAS_DIMENSION:
+            esquema[col] = 'category'
+    return esquema
+
+def _selector_columnas(columnas):
+    """Selector para usecols que ignora columnas pedidas que no estén en el archivo."""
+    if columnas is None:
+        return None
+    columnas = set(columnas)
+    return lambda col: col in columnas
+
+def normalizar_exportacion(df):
+    """
+    Convierte un bloque con los encabezados de la exportación original
+    (FechaEncuesta, SegmentoCliente, CalificacionClaridadInfo, ...) al esquema canónico.
+    """
+    df = df.rename(columns=MAPEO_COLUMNAS_EXPORTACION)
+    if 'FechaNacimiento' in df.columns or 'FechaFundacionEmpresa' in df.columns:
+        nacimiento = df.get('FechaNacimiento', pd.Series(np.nan, index=df.index))
+        fundacion = df.get('FechaFundacionEmpresa', pd.Series(np.nan, index=df.index))
+        df['FECHA_NACIMIENTO_FUNDACION'] = nacimiento.where(nacimiento.notna(), fundacion)
+    if 'SEGMENTO' in df.columns:
+        empresas = df['SEGMENTO'] == 'Empresas'
+        if 'GENERO' in df.columns:
+            df['GENERO'] = df['GENERO'].where(~(empresas & df['GENERO'].isna()), GENERO_EMPRESAS)
+        if 'ESTRATO' in df.columns:
+            df['ESTRATO'] = df['ESTRATO'].where(~(empresas & df['ESTRATO'].isna()), ESTRATO_EMPRESAS)
+    return df[[col for col in ESQUEMA_COLUMNAS if col in df.columns]]
+
+def concatenar_bloques(bloques):
+    """Concatena bloques unificando las categorías de las columnas categóricas."""
+    bloques = list(bloques)
+    if not bloques:
+        return pd.DataFrame()
+    for col in bloques[0].columns:
+        if isinstance(bloques[0][col].dtype, pd.CategoricalDtype):
+            categorias = union_categoricals([b[col] for b in bloques]).categories
+            for b in bloques:
+                b[col] = b[col].cat.set_categories(categorias)
+    return pd.concat(bloques, ignore_index=True)
+
+def _es_exportacion(encabezado):
+    """Indica si los encabezados corresponden a la exportación original (FechaEncuesta, SegmentoCliente, ...)."""
+    return 'SegmentoCliente' in encabezado or 'FechaEncuesta' in encabezado
+
+def _columnas_origen_exportacion(columnas):
+    """Traduce una proyección canónica a los encabezados de la exportación original."""
+    if columnas is None:
+        return None
+    columnas = set(columnas)
+    origen = {_COLUMNAS_ORIGEN_EXPORTACION.get(col, col) for col in columnas}
+    if 'FECHA_NACIMIENTO_FUNDACION' in columnas:
+        origen |= {'FechaNacimiento', 'FechaFundacionEmpresa'}
+    if columnas & {'GENERO', 'ESTRATO'}:
+        # El segmento se necesita para completar género y estrato de las empresas
+        origen.add('SegmentoCliente')
+    return origen
+
+def _proyectar(df, columnas):
+    if columnas is None:
+        return df
+    columnas = set(columnas)
+    return df[[col for col in df.columns if col in columnas]]
+
+def _aplicar_esquema(df, compacto, ya_tipadas=()):
+    """Tipa las columnas de un bloque normalizado según ESQUEMA_COLUMNAS (salvo `ya_tipadas`)."""
+    for col in df.columns:
+        if col in ya_tipadas:
+            continue
+        if compacto and col in COLUMNAS_DIMENSION:
+            df[col] = df[col].astype('category')
+        elif ESQUEMA_COLUMNAS[col] is str:
+            df[col] = df[col].astype(str).where(df[col].notna())
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(ESQUEMA_COLUMNAS[col])
+    return df
+
+def _normalizar_bloque_exportacion(df, columnas, compacto):
+    return _aplicar_esquema(_proyectar(normalizar_exportacion(df), columnas), compacto)
+
+def load_data(filepath, chunksize=None, columnas=None, compacto=False, max_workers=None):
+    """Carga el archivo CSV de satisfacción.
+
+    Si se indica chunksize, devuelve un iterador de DataFrames tipados según
+    ESQUEMA_COLUMNAS en lugar de cargar el archivo completo en memoria.
+    Con `columnas` solo se leen esas columnas del archivo; con compacto=True
+    se aplica el esquema explícito y las dimensiones se cargan como categóricas.
+    Los libros .xlsx se leen fila a fila (ver iter_chunks_excel) y los archivos
+    con los encabezados de la exportación original se llevan al esquema canónico.
+    Si filepath es un directorio o un patrón glob se cargan todos sus archivos
+    en paralelo (ver load_multiple).
+    """
+    if es_multiple(filepath):
+        if chunksize is not None:
+            return (bloque for ruta in listar_archivos(filepath)
+                    for bloque in load_data(ruta, chunksize=chunksize, columnas=columnas, compacto=compacto))
+        return load_multiple(filepath, columnas=columnas, compacto=compacto, max_workers=max_workers)
+    if chunksize is not None:
+        if es_excel(filepath):
+            return iter_chunks_excel(filepath, chunksize=chunksize, columnas=columnas, compacto=compacto)
+        return iter_chunks(filepath, chunksize=chunksize, columnas=columnas, compacto=compacto)
+    if es_excel(filepath) or _es_exportacion(_encabezado_csv(filepath)):
+        return _leer_archivo_tipado(filepath, columnas, compacto)
+    return pd.read_csv(filepath, sep=';', encoding='utf-8-sig', usecols=_selector_columnas(columnas),
+                       dtype=_esquema(True) if compacto else None)
+
+def _leer_archivo_tipado(filepath, columnas, compacto):
+    """Lee un archivo completo, en cualquiera de los formatos, con el esquema canónico explícito."""
+    if es_excel(filepath):
+        return concatenar_bloques(iter_chunks_excel(filepath, columnas=columnas, compacto=compacto))
+    if _es_exportacion(_encabezado_csv(filepath)):
+        df = pd.read_csv(filepath, sep=';', encoding='utf-8-sig', dtype=str,
+                         usecols=_selector_columnas(_columnas_origen_exportacion(columnas)))
+        return _normalizar_bloque_exportacion(df, columnas, compacto)
+    return pd.read_csv(filepath, sep=';', encoding='utf-8-sig', usecols=_selector_columnas(columnas),
+                       dtype=_esquema(compacto))
+
+def _encabezado_csv(filepath):
+    return list(pd.read_csv(filepath, sep=';', encoding='utf-8-sig', nrows=0).columns)
+
+def iter_chunks(filepath, chunksize=TAMANO_CHUNK_DEFECTO, columnas=None, compacto=False):
+    """Lee el CSV por bloques de `chunksize` filas con el esquema explícito.
+
+    En modo compacto las categorías de cada bloque son las observadas en ese
+    bloque; al concatenar bloques conviene unificarlas (ver concatenar_bloques).
+    """
+    if _es_exportacion(_encabezado_csv(filepath)):
+        with pd.read_csv(filepath, sep=';', encoding='utf-8-sig', dtype=str, chunksize=chunksize,
+                         usecols=_selector_columnas(_columnas_origen_exportacion(columnas))) as lector:
+            for chunk in lector:
+                yield _normalizar_bloque_exportacion(chunk, columnas, compacto)
+        return
+    with pd.read_csv(filepath, sep=';', encoding='utf-8-sig', dtype=_esquema(compacto),
+                     usecols=_selector_columnas(columnas), chunksize=chunksize) as lector:
+        for chunk in lector:
+            yield chunk
+
+def es_multiple(filepath):
+    """Indica si filepath es un directorio o un patrón glob en lugar de un archivo."""
+    filepath = str(filepath)
+    return os.path.isdir(filepath) or glob.has_magic(filepath)
+
+def listar_archivos(filepath):
+    """Archivos .csv y .xlsx de un directorio (sin recorrer subdirectorios) o de un patrón glob, ordenados."""
+    filepath = str(filepath)
+    patron = os.path.join(filepath, '*') if os.path.isdir(filepath) else filepath
+    return sorted(ruta for ruta in glob.glob(patron)
+                  if os.path.isfile(ruta) and os.path.splitext(ruta)[1].lower() in EXTENSIONES_DATOS)
+
+def _cargar_archivo(argumentos):
+    filepath, columnas, compacto = argumentos
+    return _leer_archivo_tipado(filepath, columnas, compacto)
+
+def load_multiple(filepath, columnas=None, compacto=False, max_workers=None):
+    """
+    Carga todos los archivos de un directorio o patrón glob en un único DataFrame.
+
+    Cada archivo se lee con el esquema explícito (ESQUEMA_COLUMNAS) en un proceso
+    del pool; los archivos pueden venir en cualquiera de los dos formatos de
+    encabezados. Los resultados se concatenan una sola vez al final, en el orden
+    de los archivos.
+    """
+    rutas = listar_archivos(filepath)
+    if not rutas:
+        raise FileNotFoundError(f"No se encontraron archivos .csv o .xlsx en {filepath}")
+    argumentos = [(ruta, columnas, compacto) for ruta in rutas]
+    if len(rutas) == 1 or max_workers == 1:
+        return concatenar_bloques(map(_cargar_archivo, argumentos))
+    max_workers = min(len(rutas), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return concatenar_bloques(pool.map(_cargar_archivo, argumentos))
+
+def es_excel(filepath):
+    return os.path.splitext(str(filepath))[1].lower() in ('.xlsx', '.xlsm')
+
+def _tipar_bloque_excel(df, compacto):
+    """Aplica el esquema canónico a un bloque leído del libro de Excel.
+
+    Las celdas de Excel ya traen números y fechas: las preguntas quedan como
+    float y las fechas como datetime (clean_data las respeta).
+    """
+    ya_tipadas = []
+    for col in df.columns:
+        if col.startswith('FECHA_'):
+            df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+            ya_tipadas.append(col)
+        elif col.startswith('PREGUNTA_') and col != 'PREGUNTA_5':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+            ya_tipadas.append(col)
+    return _aplicar_esquema(df, compacto, ya_tipadas)
+
+def iter_chunks_excel(filepath, chunksize=TAMANO_CHUNK_DEFECTO, columnas=None, compacto=False, hoja=None):
+    """
+    Lee un libro .xlsx en modo de solo lectura, fila a fila, y produce bloques
+    de `chunksize` filas con el esquema canónico.
+
+    A diferencia de pandas.read_excel no se carga el libro completo en memoria:
+    solo se mantiene el bloque en construcción. Por defecto se lee la primera hoja.
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        hoja_datos = libro[hoja] if hoja is not None else libro.worksheets[0]
+        filas = hoja_datos.iter_rows(values_only=True)
+        encabezado = [str(c).strip() if c is not None else '' for c in next(filas, ())]
+
+        def construir_bloque(registros):
+            bloque = normalizar_exportacion(pd.DataFrame.from_records(registros, columns=encabezado))
+            return _tipar_bloque_excel(_proyectar(bloque, columnas), compacto)
+
+        registros = []
+        for fila in filas:
+            if all(valor is None for valor in fila):
+                continue
+            registros.append(fila)
+            if len(registros) >= chunksize:
+                yield construir_bloque(registros)
+                registros = []
+        if registros:
+            yield construir_bloque(registros)
+    finally:
+        libro.close()
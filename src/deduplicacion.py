@@ -0,0 +1,160 @@
+# deduplicacion.py
+"""
+Detección de encuestados duplicados.
+
+Dos respuestas pertenecen al mismo encuestado si comparten la CEDULA o el
+EMAIL normalizados (también de forma transitiva: A comparte cédula con B y B
+comparte correo con C). Las claves se indexan con una tabla hash
+(pandas.factorize) y los grupos son las componentes conexas del grafo
+filas-claves (scipy.sparse.csgraph), sin comparar pares de filas; el costo es
+casi lineal en el número de filas.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+COLUMNAS_IDENTIDAD = ['CEDULA', 'EMAIL']
+POLITICAS = ('ultima', 'primera')
+
+def normalizar_cedula(serie):
+    """Cédula/NIT en mayúsculas y sin espacios, puntos ni guiones."""
+    return serie.astype('string').str.upper().str.replace(r'[^0-9A-Z]', '', regex=True).replace('', pd.NA)
+
+def normalizar_email(serie):
+    """Correo en minúsculas y sin espacios alrededor."""
+    return serie.astype('string').str.strip().str.lower().replace('', pd.NA)
+
+NORMALIZADORES = {'CEDULA': normalizar_cedula, 'EMAIL': normalizar_email}
+
+def _hash_clave(serie, col):
+    """Hash de 64 bits de la clave normalizada de cada fila y máscara de las filas que la tienen."""
+    normalizada = NORMALIZADORES.get(col, lambda s: s)(serie)
+    return pd.util.hash_pandas_object(normalizada, index=False).to_numpy(), normalizada.notna().to_numpy()
+
+def hash_claves(df, columnas=COLUMNAS_IDENTIDAD):
+    """
+    Hashes de 64 bits (pandas.util.hash_pandas_object) de las claves de
+    identidad normalizadas presentes en df, por columna. Permiten reconocer a
+    un encuestado ya registrado sin guardar su cédula ni su correo.
+    """
+    claves = {}
+    for col in columnas:
+        if col in df.columns:
+            hashes, presentes = _hash_clave(df[col], col)
+            claves[col] = hashes[presentes]
+    return claves
+
+def grupos_encuestado(df, columnas=COLUMNAS_IDENTIDAD):
+    """
+    Etiqueta cada fila con un identificador de encuestado (entero arbitrario,
+    igual para todas sus respuestas). Las filas sin ninguna clave forman un grupo propio.
+    """
+    n = len(df)
+    # Grafo bipartito filas-claves: un nodo por fila y uno por cada valor
+    # distinto de cada clave; cada fila se une a los nodos de sus claves
+    origen, destino = [], []
+    n_nodos = n
+    for col in columnas:
+        if col in df.columns:
+            codigo, unicos = pd.factorize(NORMALIZADORES.get(col, lambda s: s)(df[col]))
+            con_clave = np.flatnonzero(codigo >= 0)
+            origen.append(con_clave)
+            destino.append(codigo[con_clave] + n_nodos)
+            n_nodos += len(unicos)
+    origen = np.concatenate(origen) if origen else np.array([], dtype=np.int64)
+    destino = np.concatenate(destino) if destino else np.array([], dtype=np.int64)
+    grafo = coo_matrix((np.ones(len(origen), dtype=np.int8), (origen, destino)), shape=(n_nodos, n_nodos))
+    _, componentes = connected_components(grafo, directed=False)
+    return componentes[:n]
+
+def deduplicar(df, politica='ultima', columnas=COLUMNAS_IDENTIDAD, columna_fecha='FECHA_ENCUESTA',
+               claves_previas=None):
+    """
+    Conserva una respuesta por encuestado.
+
+    Con `claves_previas` se descartan además todas las respuestas de los
+    encuestados que ya estaban registrados (por ejemplo, en una ingesta anterior).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Datos limpios (ver clean_data)
+    politica : str, optional
+        'ultima' conserva la respuesta con FECHA_ENCUESTA más reciente y
+        'primera' la más antigua; los empates (o la falta de fechas) se
+        resuelven por el orden de las filas. Por defecto 'ultima'
+    columnas : list, optional
+        Columnas de identidad; por defecto CEDULA y EMAIL
+    columna_fecha : str, optional
+        Columna con la fecha de la respuesta
+    claves_previas : dict, optional
+        Hashes de las claves ya registradas por columna (ver hash_claves)
+
+    Returns
+    -------
+    tuple
+        (DataFrame sin duplicados, dict con el conteo de lo eliminado)
+    """
+    if politica not in POLITICAS:
+        raise ValueError(f"Política de deduplicación no soportada: {politica}. Opciones: {', '.join(POLITICAS)}")
+    columnas = [col for col in columnas if col in df.columns]
+    n = len(df)
+    reporte = {"filas": n, "politica": politica, "columnas": columnas}
+    if not columnas or n == 0:
+        reporte.update({"filas_conservadas": n, "duplicados_eliminados": 0, "encuestados_con_duplicados": 0,
+                        "ya_registradas": 0})
+        return df, reporte
+
+    etiquetas = grupos_encuestado(df, columnas)
+    if columna_fecha in df.columns:
+        fechas = df[columna_fecha].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        # NaT es el mínimo de int64: una respuesta sin fecha nunca se prefiere a una fechada
+    else:
+        fechas = np.zeros(n, dtype=np.int64)
+    if politica == 'primera':
+        # Para conservar la más antigua, las respuestas sin fecha van al final
+        fechas = np.where(fechas == np.iinfo(np.int64).min, np.iinfo(np.int64).max, fechas)
+    # Orden por encuestado, fecha y posición: 'primera' conserva el primer
+    # elemento de cada grupo y 'ultima' el último
+    orden = np.lexsort((np.arange(n), fechas, etiquetas))
+    etiquetas_ordenadas = etiquetas[orden]
+    cambio = etiquetas_ordenadas[1:] != etiquetas_ordenadas[:-1]
+    if politica == 'primera':
+        elegidas = np.r_[True, cambio]
+    else:
+        elegidas = np.r_[cambio, True]
+    conservar = np.zeros(n, dtype=bool)
+    conservar[orden[elegidas]] = True
+
+    ya_registradas = np.zeros(n, dtype=bool)
+    if claves_previas:
+        for col in columnas:
+            hashes, presentes = _hash_clave(df[col], col)
+            previas = np.asarray(claves_previas.get(col, []), dtype=np.uint64)
+            ya_registradas |= presentes & np.isin(hashes, previas)
+        # Se descarta el grupo completo: también las respuestas enlazadas por la otra clave
+        ya_registradas = np.isin(etiquetas, etiquetas[ya_registradas])
+        conservar &= ~ya_registradas
+
+    tamanos = np.bincount(etiquetas)
+    n_conservadas = int(conservar.sum())
+    reporte.update({
+        "filas_conservadas": n_conservadas,
+        "duplicados_eliminados": n - n_conservadas,
+        "encuestados_con_duplicados": int((tamanos > 1).sum()),
+        "ya_registradas": int(ya_registradas.sum()),
+    })
+    if n_conservadas == n:
+        return df, reporte
+    return df[conservar], reporte
+
+def resumen_reporte_deduplicacion(reporte):
+    """Resume en una línea lo eliminado por deduplicar."""
+    resumen = (f"{reporte['duplicados_eliminados']} respuestas duplicadas eliminadas de "
+               f"{reporte['encuestados_con_duplicados']} encuestados (política '{reporte['politica']}', "
+               f"claves: {', '.join(reporte['columnas']) or 'ninguna'})")
+    if reporte.get("ya_registradas"):
+        resumen += f", {reporte['ya_registradas']} de encuestados ya registrados"
+    return resumen
@@ -2,9 +2,55 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import os
+import pickle
+from itertools import groupby
+
+# Exportación diferida: dentro de un proceso de trabajo (ver planificador) las
+# hojas de Excel y las figuras del PDF se acumulan y se devuelven al proceso
+# principal, que las escribe en orden; así varios procesos no escriben a la vez
+# el mismo libro de Excel.
+_exportacion_diferida = None
+
+def iniciar_exportacion_diferida():
+    """Empieza a acumular las hojas de Excel y figuras del PDF en lugar de escribirlas."""
+    global _exportacion_diferida
+    _exportacion_diferida = {"excel": [], "figuras": []}
+
+def recoger_exportacion_diferida():
+    """
+    Termina la exportación diferida y devuelve lo acumulado: hojas de Excel como
+    (ruta, hoja, DataFrame) y figuras serializadas con pickle.
+    """
+    global _exportacion_diferida
+    acumulado, _exportacion_diferida = _exportacion_diferida, None
+    if acumulado is None:
+        return {"excel": [], "figuras": []}
+    acumulado["figuras"] = [pickle.dumps(fig) for fig in acumulado["figuras"]]
+    return acumulado
+
+def aplicar_exportacion_diferida(acumulado):
+    """Escribe en el proceso actual las hojas y figuras recogidas con recoger_exportacion_diferida."""
+    for excel_path, hojas in groupby(acumulado["excel"], key=lambda hoja: hoja[0]):
+        _escribir_hojas_excel(excel_path, [(sheet_name, df) for _, sheet_name, df in hojas])
+    for figura in acumulado["figuras"]:
+        _figures_to_export.append(pickle.loads(figura))
+
+def _escribir_hojas_excel(excel_path, hojas):
+    """Escribe varias hojas abriendo el libro una sola vez."""
+    # Si el archivo existe, usa openpyxl en modo append; si no, crea nuevo con openpyxl
+    if os.path.exists(excel_path):
+        writer = pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace')
+    else:
+        writer = pd.ExcelWriter(excel_path, engine='openpyxl', mode='w')
+    with writer:
+        for sheet_name, df in hojas:
+            df.to_excel(writer, sheet_name=sheet_name)
 
 def export_table_to_excel(df, sheet_name, excel_path):
     """Exporta un DataFrame a una hoja de Excel, reemplazando si ya existe."""
+    if _exportacion_diferida is not None:
+        _exportacion_diferida["excel"].append((excel_path, sheet_name, df))
+        return
     # Si el archivo existe, usa openpyxl en modo append; si no, crea nuevo con openpyxl
     if os.path.exists(excel_path):
         with pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
@@ -18,6 +64,9 @@ _figures_to_export = []
 
 def add_figure_for_pdf(fig):
     """Agrega una figura a la lista para exportar al PDF al final."""
+    if _exportacion_diferida is not None:
+        _exportacion_diferida["figuras"].append(fig)
+        return
     _figures_to_export.append(fig)
 
 def export_all_figures_to_pdf(pdf_path):
@@ -1,4 +1,6 @@
-def verificar_homogeneidad_varianzas(data, variable_grupo, variable_numerica, alpha=0.05):
+from src.contexto import ContextoAnalisis
+
+def verificar_homogeneidad_varianzas(data, variable_grupo, variable_numerica, alpha=0.05, contexto=None):
     """
     Verifica la homogeneidad de varianzas entre grupos usando la prueba de Levene.
     
@@ -12,18 +14,24 @@ def verificar_homogeneidad_varianzas(data, variable_grupo, variable_numerica, al
         Nombre de la columna numérica para verificar homogeneidad
     alpha : float, optional
         Nivel de significancia, por defecto 0.05
+    contexto : ContextoAnalisis, optional
+        Índices por grupo de data ya calculados (ver src/contexto.py); por defecto se crea uno
     
     Returns
     -------
     dict
         Resultados de la prueba incluyendo estadístico, p-valor y conclusión
     """
-    # Eliminar filas con valores faltantes
-    datos_limpios = data[[variable_grupo, variable_numerica]].dropna()
+    if contexto is None:
+        contexto = ContextoAnalisis(data)
+    
+    # Valores no faltantes de cada grupo; los grupos sin ninguno no cuentan
+    valores_por_grupo = [contexto.valores_grupo(variable_grupo, variable_numerica, grupo).to_numpy()
+                         for grupo in data[variable_grupo].dropna().unique()]
+    valores_por_grupo = [valores for valores in valores_por_grupo if len(valores) > 0]
     
     # Verificar si hay suficientes grupos y datos
-    grupos = datos_limpios[variable_grupo].unique()
-    if len(grupos) < 2:
+    if len(valores_por_grupo) < 2:
         return {
             "homogeneidad_varianzas": False,
             "estadistico": None,
@@ -32,12 +40,8 @@ def verificar_homogeneidad_varianzas(data, variable_grupo, variable_numerica, al
             "mensaje": "Se necesitan al menos dos grupos diferentes para la prueba"
         }
     
-    # Crear lista de datos por grupo
-    listas_por_grupo = []
-    for grupo in grupos:
-        datos_grupo = datos_limpios[datos_limpios[variable_grupo] == grupo][variable_numerica].values
-        if len(datos_grupo) > 1:  # Necesitamos al menos 2 observaciones por grupo
-            listas_por_grupo.append(datos_grupo)
+    # Crear lista de datos por grupo (al menos 2 observaciones por grupo)
+    listas_por_grupo = [valores for valores in valores_por_grupo if len(valores) > 1]
     
     # Verificar si hay suficientes datos en cada grupo
     if len(listas_por_grupo) < 2 or any(len(lista) < 2 for lista in listas_por_grupo):
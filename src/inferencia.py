@@ -3,20 +3,28 @@ import numpy as np
 import pandas as pd
 from scipy import stats
 import matplotlib.pyplot as plt
-import seaborn as sns
 from src.exporter import export_table_to_excel, add_figure_for_pdf, save_plot_to_png
+from src.contexto import ContextoAnalisis
+from src.normalidad import shapiro_por_grupos
+from src.bootstrap import intervalos_bootstrap, REMUESTRAS
 import os
 
-def comparar_grupos(df, var_grupo, var_num, grupo1, grupo2, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None):
+def comparar_grupos(df, var_grupo, var_num, grupo1, grupo2, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None, contexto=None, metodo_ic=None):
     """
     Compara dos grupos para una variable numérica, exporta resultados a JSON y gráficos.
+    `contexto` (ver src/contexto.py) evita recorrer df para extraer cada grupo.
+    `metodo_ic` ('percentil' o 'bca') añade intervalos bootstrap de la media y
+    la mediana de ambos grupos (ver src/bootstrap.py). Devuelve el resumen exportado.
     """
-    data1 = df[df[var_grupo] == grupo1][var_num].dropna()
-    data2 = df[df[var_grupo] == grupo2][var_num].dropna()
+    if contexto is None:
+        contexto = ContextoAnalisis(df)
+    data1 = contexto.valores_grupo(var_grupo, var_num, grupo1)
+    data2 = contexto.valores_grupo(var_grupo, var_num, grupo2)
     if len(data1) == 0 or len(data2) == 0:
         print(f"No hay datos suficientes para comparar {grupo1} y {grupo2}.")
         return
     # Gráfico de densidad
+    import seaborn as sns
     plt.figure(figsize=(10,6))
     sns.kdeplot(data1, label=grupo1, fill=True, alpha=.5)
     sns.kdeplot(data2, label=grupo2, fill=True, alpha=.5)
@@ -32,11 +40,11 @@ def comparar_grupos(df, var_grupo, var_num, grupo1, grupo2, export_excel_path=No
         os.makedirs(export_png_dir, exist_ok=True)
         save_plot_to_png(fig, os.path.join(export_png_dir, f"inferencia_{var_grupo}_{grupo1}_vs_{grupo2}.png"))
     plt.close(fig)
-    # Pruebas estadísticas
-    sh1 = stats.shapiro(data1)
-    sh2 = stats.shapiro(data2)
+    # Pruebas estadísticas (la normalidad por grupo puede venir ya calculada en el contexto)
+    normalidad = shapiro_por_grupos(contexto, var_grupo, var_num, [grupo1, grupo2])
+    shapiro_p1, shapiro_p2 = normalidad[grupo1][2], normalidad[grupo2][2]
     lev = stats.levene(data1, data2)
-    if sh1.pvalue > 0.05 and sh2.pvalue > 0.05:
+    if all(p is not None and p > 0.05 for p in (shapiro_p1, shapiro_p2)):
         ttest = stats.ttest_ind(data1, data2, equal_var=lev.pvalue > 0.05)
         test_name = 't-test'
         pval = ttest.pvalue
@@ -64,10 +72,16 @@ def comparar_grupos(df, var_grupo, var_num, grupo1, grupo2, export_excel_path=No
         'pvalor': float(pval),
         'n1': int(len(data1)),
         'n2': int(len(data2)),
-        'shapiro_p1': float(sh1.pvalue),
-        'shapiro_p2': float(sh2.pvalue),
+        'shapiro_p1': None if shapiro_p1 is None else float(shapiro_p1),
+        'shapiro_p2': None if shapiro_p2 is None else float(shapiro_p2),
         'levene_p': float(lev.pvalue)
     }
+    if metodo_ic:
+        # Intervalos de ambos grupos con una sola remuestra conjunta
+        intervalos = intervalos_bootstrap({grupo1: data1, grupo2: data2}, ('media', 'mediana'), metodo=metodo_ic)
+        result['ic_bootstrap'] = {'metodo': metodo_ic, 'remuestras': REMUESTRAS}
+        for clave, grupo in (('grupo1', grupo1), ('grupo2', grupo2)):
+            result['ic_bootstrap'][clave] = {nombre: [ic['ic_inf'], ic['ic_sup']] for nombre, ic in intervalos[grupo].items()}
     if export_json_dir:
         os.makedirs(export_json_dir, exist_ok=True)
         import json
@@ -78,5 +92,10 @@ def comparar_grupos(df, var_grupo, var_num, grupo1, grupo2, export_excel_path=No
         grupo1: [np.median(data1), np.mean(data1)],
         grupo2: [np.median(data2), np.mean(data2)]
     }, index=['Mediana', 'Promedio'])
+    if metodo_ic:
+        for nombre, etiqueta in (('mediana', 'Mediana'), ('media', 'Promedio')):
+            for posicion, limite in enumerate(('inf', 'sup')):
+                resumen.loc[f'IC_{etiqueta}_{limite}'] = [result['ic_bootstrap'][clave][nombre][posicion] for clave in ('grupo1', 'grupo2')]
     if export_excel_path:
         export_table_to_excel(resumen, f'{grupo1}_vs_{grupo2}_inferencia', export_excel_path)
+    return result
@@ -0,0 +1,128 @@
+# memoria_compartida.py
+"""
+DataFrame en memoria compartida para los procesos de trabajo del plan.
+
+El proceso principal copia una sola vez los arreglos de las columnas a un
+bloque de multiprocessing.shared_memory: los valores de las columnas
+numéricas (las preguntas Likert en float32, enteros y fechas), los datos y la
+máscara de los enteros con nulos y los códigos de las categóricas. Cada
+proceso recibe solo una descripción pequeña del bloque (nombre, tipo y
+posición de cada arreglo, categorías) y reconstruye el DataFrame sobre el
+mismo bloque, sin copiar ni deserializar los datos. Los arreglos se marcan de
+solo lectura: pandas copia una columna antes de modificarla.
+
+Las columnas de texto no tienen una representación de ancho fijo y viajan
+copiadas en la descripción, como antes.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+ALINEACION = 64  # bytes; cada arreglo empieza en un múltiplo de la línea de caché
+
+def _arreglos_columna(serie):
+    """Tipo de almacenamiento, arreglos de ancho fijo y metadatos con que se reconstruye la columna."""
+    dtype = serie.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'categorica', [serie.cat.codes.to_numpy()], {
+            "categorias": dtype.categories, "ordenada": dtype.ordered}
+    if isinstance(dtype, pd.core.dtypes.dtypes.BaseMaskedDtype):
+        arreglo = serie.array
+        return 'enmascarada', [arreglo._data, arreglo._mask], {"dtype": str(dtype)}
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+        valores = serie.to_numpy()
+        if dtype.kind in 'mM':
+            # Fechas y duraciones: su representación entera
+            return 'fecha', [valores.view('int64')], {"dtype": str(dtype)}
+        return 'numpy', [valores], {}
+    return 'copiada', [], {"valores": serie.array}
+
+def compartir_dataframe(df):
+    """
+    Copia las columnas de ancho fijo del DataFrame a un bloque de memoria compartida.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Datos que leerán los procesos de trabajo
+
+    Returns
+    -------
+    tuple
+        (bloque, descripcion): el SharedMemory, que el proceso principal debe
+        liberar con liberar_bloque al terminar, y la descripción que se envía a
+        los procesos para adjuntar_dataframe
+    """
+    columnas = []
+    pendientes = []
+    tamano = 0
+    indice = df.index
+    if isinstance(indice, pd.RangeIndex):
+        descripcion_indice = {"rango": (indice.start, indice.stop, indice.step), "nombre": indice.name}
+    else:
+        descripcion_indice = {"valores": indice}
+    for nombre in df.columns:
+        tipo, arreglos, metadatos = _arreglos_columna(df[nombre])
+        especificaciones = []
+        for arreglo in arreglos:
+            arreglo = np.ascontiguousarray(arreglo)
+            tamano = -(-tamano // ALINEACION) * ALINEACION
+            especificaciones.append((arreglo.dtype.str, tamano, len(arreglo)))
+            pendientes.append((tamano, arreglo))
+            tamano += arreglo.nbytes
+        columnas.append({"nombre": nombre, "tipo": tipo, "arreglos": especificaciones, **metadatos})
+
+    bloque = shared_memory.SharedMemory(create=True, size=max(tamano, 1))
+    for posicion, arreglo in pendientes:
+        destino = np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=bloque.buf, offset=posicion)
+        destino[:] = arreglo
+    return bloque, {"nombre": bloque.name, "indice": descripcion_indice, "columnas": columnas}
+
+def adjuntar_dataframe(descripcion):
+    """
+    Reconstruye el DataFrame sobre el bloque compartido descrito, sin copiar sus arreglos.
+
+    Returns
+    -------
+    tuple
+        (df, bloque): el bloque debe seguir referenciado mientras se use df
+    """
+    # Los procesos de trabajo comparten el rastreador de recursos del principal,
+    # que elimina el bloque si este termina sin liberarlo
+    bloque = shared_memory.SharedMemory(name=descripcion["nombre"])
+
+    def vista(dtype, posicion, longitud):
+        arreglo = np.ndarray((longitud,), dtype=np.dtype(dtype), buffer=bloque.buf, offset=posicion)
+        arreglo.flags.writeable = False
+        return arreglo
+
+    datos = {}
+    for columna in descripcion["columnas"]:
+        arreglos = [vista(*especificacion) for especificacion in columna["arreglos"]]
+        tipo = columna["tipo"]
+        if tipo == 'categorica':
+            dtype = pd.CategoricalDtype(columna["categorias"], ordered=columna["ordenada"])
+            datos[columna["nombre"]] = pd.Categorical.from_codes(arreglos[0], dtype=dtype, validate=False)
+        elif tipo == 'enmascarada':
+            clase = pd.api.types.pandas_dtype(columna["dtype"]).construct_array_type()
+            datos[columna["nombre"]] = clase(arreglos[0], arreglos[1])
+        elif tipo == 'fecha':
+            datos[columna["nombre"]] = arreglos[0].view(columna["dtype"])
+        elif tipo == 'numpy':
+            datos[columna["nombre"]] = arreglos[0]
+        else:
+            datos[columna["nombre"]] = columna["valores"]
+
+    indice = descripcion["indice"]
+    if "rango" in indice:
+        indice = pd.RangeIndex(*indice["rango"], name=indice["nombre"])
+    else:
+        indice = indice["valores"]
+    return pd.DataFrame(datos, index=indice, copy=False), bloque
+
+def liberar_bloque(bloque):
+    """Cierra y elimina el bloque compartido (en el proceso que lo creó)."""
+    bloque.close()
+    bloque.unlink()
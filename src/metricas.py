@@ -0,0 +1,223 @@
+# metricas.py
+"""
+Métricas de rendimiento de una ejecución del análisis.
+
+Cada fase del script principal y cada análisis del plan se miden con tiempo
+de reloj, tiempo de CPU del proceso y memoria residente máxima del proceso;
+opcionalmente, con la memoria pico asignada durante la medición (tracemalloc,
+que hace varias veces más lento el código medido) y con un perfil cProfile
+(.prof) y un resumen de sus funciones más costosas. Todo se escribe en
+run_metrics.json para comparar ejecuciones entre versiones.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import pstats
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICAS_PATH = 'run_metrics.json'
+PERFILES_DIR = 'perfiles'
+N_FUNCIONES_COSTOSAS = 15
+
+# Mediciones en curso en este proceso (pueden anidarse: un análisis dentro de una fase)
+_mediciones_activas = []
+
+def _nombre_archivo(nombre):
+    return re.sub(r'\W+', '_', nombre.lower()).strip('_')
+
+def _funciones_costosas(perfil, n=N_FUNCIONES_COSTOSAS):
+    """Las n funciones con mayor tiempo acumulado de un perfil de cProfile."""
+    estadisticas = pstats.Stats(perfil).sort_stats('cumulative')
+    funciones = []
+    for funcion in estadisticas.fcn_list[:n]:
+        _, llamadas, tiempo_propio, tiempo_acumulado, _ = estadisticas.stats[funcion]
+        archivo, linea, nombre = funcion
+        funciones.append({
+            "funcion": f"{archivo}:{linea}({nombre})",
+            "llamadas": llamadas,
+            "tiempo_propio_s": round(tiempo_propio, 4),
+            "tiempo_acumulado_s": round(tiempo_acumulado, 4),
+        })
+    return funciones
+
+def _rss_maximo_mb():
+    """Memoria residente máxima que ha alcanzado el proceso, en MB (None si no se puede medir)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa kilobytes y macOS bytes
+    return round(rss / (2**20 if sys.platform == 'darwin' else 2**10), 3)
+
+def _mediciones_externas():
+    """Mediciones activas de este proceso (un proceso de trabajo creado con fork hereda las del principal)."""
+    pid = os.getpid()
+    return [externa for externa in _mediciones_activas if externa["pid"] == pid]
+
+def _iniciar_medicion(memoria, ruta_perfil):
+    estado = {"memoria": memoria, "ruta_perfil": None, "perfil": None, "detener_trazado": False, "pid": os.getpid()}
+    externas = _mediciones_externas()
+    if memoria:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            estado["detener_trazado"] = True
+        actual, pico = tracemalloc.get_traced_memory()
+        # Las mediciones externas conservan su pico antes de reiniciarlo para esta
+        for externa in externas:
+            if externa["memoria"]:
+                externa["pico"] = max(externa["pico"], pico)
+        tracemalloc.reset_peak()
+        estado["memoria_inicial"] = estado["pico"] = actual
+    # cProfile admite un solo perfilador activo: las mediciones anidadas no perfilan
+    if ruta_perfil is not None and not any(externa["perfil"] for externa in externas):
+        estado["ruta_perfil"] = ruta_perfil
+        estado["perfil"] = cProfile.Profile()
+    _mediciones_activas.append(estado)
+    estado["inicio"] = time.perf_counter()
+    estado["inicio_cpu"] = time.process_time()
+    if estado["perfil"] is not None:
+        estado["perfil"].enable()
+    return estado
+
+def _terminar_medicion(estado):
+    if estado["perfil"] is not None:
+        estado["perfil"].disable()
+    metricas = {
+        "tiempo_s": round(time.perf_counter() - estado["inicio"], 4),
+        "cpu_s": round(time.process_time() - estado["inicio_cpu"], 4),
+        "rss_max_mb": _rss_maximo_mb(),
+        "memoria_pico_mb": None,
+        "perfil": None,
+    }
+    _mediciones_activas.remove(estado)
+    if estado["memoria"]:
+        pico = max(estado["pico"], tracemalloc.get_traced_memory()[1])
+        metricas["memoria_pico_mb"] = round((pico - estado["memoria_inicial"]) / 2**20, 3)
+        if estado["detener_trazado"]:
+            tracemalloc.stop()
+    if estado["perfil"] is not None:
+        os.makedirs(os.path.dirname(estado["ruta_perfil"]) or '.', exist_ok=True)
+        estado["perfil"].dump_stats(estado["ruta_perfil"])
+        metricas["perfil"] = estado["ruta_perfil"]
+        metricas["funciones_costosas"] = _funciones_costosas(estado["perfil"])
+    return metricas
+
+@contextmanager
+def medicion(memoria=False, ruta_perfil=None):
+    """
+    Mide el bloque `with`: tiempo de reloj, tiempo de CPU del proceso, memoria
+    residente máxima del proceso al salir y, opcionalmente, memoria pico
+    asignada durante el bloque (en MB, sobre la memoria al entrar).
+
+    Parameters
+    ----------
+    memoria : bool, optional
+        Medir la memoria pico con tracemalloc (hace varias veces más lento el bloque)
+    ruta_perfil : str, optional
+        Si se indica, el bloque se perfila con cProfile y el perfil se guarda ahí
+
+    Yields
+    ------
+    dict
+        Se completa al salir del bloque con tiempo_s, cpu_s, rss_max_mb,
+        memoria_pico_mb, perfil y, si se perfiló, funciones_costosas
+    """
+    metricas = {}
+    estado = _iniciar_medicion(memoria, ruta_perfil)
+    try:
+        yield metricas
+    finally:
+        metricas.update(_terminar_medicion(estado))
+
+def opciones_medicion(registro):
+    """Opciones de medición del registro que se envían a los procesos de trabajo del plan."""
+    return {"memoria": registro["memoria"], "perfiles_dir": registro["perfiles_dir"]}
+
+def ruta_perfil(opciones, nombre):
+    """Ruta del archivo cProfile de una medición, o None si el perfilado no está activo."""
+    if opciones is None or opciones.get("perfiles_dir") is None:
+        return None
+    return os.path.join(opciones["perfiles_dir"], f"{_nombre_archivo(nombre)}.prof")
+
+def _commit_actual():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5)
+    except Exception:
+        return None
+    return salida.stdout.strip() or None
+
+def iniciar_registro(memoria=False, perfilar=False, perfiles_dir=PERFILES_DIR):
+    """Crea el registro de métricas de una ejecución."""
+    return {
+        "memoria": memoria,
+        "perfiles_dir": perfiles_dir if perfilar else None,
+        "inicio": datetime.now().isoformat(timespec='seconds'),
+        "inicio_reloj": time.perf_counter(),
+        "inicio_cpu": time.process_time(),
+        "fases": [],
+        "analisis": [],
+        "fase_actual": None,
+    }
+
+def iniciar_fase(registro, nombre):
+    """Empieza a medir una fase; termina antes la fase en curso, si la hay."""
+    terminar_fase(registro)
+    estado = _iniciar_medicion(registro["memoria"], ruta_perfil(opciones_medicion(registro), nombre))
+    registro["fase_actual"] = (nombre, estado)
+
+def terminar_fase(registro):
+    """Termina la medición de la fase en curso y la añade al registro."""
+    if registro["fase_actual"] is None:
+        return
+    nombre, estado = registro["fase_actual"]
+    registro["fase_actual"] = None
+    registro["fases"].append({"nombre": nombre, **_terminar_medicion(estado)})
+
+def registrar_analisis(registro, nodo, resultado):
+    """Añade al registro las métricas de un nodo del plan (medidas en su proceso de trabajo)."""
+    entrada = {
+        "id": nodo["id"],
+        "tipo": nodo["tipo"],
+        "estado": resultado["estado"],
+        "desde_cache": bool(resultado.get("desde_cache")),
+        "pid": resultado.get("pid"),
+    }
+    # Los nodos tomados de la caché no se ejecutaron: sus métricas serían las de otra ejecución
+    if not entrada["desde_cache"]:
+        entrada.update(resultado.get("metricas") or {})
+    registro["analisis"].append(entrada)
+
+def guardar_metricas(registro, ruta=METRICAS_PATH):
+    """Termina la fase en curso y escribe las métricas de la ejecución en JSON."""
+    terminar_fase(registro)
+    analisis_medidos = [a for a in registro["analisis"] if "tiempo_s" in a]
+    metricas = {
+        "inicio": registro["inicio"],
+        "commit": _commit_actual(),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "procesadores": os.cpu_count(),
+        "memoria_medida": registro["memoria"],
+        "perfiles_dir": registro["perfiles_dir"],
+        "tiempo_total_s": round(time.perf_counter() - registro["inicio_reloj"], 4),
+        # CPU del proceso principal; la de los análisis en otros procesos está en cpu_analisis_s
+        "cpu_total_s": round(time.process_time() - registro["inicio_cpu"], 4),
+        "cpu_analisis_s": round(sum(a["cpu_s"] for a in analisis_medidos), 4),
+        "fases": registro["fases"],
+        "analisis": sorted(registro["analisis"], key=lambda a: -a.get("tiempo_s", 0)),
+    }
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(metricas, f, ensure_ascii=False, indent=2)
+    return metricas
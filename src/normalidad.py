@@ -0,0 +1,51 @@
+# normalidad.py
+"""
+Pruebas de normalidad (Shapiro-Wilk) por grupo, compartidas entre análisis.
+
+bivariado_cat_num, calcular_diferencias_grupos y comparar_grupos prueban la
+normalidad de la misma variable en los mismos grupos. Aquí los valores de
+todos los grupos se obtienen de una sola partición de los datos (ver
+ContextoAnalisis.valores_por_grupo) y el resultado de cada grupo se guarda en
+el contexto, ligado a su DataFrame, de modo que cada par (columna de grupos,
+columna numérica) se prueba una sola vez por contexto.
+"""
+
+import numpy as np
+from scipy.stats import shapiro
+
+MIN_OBSERVACIONES = 3  # Shapiro-Wilk requiere al menos 3 valores
+
+def shapiro_por_grupos(contexto, var_grupo, var_numerica, grupos=None):
+    """
+    Shapiro-Wilk de `var_numerica` en cada grupo de `var_grupo`.
+
+    Parameters
+    ----------
+    contexto : ContextoAnalisis
+        Contexto de los datos; guarda los resultados para los demás análisis
+    var_grupo : str
+        Nombre de la columna con los grupos
+    var_numerica : str
+        Nombre de la columna numérica
+    grupos : iterable, optional
+        Grupos a probar; por defecto todos los de la columna
+
+    Returns
+    -------
+    dict
+        Por grupo, (n, estadistico, p_valor). Con menos de MIN_OBSERVACIONES
+        valores no nulos la prueba no se realiza y estadístico y p-valor son None
+    """
+    resultados = contexto.pruebas.setdefault(('shapiro', var_grupo, var_numerica), {})
+    grupos = list(contexto.indices_grupos(var_grupo) if grupos is None else grupos)
+    pendientes = [grupo for grupo in grupos if grupo not in resultados]
+    if pendientes:
+        valores = contexto.valores_por_grupo(var_grupo, var_numerica)
+        for grupo in pendientes:
+            datos = valores.get(grupo, np.array([]))
+            if len(datos) < MIN_OBSERVACIONES:
+                resultados[grupo] = (len(datos), None, None)
+            else:
+                estadistico, p_valor = shapiro(datos)
+                resultados[grupo] = (len(datos), estadistico, p_valor)
+    return {grupo: resultados[grupo] for grupo in grupos}
@@ -0,0 +1,149 @@
+# permutaciones.py
+"""
+Pruebas de permutación para comparar una variable numérica entre grupos.
+
+En las preguntas Likert (1 a 5) Shapiro-Wilk casi siempre rechaza la
+normalidad y las pruebas clásicas quedan en aproximaciones asintóticas. Una
+prueba de permutación no supone ninguna distribución: el p-valor es la
+proporción de reasignaciones aleatorias de los valores a los grupos (con los
+mismos tamaños) cuyo estadístico es al menos el observado.
+
+Los valores de todos los grupos se ponen en un solo arreglo ordenado por
+grupo (ver ContextoAnalisis.valores_por_grupo); cada lote es una matriz con
+una permutación por fila y las sumas por grupo de todas las filas se obtienen
+con un único np.add.reduceat sobre los límites de los grupos. Cuando los
+valores distintos son pocos, como en las escalas Likert, cada permutación se
+resume en su tabla de conteos grupo x valor, que se sortea directamente sin
+permutar los valores uno a uno. La semilla de cada lote, el reparto entre
+procesos y la parada temprana están en src/simulacion.py.
+"""
+
+import numpy as np
+from scipy import stats
+
+from src.simulacion import generador_lote, p_valor_simulado, TRABAJADORES
+
+SEMILLA = 20250102
+TAMANO_LOTE = 2000  # permutaciones por lote
+MAX_PERMUTACIONES = 100000
+MAX_ELEMENTOS_LOTE = 4000000  # valores permutados por lote (32 MB en float64)
+MAX_VALORES_DISTINTOS = 100  # hasta aquí se simulan tablas de conteos en lugar de permutar valores
+TOLERANCIA = 1e-9  # tolerancia relativa para empates con el estadístico observado
+ESTADISTICOS = ('medias', 'medianas', 'f')
+
+def _estadistico_medias(medias, tamanos, estadistico, suma_cuadrados_total):
+    """Diferencia absoluta de medias entre dos grupos o F del ANOVA de un factor, por fila de `medias`."""
+    if estadistico == 'medias':
+        return np.abs(medias[:, 0] - medias[:, 1])
+    # La suma de cuadrados total no cambia al permutar: F solo depende de la suma entre grupos
+    n, k = tamanos.sum(), len(tamanos)
+    entre = (tamanos * (medias - (medias * tamanos).sum(axis=1, keepdims=True) / n) ** 2).sum(axis=1)
+    dentro = np.maximum(suma_cuadrados_total - entre, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(dentro > 0, (entre / (k - 1)) / (dentro / (n - k)), np.inf)
+
+def _estadisticos_valores(matriz, inicios, tamanos, estadistico, suma_cuadrados_total):
+    """Estadístico de cada fila de `matriz`: una asignación de los valores a los grupos, ordenados por grupo."""
+    if estadistico == 'medianas':
+        return np.abs(np.median(matriz[:, :tamanos[0]], axis=1) - np.median(matriz[:, tamanos[0]:], axis=1))
+    medias = np.add.reduceat(matriz, inicios, axis=1) / tamanos
+    return _estadistico_medias(medias, tamanos, estadistico, suma_cuadrados_total)
+
+def _estadisticos_tabla(tablas, distintos, tamanos, estadistico, suma_cuadrados_total):
+    """
+    Estadístico de cada tabla (grupo x valor distinto) de conteos del lote:
+    las sumas salen del producto con los valores y las medianas de los conteos acumulados.
+    """
+    if estadistico == 'medianas':
+        acumulados = np.cumsum(tablas, axis=-1)
+        medianas = []
+        for grupo, n_grupo in enumerate(tamanos):
+            # Posiciones (desde 0) de los valores centrales del grupo ordenado
+            bajo = (acumulados[:, grupo] > (n_grupo - 1) // 2).argmax(axis=-1)
+            alto = (acumulados[:, grupo] > n_grupo // 2).argmax(axis=-1)
+            medianas.append((distintos[bajo] + distintos[alto]) / 2)
+        return np.abs(medianas[0] - medianas[1])
+    medias = (tablas @ distintos) / tamanos
+    return _estadistico_medias(medias, tamanos, estadistico, suma_cuadrados_total)
+
+def _simular_lote_valores(valores, inicios, tamanos, estadistico, suma_cuadrados_total, observado, semilla, numero_lote, tamano):
+    """Número de permutaciones del lote (una por fila de la matriz) cuyo estadístico alcanza el observado."""
+    generador = generador_lote(semilla, numero_lote)
+    matriz = generador.permuted(np.broadcast_to(valores, (tamano, len(valores))), axis=1)
+    simulados = _estadisticos_valores(matriz, inicios, tamanos, estadistico, suma_cuadrados_total)
+    return int((simulados >= observado * (1 - TOLERANCIA)).sum())
+
+def _simular_lote_tabla(conteos_valores, distintos, tamanos, estadistico, suma_cuadrados_total, observado, semilla, numero_lote, tamano):
+    """
+    Como _simular_lote_valores, pero sorteando directamente cuántas veces cae
+    cada valor en cada grupo: repartir al azar los valores entre grupos de
+    tamaños fijos produce tablas de conteos con totales fijos por grupo y por
+    valor, que es la distribución de scipy.stats.random_table.
+    """
+    generador = generador_lote(semilla, numero_lote)
+    tablas = stats.random_table(tamanos, conteos_valores).rvs(tamano, random_state=generador)
+    simulados = _estadisticos_tabla(tablas, distintos, tamanos, estadistico, suma_cuadrados_total)
+    return int((simulados >= observado * (1 - TOLERANCIA)).sum())
+
+def prueba_permutacion(datos_por_grupo, estadistico='medias', alpha=0.05, semilla=SEMILLA,
+                       max_permutaciones=MAX_PERMUTACIONES, tamano_lote=TAMANO_LOTE, trabajadores=TRABAJADORES):
+    """
+    Prueba de permutación de la igualdad de una variable numérica entre grupos.
+
+    Con hasta MAX_VALORES_DISTINTOS valores distintos cada permutación se
+    representa por su tabla de conteos grupo x valor (ver _simular_lote_tabla).
+
+    Parameters
+    ----------
+    datos_por_grupo : list
+        Valores no nulos de cada grupo (arreglos o Series)
+    estadistico : str, optional
+        'medias' o 'medianas' (diferencia absoluta entre dos grupos) o 'f'
+        (F del ANOVA de un factor, para dos o más grupos), por defecto 'medias'
+    alpha : float, optional
+        Nivel de significancia con que se decide la parada temprana
+    semilla : int, optional
+        Semilla de las permutaciones; el mismo valor reproduce el mismo p-valor
+    max_permutaciones : int, optional
+        Número máximo de permutaciones
+    tamano_lote : int, optional
+        Permutaciones por lote; al permutar valores se reduce si el lote
+        superaría MAX_ELEMENTOS_LOTE valores
+    trabajadores : int, optional
+        Procesos que simulan los lotes (ver simulacion.p_valor_simulado); en
+        los procesos de trabajo del plan la simulación es siempre secuencial
+
+    Returns
+    -------
+    dict
+        estadistico, valor_observado y el resultado de la simulación: p_valor,
+        intervalo_p_valor, simulaciones, excedencias y detenido_antes
+    """
+    if estadistico not in ESTADISTICOS:
+        raise ValueError(f"Estadístico de permutación desconocido: {estadistico!r} (opciones: {', '.join(ESTADISTICOS)})")
+    if len(datos_por_grupo) < 2 or any(len(datos) == 0 for datos in datos_por_grupo):
+        raise ValueError("La prueba de permutación requiere al menos dos grupos con datos")
+    if estadistico != 'f' and len(datos_por_grupo) != 2:
+        raise ValueError(f"El estadístico '{estadistico}' compara exactamente dos grupos; use 'f' para {len(datos_por_grupo)}")
+
+    valores = np.concatenate([np.asarray(datos, dtype=np.float64) for datos in datos_por_grupo])
+    tamanos = np.array([len(datos) for datos in datos_por_grupo])
+    suma_cuadrados_total = float(((valores - valores.mean()) ** 2).sum())
+    distintos, codigos = np.unique(valores, return_inverse=True)
+    if len(distintos) <= MAX_VALORES_DISTINTOS:
+        grupos = np.repeat(np.arange(len(tamanos)), tamanos)
+        tabla = np.bincount(grupos * len(distintos) + codigos, minlength=len(tamanos) * len(distintos))
+        tabla = tabla.reshape(len(tamanos), len(distintos))
+        simular_lote = _simular_lote_tabla
+        argumentos = (tabla.sum(axis=0), distintos, tamanos, estadistico, suma_cuadrados_total)
+        observado = float(_estadisticos_tabla(tabla[np.newaxis], *argumentos[1:])[0])
+    else:
+        inicios = np.concatenate(([0], np.cumsum(tamanos)[:-1]))
+        simular_lote = _simular_lote_valores
+        argumentos = (valores, inicios, tamanos, estadistico, suma_cuadrados_total)
+        observado = float(_estadisticos_valores(valores[np.newaxis, :], *argumentos[1:])[0])
+        tamano_lote = max(1, min(tamano_lote, MAX_ELEMENTOS_LOTE // len(valores)))
+
+    simulacion = p_valor_simulado(simular_lote, argumentos + (observado,), alpha, semilla,
+                                  max_permutaciones, tamano_lote, trabajadores)
+    return {"estadistico": estadistico, "valor_observado": observado, **simulacion}
@@ -0,0 +1,580 @@
+# planificador.py
+"""
+Ejecución de un plan declarativo de análisis (plan_analisis.json).
+
+El plan es una lista de nodos con un `id`, un `tipo` (univariado, cat_cat,
+cat_num, inferencia, texto, tabla_pregunta, asociacion), sus `parametros` y,
+opcionalmente, los ids de los que `depende_de`. Los nodos forman un grafo
+dirigido acíclico; cada nodo se envía a un pool de procesos en cuanto sus
+dependencias terminan, de modo que los análisis independientes corren en
+paralelo. Las hojas de Excel y las figuras del PDF que genera cada nodo se
+devuelven al proceso principal y se escriben en el orden del plan (ver
+exporter.iniciar_exportacion_diferida); PNG y JSON los escribe cada proceso.
+Con una caché de artefactos (ver cache_artefactos) los nodos cuyo código,
+parámetros y datos no cambiaron no se vuelven a ejecutar. Con memoria
+compartida (ver memoria_compartida) los procesos leen los arreglos de los
+datos de un único bloque en lugar de recibir cada uno su copia del DataFrame.
+
+Cada nodo puede indicar además su `prioridad` (mayor primero; por defecto 0)
+y un tiempo límite en segundos (`limite_s`). Los nodos listos se lanzan en
+orden de prioridad, y un nodo hereda la prioridad más alta de los que
+dependen de él. Un nodo que supera su límite se interrumpe y queda 'omitido'
+con un error que empieza por "timeout:"; el plan sigue con los demás.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from src.exporter import iniciar_exportacion_diferida, recoger_exportacion_diferida, aplicar_exportacion_diferida
+from src.metricas import medicion, ruta_perfil
+from src.bitacora import conectar_trabajador, registrar
+from src.contexto import ContextoAnalisis
+from src.simulacion import marcar_proceso_de_trabajo
+from src.memoria_compartida import compartir_dataframe, adjuntar_dataframe, liberar_bloque
+from src.cache_artefactos import (digest_columna, digest_modulos, clave_artefacto, rutas_temporales,
+                                  guardar_artefacto, cargar_artefacto, materializar_artefacto)
+
+PLAN_PATH = 'plan_analisis.json'
+
+# Tiempo adicional que se espera a un proceso de trabajo que no se interrumpió
+# al llegar al límite (código en C que no atiende la alarma) antes de darlo por atascado
+MARGEN_CANCELACION_S = 2.0
+
+# Parámetros de cada tipo de nodo que son columnas del DataFrame
+COLUMNAS_POR_TIPO = {
+    'univariado': ['variable'],
+    'cat_cat': ['var1', 'var2'],
+    'cat_num': ['var_cat', 'var_num'],
+    'inferencia': ['var_grupo', 'var_num'],
+    'texto': [],
+    'tabla_pregunta': ['pregunta'],
+    'asociacion': ['variables'],  # lista de columnas
+}
+COLUMNAS_FIJAS_POR_TIPO = {'texto': ['PREGUNTA_5']}
+
+# Módulos que implementan cada tipo de nodo: su código forma parte de la clave de caché
+MODULOS_POR_TIPO = {
+    'univariado': ('src.analysis_univariado', 'src.contexto', 'src.exporter'),
+    'cat_cat': ('src.analysis_bivariado', 'src.almacen_sql', 'src.chi2_montecarlo', 'src.simulacion', 'src.contexto', 'src.exporter'),
+    'cat_num': ('src.analysis_bivariado', 'src.almacen_sql', 'src.bootstrap', 'src.contexto', 'src.normalidad',
+                'src.permutaciones', 'src.simulacion', 'src.exporter'),
+    'inferencia': ('src.inferencia', 'src.bootstrap', 'src.contexto', 'src.normalidad', 'src.exporter'),
+    'texto': ('src.visualizations', 'src.exporter'),
+    'tabla_pregunta': ('src.analysis_univariado', 'src.contexto'),
+    'asociacion': ('src.asociacion', 'src.contexto', 'src.exporter'),
+}
+
+# Cada tarea recibe el contexto compartido de los datos (ver src/contexto.py)
+def _tarea_univariado(contexto, p, rutas, conexion_sql):
+    from src.analysis_univariado import analisis_univariado
+    return analisis_univariado(contexto.df, p['variable'], contexto=contexto, **rutas)
+
+def _tarea_cat_cat(contexto, p, rutas, conexion_sql):
+    from src.analysis_bivariado import bivariado_cat_cat
+    return bivariado_cat_cat(contexto.df, p['var1'], p['var2'], top_n=p.get('top_n', 5), conexion_sql=conexion_sql,
+                             contexto=contexto, **rutas)
+
+def _tarea_cat_num(contexto, p, rutas, conexion_sql):
+    from src.analysis_bivariado import bivariado_cat_num
+    return bivariado_cat_num(contexto.df, p['var_cat'], p['var_num'], top_n=p.get('top_n', 5), conexion_sql=conexion_sql,
+                             contexto=contexto, metodo=p.get('metodo', 'clasico'),
+                             metodo_ic=p.get('metodo_ic'), **rutas)
+
+def _tarea_inferencia(contexto, p, rutas, conexion_sql):
+    from src.inferencia import comparar_grupos
+    return comparar_grupos(contexto.df, p['var_grupo'], p['var_num'], p['grupo1'], p['grupo2'], contexto=contexto,
+                           metodo_ic=p.get('metodo_ic'), **rutas)
+
+def _tarea_texto(contexto, p, rutas, conexion_sql):
+    from src.visualizations import analisis_texto_pregunta5
+    return analisis_texto_pregunta5(contexto.df, **rutas)
+
+def _tarea_tabla_pregunta(contexto, p, rutas, conexion_sql):
+    from src.analysis_univariado import tabla_frecuencias_pregunta
+    return tabla_frecuencias_pregunta(contexto.df, p['pregunta'], rutas['export_json_dir'], contexto=contexto)
+
+def _tarea_asociacion(contexto, p, rutas, conexion_sql):
+    from src.asociacion import analisis_asociacion
+    return analisis_asociacion(contexto.df, p['variables'], contexto=contexto, **rutas)
+
+TAREAS = {
+    'univariado': _tarea_univariado,
+    'cat_cat': _tarea_cat_cat,
+    'cat_num': _tarea_cat_num,
+    'inferencia': _tarea_inferencia,
+    'texto': _tarea_texto,
+    'tabla_pregunta': _tarea_tabla_pregunta,
+    'asociacion': _tarea_asociacion,
+}
+
+def cargar_plan(ruta=PLAN_PATH):
+    """Lee el plan de análisis y verifica tipos, ids y dependencias (ver validar_plan)."""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    return validar_plan(plan)
+
+def validar_plan(plan):
+    """
+    Verifica que los nodos tengan id único y tipo conocido, que sus dependencias
+    existan y que no haya ciclos. Devuelve la lista de nodos.
+    """
+    nodos = plan["analisis"] if isinstance(plan, dict) else plan
+    ids = [nodo["id"] for nodo in nodos]
+    if len(set(ids)) != len(ids):
+        raise ValueError("El plan de análisis tiene ids repetidos")
+    for nodo in nodos:
+        if nodo["tipo"] not in TAREAS:
+            raise ValueError(f"Tipo de análisis desconocido en el nodo {nodo['id']}: {nodo['tipo']}")
+        faltantes = set(nodo.get("depende_de", [])) - set(ids)
+        if faltantes:
+            raise ValueError(f"El nodo {nodo['id']} depende de nodos inexistentes: {', '.join(sorted(faltantes))}")
+        if not isinstance(nodo.get("prioridad", 0), (int, float)):
+            raise ValueError(f"La prioridad del nodo {nodo['id']} debe ser un número")
+        limite = nodo.get("limite_s")
+        if limite is not None and (not isinstance(limite, (int, float)) or limite <= 0):
+            raise ValueError(f"El límite del nodo {nodo['id']} debe ser un número de segundos positivo")
+    orden_topologico(nodos)
+    return nodos
+
+def orden_topologico(nodos):
+    """Ids de los nodos en un orden compatible con sus dependencias (Kahn). Falla si hay ciclos."""
+    pendientes = {nodo["id"]: set(nodo.get("depende_de", [])) for nodo in nodos}
+    orden = []
+    listos = [nodo["id"] for nodo in nodos if not pendientes[nodo["id"]]]
+    while listos:
+        actual = listos.pop(0)
+        orden.append(actual)
+        for id_nodo, dependencias in pendientes.items():
+            if actual in dependencias:
+                dependencias.discard(actual)
+                if not dependencias:
+                    listos.append(id_nodo)
+    if len(orden) != len(nodos):
+        raise ValueError("El plan de análisis tiene dependencias circulares")
+    return orden
+
+def prioridades_efectivas(nodos):
+    """
+    Prioridad con la que se lanza cada nodo: la suya o la más alta de los nodos
+    que dependen de él, para que una dependencia no retrase a un nodo prioritario.
+    """
+    por_id = {nodo["id"]: nodo for nodo in nodos}
+    prioridades = {nodo["id"]: nodo.get("prioridad", 0) for nodo in nodos}
+    for id_nodo in reversed(orden_topologico(nodos)):
+        for dependencia in por_id[id_nodo].get("depende_de", []):
+            prioridades[dependencia] = max(prioridades[dependencia], prioridades[id_nodo])
+    return prioridades
+
+def columnas_nodo(nodo):
+    """Columnas del DataFrame que necesita un nodo."""
+    parametros = nodo.get("parametros", {})
+    columnas = []
+    for clave in COLUMNAS_POR_TIPO[nodo["tipo"]]:
+        valor = parametros[clave]
+        columnas.extend(valor if isinstance(valor, list) else [valor])
+    return columnas + COLUMNAS_FIJAS_POR_TIPO.get(nodo["tipo"], [])
+
+def columnas_plan(nodos):
+    """Todas las columnas que usan los nodos del plan (para la proyección del modo compacto)."""
+    return {col for nodo in nodos for col in columnas_nodo(nodo)}
+
+class TiempoAgotado(BaseException):
+    """
+    El análisis superó su tiempo límite. Deriva de BaseException para que los
+    `except Exception` de los análisis no la atrapen.
+    """
+
+def _agotar_tiempo(signum, frame):
+    raise TiempoAgotado()
+
+def _resultado_tiempo_agotado(id_nodo, limite_s, duracion, motivo="superó su límite"):
+    return {"id": id_nodo, "estado": "omitido", "error": f"timeout: {motivo} de {limite_s:.3g} s",
+            "tiempo_agotado": True, "duracion": duracion}
+
+def _procesos_trabajo(cola_pids, pids):
+    """
+    Procesos de trabajo vivos de los pools del plan: los hijos de este proceso
+    cuyo pid anunció _inicializar_trabajador en `cola_pids` (se acumulan en `pids`).
+    """
+    while True:
+        try:
+            pids.add(cola_pids.get_nowait())
+        except queue.Empty:
+            break
+    return [proceso for proceso in multiprocessing.active_children() if proceso.pid in pids]
+
+def _terminar_pool(pool, procesos):
+    """
+    Cancela lo pendiente del pool y termina sus procesos de trabajo (ver
+    _procesos_trabajo), aunque estén ejecutando un nodo.
+    """
+    if hasattr(pool, 'terminate_workers'):
+        # Python 3.14+
+        pool.terminate_workers()
+    else:
+        pool.shutdown(wait=False, cancel_futures=True)
+        for proceso in procesos:
+            proceso.terminate()
+    for proceso in procesos:
+        proceso.join()
+
+# Estado de cada proceso de trabajo, fijado una vez por el inicializador del pool
+_contexto_trabajador = None
+_conexion_trabajador = None
+_bloque_trabajador = None
+
+def _inicializar_trabajador(contexto, ruta_almacen_sql, cola_log, descripcion_compartida=None, cola_pids=None):
+    global _contexto_trabajador, _conexion_trabajador, _bloque_trabajador
+    if cola_pids is not None:
+        # El proceso principal termina por pid los procesos con nodos atascados
+        cola_pids.put(os.getpid())
+    matplotlib.use('Agg')
+    # Las pruebas por simulación no abren un pool propio dentro de cada proceso del plan
+    marcar_proceso_de_trabajo()
+    conectar_trabajador(cola_log)
+    if descripcion_compartida is not None:
+        # Los datos se leen del bloque compartido, sin copiarlos
+        df, _bloque_trabajador = adjuntar_dataframe(descripcion_compartida)
+        contexto = ContextoAnalisis(df)
+    _contexto_trabajador = contexto
+    if ruta_almacen_sql is not None:
+        from src.almacen_sql import abrir_almacen
+        _conexion_trabajador = abrir_almacen(ruta_almacen_sql)
+
+def _ejecutar_nodo(nodo, rutas, contexto=None, conexion_sql=None, opciones_metricas=None, limite_s=None):
+    """
+    Ejecuta un nodo con la exportación diferida y devuelve su resultado serializable.
+    Con opciones_metricas (ver metricas.opciones_medicion) incluye las métricas del análisis.
+    Con limite_s el análisis se interrumpe con una alarma (SIGALRM, si la plataforma
+    la admite y se ejecuta en el hilo principal) y el resultado conserva lo que
+    exportó hasta entonces.
+    """
+    contexto = _contexto_trabajador if contexto is None else contexto
+    conexion_sql = _conexion_trabajador if conexion_sql is None else conexion_sql
+    inicio = time.perf_counter()
+    metricas = None
+    registrar(f"Iniciando análisis {nodo['id']}", "INFO", nodo=nodo["id"])
+    iniciar_exportacion_diferida()
+    alarma = (limite_s is not None and hasattr(signal, 'setitimer')
+              and threading.current_thread() is threading.main_thread())
+    if alarma:
+        manejador_anterior = signal.signal(signal.SIGALRM, _agotar_tiempo)
+        signal.setitimer(signal.ITIMER_REAL, limite_s)
+    try:
+        if opciones_metricas is None:
+            valor = TAREAS[nodo["tipo"]](contexto, nodo.get("parametros", {}), rutas, conexion_sql)
+        else:
+            with medicion(opciones_metricas["memoria"], ruta_perfil(opciones_metricas, f"analisis_{nodo['id']}")) as metricas:
+                valor = TAREAS[nodo["tipo"]](contexto, nodo.get("parametros", {}), rutas, conexion_sql)
+        resultado = {"estado": "completado", "valor": valor}
+    except TiempoAgotado:
+        resultado = _resultado_tiempo_agotado(nodo["id"], limite_s, None)
+    except Exception as e:
+        resultado = {"estado": "error", "error": str(e), "traceback": traceback.format_exc()}
+    finally:
+        if alarma:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, manejador_anterior)
+        exportacion = recoger_exportacion_diferida()
+        plt.close('all')
+    resultado.update({"id": nodo["id"], "exportacion": exportacion, "metricas": metricas,
+                      "duracion": time.perf_counter() - inicio, "pid": os.getpid()})
+    return resultado
+
+def ejecutar_plan(df, nodos, rutas, max_workers=None, ruta_almacen_sql=None, al_terminar_nodo=None, cache_dir=None,
+                  opciones_metricas=None, cola_log=None, contexto=None, limite_nodo_s=None, presupuesto_s=None,
+                  memoria_compartida=False):
+    """
+    Ejecuta los nodos del plan respetando sus dependencias.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Datos limpios; se envía una vez a cada proceso de trabajo
+    nodos : list
+        Nodos del plan (ver cargar_plan)
+    rutas : dict
+        Rutas de exportación: export_excel_path, export_pdf_path, export_png_dir, export_json_dir
+    max_workers : int, optional
+        Procesos de trabajo; por defecto el número de núcleos. Con 1 los nodos
+        se ejecutan en el proceso actual
+    ruta_almacen_sql : str, optional
+        Almacén SQLite (ver almacen_sql) que cada proceso abre para los bivariados
+    al_terminar_nodo : callable, optional
+        Se llama como al_terminar_nodo(nodo, resultado, completados, total)
+    cache_dir : str, optional
+        Directorio de la caché de artefactos; si es None todos los nodos se ejecutan
+    opciones_metricas : dict, optional
+        Si se indica (ver metricas.opciones_medicion), cada análisis se mide en su
+        proceso y el resultado incluye sus métricas ('metricas')
+    cola_log : multiprocessing.Queue, optional
+        Cola de la bitácora (ver bitacora.cola_bitacora) a la que escriben los procesos de trabajo
+    contexto : ContextoAnalisis, optional
+        Contexto de df compartido por los análisis (ver src/contexto.py); por
+        defecto se crea uno. En la ejecución secuencial se completa con los
+        conteos e índices que calculen los análisis
+    limite_nodo_s : float, optional
+        Tiempo límite de los nodos que no indican el suyo ('limite_s')
+    presupuesto_s : float, optional
+        Tiempo total del plan: al agotarse, los nodos en curso se interrumpen y
+        los que no empezaron se omiten. Con prioridades los nodos prioritarios
+        se ejecutan primero
+    memoria_compartida : bool, optional
+        Con varios procesos, copia una sola vez las columnas de ancho fijo
+        (numéricas, fechas y códigos de las categóricas) a memoria compartida;
+        cada proceso las lee de ahí en lugar de recibir una copia de df y crea
+        su propio contexto
+
+    Returns
+    -------
+    dict
+        Resultado de cada nodo por id: estado ('completado', 'error' u 'omitido'),
+        valor devuelto por el análisis, error y duración. Con caché incluye
+        además si vino de ella ('desde_cache') y los PNG/JSON que se escribieron ('archivos').
+        Los nodos interrumpidos por tiempo quedan omitidos con 'tiempo_agotado'
+    """
+    validar_plan(nodos)
+    contexto = contexto if contexto is not None else ContextoAnalisis(df)
+    por_id = {nodo["id"]: nodo for nodo in nodos}
+    prioridades = prioridades_efectivas(nodos)
+    fin_presupuesto = None if presupuesto_s is None else time.perf_counter() + presupuesto_s
+    resultados = {}
+
+    def registrar(resultado):
+        resultados[resultado["id"]] = resultado
+        if al_terminar_nodo is not None:
+            al_terminar_nodo(por_id[resultado["id"]], resultado, len(resultados), len(nodos))
+
+    # Nodos cuyas columnas no están en los datos: se omiten sin ejecutarse
+    for nodo in nodos:
+        faltantes = [col for col in columnas_nodo(nodo) if col not in df.columns]
+        if faltantes:
+            registrar({"id": nodo["id"], "estado": "omitido",
+                       "error": f"Columnas no disponibles: {', '.join(faltantes)}"})
+
+    def listos():
+        """Nodos sin resultado cuyas dependencias terminaron; omite los que dependen de un nodo fallido."""
+        preparados = []
+        for nodo in nodos:
+            if nodo["id"] in resultados or nodo["id"] in en_curso:
+                continue
+            dependencias = [resultados.get(dep) for dep in nodo.get("depende_de", [])]
+            if any(dep is None for dep in dependencias):
+                continue
+            fallidas = [dep["id"] for dep in dependencias if dep["estado"] != "completado"]
+            if fallidas:
+                registrar({"id": nodo["id"], "estado": "omitido",
+                           "error": f"Dependencias no completadas: {', '.join(fallidas)}"})
+                return listos()
+            preparados.append(nodo)
+        return preparados
+
+    def siguientes():
+        """Nodos listos en orden de prioridad; con el presupuesto agotado se omiten sin ejecutarse."""
+        preparados = sorted(listos(), key=lambda nodo: -prioridades[nodo["id"]])
+        if preparados and fin_presupuesto is not None and time.perf_counter() >= fin_presupuesto:
+            for nodo in preparados:
+                registrar(_resultado_tiempo_agotado(nodo["id"], presupuesto_s, 0.0, "se agotó el presupuesto del plan"))
+            return siguientes()
+        return preparados
+
+    def limite(nodo):
+        """Segundos que puede durar el nodo: su límite, recortado a lo que queda del presupuesto."""
+        limites = [nodo.get("limite_s", limite_nodo_s)]
+        if fin_presupuesto is not None:
+            limites.append(max(fin_presupuesto - time.perf_counter(), 0.001))
+        limites = [valor for valor in limites if valor is not None]
+        return min(limites) if limites else None
+
+    digests_columnas = {}
+    temporales = {}
+
+    def preparar(nodo):
+        """
+        Rutas con las que ejecutar el nodo, o None si su resultado se tomó de la caché.
+        Con caché, el nodo escribe sus PNG/JSON en un directorio temporal propio.
+        """
+        if cache_dir is None:
+            return rutas
+        for col in columnas_nodo(nodo):
+            if col not in digests_columnas:
+                digests_columnas[col] = digest_columna(df[col])
+        clave = clave_artefacto(nodo["tipo"], nodo.get("parametros", {}),
+                                {col: digests_columnas[col] for col in columnas_nodo(nodo)},
+                                digest_modulos(MODULOS_POR_TIPO[nodo["tipo"]]),
+                                {clave_ruta: ruta is not None for clave_ruta, ruta in rutas.items()})
+        en_cache = cargar_artefacto(cache_dir, clave)
+        if en_cache is not None:
+            resultado, entrada = en_cache
+            exportacion = resultado.get("exportacion")
+            if exportacion:
+                exportacion["excel"] = [(rutas["export_excel_path"], hoja, tabla) for _, hoja, tabla in exportacion["excel"]]
+            resultado.update({"desde_cache": True, "archivos": materializar_artefacto(entrada, rutas)})
+            registrar(resultado)
+            return None
+        directorio, rutas_nodo = rutas_temporales(cache_dir, rutas)
+        temporales[nodo["id"]] = (clave, directorio)
+        return rutas_nodo
+
+    def finalizar(resultado):
+        """Guarda en la caché el resultado de un nodo ejecutado y copia sus archivos a las carpetas de salida."""
+        if resultado["id"] in temporales:
+            clave, directorio = temporales.pop(resultado["id"])
+            entrada = None
+            if resultado["estado"] == "completado":
+                entrada = guardar_artefacto(cache_dir, clave, directorio, resultado)
+            resultado["archivos"] = materializar_artefacto(entrada or directorio, rutas)
+            if entrada is None:
+                shutil.rmtree(directorio, ignore_errors=True)
+            resultado["desde_cache"] = False
+        registrar(resultado)
+
+    en_curso = {}
+    if max_workers == 1:
+        conexion_sql = None
+        if ruta_almacen_sql is not None:
+            from src.almacen_sql import abrir_almacen
+            conexion_sql = abrir_almacen(ruta_almacen_sql)
+        try:
+            while True:
+                preparados = siguientes()
+                if not preparados:
+                    break
+                # De uno en uno: un nodo puede dejar listo a otro de mayor prioridad
+                nodo = preparados[0]
+                rutas_nodo = preparar(nodo)
+                if rutas_nodo is not None:
+                    limite_s = limite(nodo)
+                    resultado = _ejecutar_nodo(nodo, rutas_nodo, contexto=contexto, conexion_sql=conexion_sql,
+                                               opciones_metricas=opciones_metricas, limite_s=limite_s)
+                    finalizar(resultado)
+        finally:
+            if conexion_sql is not None:
+                conexion_sql.close()
+    else:
+        n_trabajadores = max_workers or os.cpu_count()
+        # Plazo tras el cual un nodo en curso que no atendió la alarma se da por atascado
+        plazos = {}
+        # Con memoria compartida cada proceso recibe solo la descripción del bloque
+        bloque, descripcion_compartida = compartir_dataframe(df) if memoria_compartida else (None, None)
+        # Cada proceso de trabajo anuncia su pid al iniciarse
+        cola_pids, pids = multiprocessing.Queue(), set()
+
+        def nuevo_pool():
+            return ProcessPoolExecutor(max_workers=n_trabajadores, initializer=_inicializar_trabajador,
+                                       initargs=(None if memoria_compartida else contexto, ruta_almacen_sql,
+                                                 cola_log, descripcion_compartida, cola_pids))
+
+        def lanzar():
+            # Solo tantos nodos como procesos: así el siguiente en lanzarse es el
+            # de mayor prioridad en ese momento y su límite cuenta desde que empieza
+            while len(en_curso) < n_trabajadores:
+                preparados = siguientes()
+                if not preparados:
+                    break
+                nodo = preparados[0]
+                rutas_nodo = preparar(nodo)
+                if rutas_nodo is not None:
+                    limite_s = limite(nodo)
+                    argumentos = (_ejecutar_nodo, nodo, rutas_nodo)
+                    opciones = {"opciones_metricas": opciones_metricas, "limite_s": limite_s}
+                    try:
+                        futuro = pool.submit(*argumentos, **opciones)
+                    except BrokenProcessPool:
+                        reemplazar_pool()
+                        futuro = pool.submit(*argumentos, **opciones)
+                    en_curso[nodo["id"]] = futuro
+                    inicio = time.perf_counter()
+                    plazos[nodo["id"]] = (None if limite_s is None
+                                          else (inicio + limite_s + MARGEN_CANCELACION_S, limite_s, inicio))
+
+        def recoger(id_nodo, futuro):
+            """Registra el resultado de un nodo terminado; devuelve True si su proceso murió y dejó el pool roto."""
+            if id_nodo in atascados:
+                # Ya venció su plazo: cuenta como tiempo agotado aunque haya llegado a terminar
+                finalizar(atascados.pop(id_nodo))
+                return False
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                # El proceso de trabajo terminó sin devolver resultado
+                resultado = {"id": id_nodo, "estado": "error", "error": str(e) or type(e).__name__}
+                finalizar(resultado)
+                return isinstance(e, BrokenProcessPool)
+            finalizar(resultado)
+            return False
+
+        def reemplazar_pool():
+            """
+            Recoge los nodos del pool roto, que fallan todos con BrokenProcessPool
+            (o terminaron antes), y sigue el plan con un pool nuevo.
+            """
+            nonlocal pool
+            wait(en_curso.values())
+            for id_nodo, futuro in list(en_curso.items()):
+                del en_curso[id_nodo]
+                recoger(id_nodo, futuro)
+            pool.shutdown()
+            pool = nuevo_pool()
+
+        pool = nuevo_pool()
+        # Nodos que pasaron su plazo sin atender la alarma: su resultado de tiempo
+        # agotado se registra cuando su proceso queda libre o se termina
+        atascados = {}
+        try:
+            lanzar()
+            while en_curso:
+                vigentes = [plazos[i][0] for i in en_curso if plazos[i] is not None and i not in atascados]
+                espera = max(min(vigentes) - time.perf_counter(), 0) if vigentes else None
+                terminados, _ = wait(en_curso.values(), timeout=espera, return_when=FIRST_COMPLETED)
+                roto = False
+                for futuro in terminados:
+                    id_nodo = next(i for i, f in en_curso.items() if f is futuro)
+                    del en_curso[id_nodo]
+                    roto = recoger(id_nodo, futuro) or roto
+                if roto:
+                    # Un proceso murió (p. ej. por falta de memoria): fallan solo los
+                    # nodos que estaban en curso y el resto del plan sigue
+                    reemplazar_pool()
+                # Los nodos se interrumpen con la alarma de _ejecutar_nodo; el que pasa
+                # su plazo la ignoró y deja de contar, sin afectar a los demás
+                ahora = time.perf_counter()
+                for id_nodo in en_curso:
+                    if id_nodo not in atascados and plazos[id_nodo] is not None and plazos[id_nodo][0] <= ahora:
+                        _, limite_s, inicio = plazos[id_nodo]
+                        atascados[id_nodo] = _resultado_tiempo_agotado(id_nodo, limite_s, ahora - inicio)
+                if atascados and len(atascados) == len(en_curso):
+                    # Último recurso: un proceso no se puede terminar por separado, así
+                    # que se termina el pool cuando solo quedan en él nodos atascados
+                    _terminar_pool(pool, _procesos_trabajo(cola_pids, pids))
+                    for id_nodo in list(en_curso):
+                        del en_curso[id_nodo]
+                        finalizar(atascados.pop(id_nodo))
+                    pool = nuevo_pool()
+                if not atascados:
+                    # Con nodos atascados no se lanzan otros, para poder terminar el pool sin perderlos
+                    lanzar()
+        finally:
+            pool.shutdown()
+            cola_pids.close()
+            if bloque is not None:
+                liberar_bloque(bloque)
+
+    # Hojas de Excel y figuras del PDF en el orden del plan
+    for nodo in nodos:
+        exportacion = resultados[nodo["id"]].pop("exportacion", None)
+        if exportacion:
+            aplicar_exportacion_diferida(exportacion)
+    return resultados
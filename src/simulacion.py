@@ -0,0 +1,119 @@
+# simulacion.py
+"""
+P-valores por simulación con parada secuencial, compartidos por el
+Chi-cuadrado Monte Carlo (src/chi2_montecarlo.py) y las pruebas de
+permutación (src/permutaciones.py).
+
+Las simulaciones se hacen por lotes. Cada lote tiene su propia semilla,
+derivada de la semilla de la prueba y del número de lote
+(numpy.random.SeedSequence), y los lotes se acumulan en orden: el p-valor y el
+punto de parada no dependen de cuántos procesos simulen los lotes. La
+simulación se detiene en cuanto el intervalo de confianza del p-valor queda
+por completo por encima o por debajo de alpha.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+CONFIANZA_PARADA = 0.999  # intervalo de Clopper-Pearson con que se decide parar
+TRABAJADORES = None  # procesos para simular los lotes; None: os.cpu_count()
+
+# Lo fija el inicializador de los procesos de trabajo del plan (ver
+# marcar_proceso_de_trabajo): el plan ya ocupa un proceso por núcleo
+_proceso_de_trabajo = False
+
+def marcar_proceso_de_trabajo():
+    """Indica que este proceso es un trabajador del plan: las simulaciones no abren procesos propios."""
+    global _proceso_de_trabajo
+    _proceso_de_trabajo = True
+
+def generador_lote(semilla, numero_lote):
+    """Generador aleatorio independiente de cada lote de una prueba."""
+    return np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(numero_lote,)))
+
+def intervalo_p(excedencias, simulaciones, confianza=CONFIANZA_PARADA):
+    """Intervalo de Clopper-Pearson de la proporción de simulaciones que alcanzan el estadístico observado."""
+    cola = (1 - confianza) / 2
+    inferior = stats.beta.ppf(cola, excedencias, simulaciones - excedencias + 1) if excedencias > 0 else 0.0
+    superior = stats.beta.ppf(1 - cola, excedencias + 1, simulaciones - excedencias) if excedencias < simulaciones else 1.0
+    return float(inferior), float(superior)
+
+def p_valor_simulado(simular_lote, argumentos, alpha, semilla, max_simulaciones, tamano_lote, trabajadores=TRABAJADORES):
+    """
+    P-valor de una prueba por simulación, con parada temprana.
+
+    Parameters
+    ----------
+    simular_lote : callable
+        Función de nivel de módulo `simular_lote(*argumentos, semilla,
+        numero_lote, tamano)` que simula `tamano` veces el estadístico y
+        devuelve cuántas veces alcanza el observado
+    argumentos : tuple
+        Datos de la prueba (se envían a los procesos de trabajo)
+    alpha : float
+        Nivel de significancia; la simulación se detiene cuando el intervalo
+        de confianza del p-valor (CONFIANZA_PARADA) no contiene alpha
+    semilla : int
+        Semilla de la prueba; el mismo valor reproduce el mismo p-valor
+    max_simulaciones : int
+        Número máximo de simulaciones
+    tamano_lote : int
+        Simulaciones por lote
+    trabajadores : int, optional
+        Procesos que simulan los lotes (por defecto os.cpu_count()). El primer
+        lote se simula en el proceso actual y solo se reparten los siguientes si
+        con él no basta para decidir. Dentro de un proceso de trabajo del plan
+        (ver marcar_proceso_de_trabajo) la simulación es secuencial
+
+    Returns
+    -------
+    dict
+        p_valor ((excedencias + 1) / (simulaciones + 1)), intervalo_p_valor,
+        simulaciones, excedencias y si la simulación se detuvo antes de
+        max_simulaciones
+    """
+    lotes = -(-max_simulaciones // tamano_lote)
+    tamanos = [min(tamano_lote, max_simulaciones - i * tamano_lote) for i in range(lotes)]
+    simulaciones = excedencias = 0
+
+    def acumular(numero_lote, conteo):
+        """Suma un lote y devuelve True si el intervalo del p-valor ya no contiene alpha."""
+        nonlocal simulaciones, excedencias
+        simulaciones += tamanos[numero_lote]
+        excedencias += conteo
+        inferior, superior = intervalo_p(excedencias, simulaciones)
+        return superior < alpha or inferior > alpha
+
+    decidido = acumular(0, simular_lote(*argumentos, semilla, 0, tamanos[0]))
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if not decidido and lotes > 1:
+        if trabajadores > 1 and not _proceso_de_trabajo:
+            with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+                # Como mucho dos lotes por proceso en curso; se acumulan en orden de lote
+                pendientes = {}
+                siguiente = 1
+                for numero_lote in range(1, lotes):
+                    while siguiente < lotes and len(pendientes) < 2 * trabajadores:
+                        pendientes[siguiente] = ejecutor.submit(simular_lote, *argumentos, semilla, siguiente, tamanos[siguiente])
+                        siguiente += 1
+                    if acumular(numero_lote, pendientes.pop(numero_lote).result()):
+                        decidido = True
+                        break
+                for futuro in pendientes.values():
+                    futuro.cancel()
+        else:
+            for numero_lote in range(1, lotes):
+                if acumular(numero_lote, simular_lote(*argumentos, semilla, numero_lote, tamanos[numero_lote])):
+                    decidido = True
+                    break
+
+    return {
+        "p_valor": (excedencias + 1) / (simulaciones + 1),
+        "intervalo_p_valor": intervalo_p(excedencias, simulaciones),
+        "simulaciones": simulaciones,
+        "excedencias": excedencias,
+        "detenido_antes": decidido and simulaciones < max_simulaciones,
+    }
@@ -0,0 +1,116 @@
+# validacion.py
+"""
+Validación de los datos limpios de la encuesta antes de los análisis.
+
+Cada regla es una máscara booleana sobre columnas completas; todas se evalúan
+en una sola pasada vectorizada y las filas que incumplen alguna se separan a
+un archivo de cuarentena con el motivo del rechazo, en lugar de llegar a las
+pruebas estadísticas.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from src.data_cleaner import COLUMNAS_PREGUNTAS
+
+ESCALA_LIKERT = (1, 5)
+RANGO_ESTRATO = (1, 7)
+SEGMENTOS_VALIDOS = ['Personas', 'Empresas']
+GENEROS_VALIDOS = ['F', 'M', 'No aplica']
+RUTA_CUARENTENA = 'data/cuarentena_validacion.csv'
+COLUMNA_MOTIVO = 'MOTIVO_RECHAZO'
+
+def _fuera_de_escala(serie, minimo, maximo):
+    """Valores no nulos fuera de [minimo, maximo] o no enteros."""
+    valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+    validos = ~np.isnan(valores)
+    return validos & ((valores < minimo) | (valores > maximo) | (valores != np.round(valores)))
+
+def _reglas(df, fecha_referencia):
+    """Genera (nombre de la regla, máscara de filas que la incumplen) para las columnas presentes."""
+    for pregunta in COLUMNAS_PREGUNTAS:
+        if pregunta in df.columns:
+            yield f"{pregunta} fuera de la escala {ESCALA_LIKERT[0]}-{ESCALA_LIKERT[1]}", \
+                _fuera_de_escala(df[pregunta], *ESCALA_LIKERT)
+    if 'FECHA_ENCUESTA' in df.columns:
+        fechas = df['FECHA_ENCUESTA']
+        yield "FECHA_ENCUESTA futura", (fechas > fecha_referencia).to_numpy(dtype=bool, na_value=False)
+    if 'SEGMENTO' in df.columns:
+        yield "SEGMENTO desconocido", ~df['SEGMENTO'].isin(SEGMENTOS_VALIDOS).to_numpy(dtype=bool)
+    if 'GENERO' in df.columns:
+        yield "GENERO desconocido", ~df['GENERO'].isin(GENEROS_VALIDOS).to_numpy(dtype=bool)
+    if 'ESTRATO' in df.columns:
+        yield f"ESTRATO fuera del rango {RANGO_ESTRATO[0]}-{RANGO_ESTRATO[1]}", \
+            _fuera_de_escala(df['ESTRATO'], *RANGO_ESTRATO)
+
+def validar_datos(df, ruta_cuarentena=RUTA_CUARENTENA, fecha_referencia=None, anexar=False):
+    """
+    Aplica las reglas de validación a un DataFrame limpio (ver clean_data).
+
+    Las filas rechazadas se escriben en `ruta_cuarentena` (CSV con el mismo
+    formato de los datos de entrada y una columna MOTIVO_RECHAZO); si la ruta
+    es None no se escribe nada. Con anexar=True se añaden al final del
+    archivo, si ya existe, en lugar de reemplazarlo (validación por bloques o
+    por entregas).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Datos limpios
+    ruta_cuarentena : str, optional
+        Archivo donde guardar las filas rechazadas
+    fecha_referencia : datetime-like, optional
+        Momento a partir del cual una encuesta se considera futura; por defecto el actual
+    anexar : bool, optional
+        Añadir las filas rechazadas a un archivo de cuarentena existente, en
+        el orden de sus columnas
+
+    Returns
+    -------
+    tuple
+        (DataFrame con las filas válidas, dict con el reporte de validación)
+    """
+    fecha_referencia = pd.Timestamp.now() if fecha_referencia is None else pd.Timestamp(fecha_referencia)
+
+    nombres, mascaras = [], []
+    for nombre, mascara in _reglas(df, fecha_referencia):
+        nombres.append(nombre)
+        mascaras.append(mascara)
+    incumplidas = np.column_stack(mascaras) if mascaras else np.zeros((len(df), 0), dtype=bool)
+    rechazadas = incumplidas.any(axis=1)
+    n_rechazadas = int(rechazadas.sum())
+
+    reporte = {
+        "filas": int(len(df)),
+        "filas_validas": int(len(df) - n_rechazadas),
+        "filas_rechazadas": n_rechazadas,
+        "por_regla": dict(zip(nombres, (int(n) for n in incumplidas.sum(axis=0)))),
+        "ruta_cuarentena": ruta_cuarentena,
+    }
+
+    if ruta_cuarentena is not None:
+        cuarentena = df[rechazadas].copy()
+        # Cada combinación de reglas incumplidas se codifica en los bits de un
+        # entero; el texto del motivo se arma una vez por combinación distinta
+        codigos = incumplidas[rechazadas].astype(np.int64) @ (np.int64(1) << np.arange(len(nombres), dtype=np.int64))
+        unicos, posiciones = np.unique(codigos, return_inverse=True)
+        motivos = np.array(['; '.join(n for i, n in enumerate(nombres) if codigo >> i & 1) for codigo in unicos],
+                           dtype=object)
+        cuarentena[COLUMNA_MOTIVO] = motivos[posiciones] if len(unicos) else []
+        os.makedirs(os.path.dirname(ruta_cuarentena) or '.', exist_ok=True)
+        anexar = anexar and os.path.exists(ruta_cuarentena)
+        if anexar:
+            cuarentena = cuarentena.reindex(
+                columns=pd.read_csv(ruta_cuarentena, sep=';', encoding='utf-8-sig', nrows=0).columns)
+        cuarentena.to_csv(ruta_cuarentena, sep=';', index=False, encoding='utf-8-sig',
+                          mode='a' if anexar else 'w', header=not anexar)
+
+    if n_rechazadas == 0:
+        return df, reporte
+    return df[~rechazadas], reporte
+
+def resumen_reporte_validacion(reporte):
+    """Resume en una línea las filas rechazadas por validar_datos."""
+    partes = [f"{reporte['filas_rechazadas']} de {reporte['filas']} filas rechazadas"]
+    partes += [f"{nombre}: {n}" for nombre, n in reporte["por_regla"].items() if n]
+    return ", ".join(partes)
@@ -1,21 +1,33 @@
 # visualizations.py
 # (Opcional: aquí puedes poner funciones de visualización extra, wordcloud, etc.)
 
-from wordcloud import WordCloud, STOPWORDS
 import re
 import pandas as pd
 import matplotlib.pyplot as plt
 from collections import Counter
+from functools import lru_cache
 from src.exporter import export_table_to_excel, add_figure_for_pdf, save_plot_to_png
 import os
-# --- Análisis de temas/frases en comentarios usando IA (KeyBERT) ---
-from keybert import KeyBERT
-from sentence_transformers import SentenceTransformer
+
+MODELO_EMBEDDINGS = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+@lru_cache(maxsize=1)
+def modelo_temas(nombre=MODELO_EMBEDDINGS):
+    """
+    Modelo KeyBERT sobre un modelo de embeddings multilingüe, cargado una sola
+    vez por proceso (el demonio de análisis lo precarga, ver demonio_analisis.py).
+    """
+    # KeyBERT y sentence_transformers cargan torch: se importan solo aquí
+    from keybert import KeyBERT
+    from sentence_transformers import SentenceTransformer
+    return KeyBERT(SentenceTransformer(nombre))
 
 def analisis_texto_pregunta5(df, export_excel_path=None, export_pdf_path=None, export_png_dir=None, export_json_dir=None):
     print("\n" + "="*60)
     print("ANÁLISIS DE TEXTO LIBRE: PREGUNTA_5 (Comentarios)")
     print("="*60)
+    # wordcloud se importa al usarla para no cargarla en los análisis que no la necesitan
+    from wordcloud import WordCloud, STOPWORDS
     comentarios = df['PREGUNTA_5'].dropna().astype(str)
     all_text = " ".join(comentarios)
     # Limpieza básica
@@ -60,8 +72,7 @@ def analisis_temas_comentarios(df, export_json_dir=None, n_topics=5, n_examples=
         print("No hay comentarios para analizar.")
         return
     # Usar modelo multilingüe para embeddings
-    model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-    kw_model = KeyBERT(model)
+    kw_model = modelo_temas()
     # Extraer temas (frases clave) de todos los comentarios
     temas = kw_model.extract_keywords(comentarios, keyphrase_ngram_range=(2, 4), stop_words='spanish', top_n=n_topics, use_maxsum=True, nr_candidates=20)
     # Agrupar comentarios por tema más relevante
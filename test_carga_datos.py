@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# test_carga_datos.py - Pruebas de la carga y limpieza de datos de la encuesta
+
+import os
+import json
+import tempfile
+import pandas as pd
+import numpy as np
+from src.data_loader import load_data
+from src.data_cleaner import clean_data, clean_chunks, compactar_dataframe, resumen_reporte_limpieza
+from src.data_cache import load_clean_data, ruta_cache, digest_datos
+from src.acumuladores import ingerir_incremental, abrir_claves, ruta_claves, claves_registradas
+from src.validacion import validar_datos, resumen_reporte_validacion, COLUMNA_MOTIVO
+from src.deduplicacion import deduplicar, resumen_reporte_deduplicacion
+from src.cache_artefactos import digest_dataframe
+from src.almacen_sql import preparar_almacen, top_categorias_sql, tabla_contingencia_sql, agregados_grupo_sql
+
+DATA_PATH = 'data/Base encuesta de satisfacción.csv'
+EXPORTACION_PATH = 'Base encuesta de satisfacción.csv'
+EXCEL_PATH = 'Base encuesta de satisfacción.xlsx'
+
+def test_carga_por_bloques():
+    """
+    Prueba que la lectura por bloques produce los mismos datos que la carga completa
+    """
+    print("\n===== PRUEBA DE CARGA POR BLOQUES =====")
+    df_completo = clean_data(load_data(DATA_PATH))
+    bloques = list(clean_chunks(load_data(DATA_PATH, chunksize=250)))
+
+    print(f"Bloques leídos: {len(bloques)} ({[len(b) for b in bloques]})")
+    assert sum(len(b) for b in bloques) == len(df_completo)
+
+    # Todos los bloques comparten el mismo esquema
+    assert all(list(b.dtypes) == list(bloques[0].dtypes) for b in bloques)
+    assert str(bloques[0]['ESTRATO'].dtype) == 'Int8'
+
+    df_bloques = pd.concat(bloques, ignore_index=True)
+    for col in ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']:
+        np.testing.assert_allclose(df_bloques[col].to_numpy(), df_completo[col].to_numpy())
+    assert (df_bloques['FECHA_ENCUESTA'] == df_completo['FECHA_ENCUESTA']).all()
+
+def test_cache_datos_limpios():
+    """
+    Prueba que la segunda carga se sirve desde la caché columnar con los mismos datos
+    """
+    print("\n===== PRUEBA DE CACHÉ DE DATOS LIMPIOS =====")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        df_frio, info_frio = load_clean_data(DATA_PATH, cache_dir=cache_dir)
+        df_caliente, info_caliente = load_clean_data(DATA_PATH, cache_dir=cache_dir)
+
+        print(f"Archivo de caché: {ruta_cache(DATA_PATH, cache_dir)}")
+        assert not info_frio["desde_cache"]
+        assert info_caliente["desde_cache"]
+        assert info_caliente["reporte_limpieza"] == info_frio["reporte_limpieza"]
+        assert os.path.exists(ruta_cache(DATA_PATH, cache_dir))
+        pd.testing.assert_frame_equal(df_frio.reset_index(drop=True), df_caliente)
+
+def test_reporte_limpieza():
+    """
+    Prueba que clean_data reporta los valores que no pudo convertir
+    """
+    print("\n===== PRUEBA DE REPORTE DE LIMPIEZA =====")
+    df = load_data(DATA_PATH).head(10).copy()
+    df.loc[0, 'PREGUNTA_2'] = 'sin respuesta'
+    df.loc[1, 'PREGUNTA_1'] = np.nan
+    df.loc[2, 'FECHA_ENCUESTA'] = '31/02/2025'
+
+    df_limpio, reporte = clean_data(df, devolver_reporte=True)
+    print(resumen_reporte_limpieza(reporte))
+
+    assert df_limpio is df  # La limpieza modifica el mismo DataFrame
+    assert reporte["preguntas"]["PREGUNTA_2"]["n_fallidos"] == 1
+    assert reporte["preguntas"]["PREGUNTA_1"]["n_fallidos"] == 0
+    assert reporte["preguntas"]["PREGUNTA_1"]["n_nulos_origen"] == 1
+    assert reporte["fechas"]["n_fallidos"] == 1
+    assert pd.isna(df_limpio.loc[0, 'PREGUNTA_2']) and pd.isna(df_limpio.loc[2, 'FECHA_ENCUESTA'])
+
+def test_modo_compacto():
+    """
+    Prueba la proyección de columnas y la representación compacta en memoria
+    """
+    print("\n===== PRUEBA DE MODO COMPACTO =====")
+    columnas = ['SEGMENTO', 'CIUDAD_AGENCIA', 'AGENCIA_EJECUTIVO', 'FECHA_ENCUESTA',
+                'PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4', 'COLUMNA_INEXISTENTE']
+    df_completo = clean_data(load_data(DATA_PATH))
+    df_compacto = compactar_dataframe(clean_data(load_data(DATA_PATH, columnas=columnas, compacto=True)))
+
+    memoria_completo = df_completo.memory_usage(deep=True).sum()
+    memoria_compacto = df_compacto.memory_usage(deep=True).sum()
+    print(f"Memoria completa: {memoria_completo} bytes, compacta: {memoria_compacto} bytes")
+
+    assert 'NOMBRE' not in df_compacto.columns and 'EMAIL' not in df_compacto.columns
+    assert isinstance(df_compacto['SEGMENTO'].dtype, pd.CategoricalDtype)
+    assert df_compacto['PREGUNTA_1'].dtype == 'float32'
+    assert memoria_compacto < memoria_completo / 3
+    np.testing.assert_allclose(df_compacto['PREGUNTA_1'].to_numpy(), df_completo['PREGUNTA_1'].to_numpy())
+
+def test_ingesta_incremental():
+    """
+    Prueba que ingerir el histórico en lotes da el mismo resumen que calcularlo completo
+    """
+    print("\n===== PRUEBA DE INGESTA INCREMENTAL =====")
+    crudo = load_data(DATA_PATH)
+    df_completo = clean_data(crudo.copy())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_acumuladores = os.path.join(tmp, 'acumuladores.json')
+        ruta_resumen = os.path.join(tmp, 'encuesta_satisfaccion.json')
+        ruta_cuarentena = os.path.join(tmp, 'cuarentena.csv')
+        for i, lote in enumerate(np.array_split(np.arange(len(crudo)), 4)):
+            ruta_lote = os.path.join(tmp, f'lote_{i}.csv')
+            crudo.iloc[lote].to_csv(ruta_lote, sep=';', index=False, encoding='utf-8-sig')
+            resultado = ingerir_incremental(ruta_lote, ruta_acumuladores, ruta_resumen, ruta_cuarentena=ruta_cuarentena)
+            print(f"Lote {i}: {resultado['filas_nuevas']} filas, total {resultado['total_encuestas']}")
+
+        # Reingerir un lote ya procesado no debe duplicar sus filas
+        assert ingerir_incremental(ruta_lote, ruta_acumuladores, ruta_resumen, ruta_cuarentena=ruta_cuarentena)["omitido"]
+
+        with open(ruta_resumen, 'r', encoding='utf-8') as f:
+            resumen = json.load(f)
+
+    assert resumen["informacion_general"]["total_encuestas"] == len(df_completo)
+    for pregunta, estadisticas in resumen["estadisticas_preguntas"].items():
+        serie = df_completo[pregunta]
+        assert np.isclose(estadisticas["media"], serie.mean())
+        assert np.isclose(estadisticas["desviacion"], serie.std())
+        assert estadisticas["mediana"] == serie.median()
+        assert estadisticas["min"] == serie.min() and estadisticas["max"] == serie.max()
+        assert estadisticas["n_validos"] == serie.count()
+
+def test_ingesta_validacion_deduplicacion():
+    """
+    Prueba que la ingesta incremental manda a cuarentena las filas inválidas y
+    no vuelve a contar a encuestados ya ingeridos
+    """
+    print("\n===== PRUEBA DE VALIDACIÓN Y DEDUPLICACIÓN EN LA INGESTA =====")
+    crudo = load_data(DATA_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = {nombre: os.path.join(tmp, nombre) for nombre in
+                 ('historico.csv', 'entrega.csv', 'acumuladores.json', 'resumen.json', 'cuarentena.csv')}
+        crudo.iloc[:-3].to_csv(rutas['historico.csv'], sep=';', index=False, encoding='utf-8-sig')
+        historico = ingerir_incremental(rutas['historico.csv'], rutas['acumuladores.json'], rutas['resumen.json'],
+                                        ruta_cuarentena=rutas['cuarentena.csv'])
+
+        # Entrega nueva: tres encuestados nuevos (uno con una calificación fuera
+        # de escala y otro repetido dentro de la entrega) y uno ya ingerido, con
+        # la cédula escrita con puntos
+        entrega = crudo.iloc[[-3, -2, -1, -1, 0]].astype({'CEDULA': str})
+        entrega.iloc[0, entrega.columns.get_loc('PREGUNTA_1')] = '7'
+        entrega.iloc[4, entrega.columns.get_loc('CEDULA')] = f"{int(crudo['CEDULA'].iloc[0]):,}".replace(',', '.')
+        entrega.to_csv(rutas['entrega.csv'], sep=';', index=False, encoding='utf-8-sig')
+        resultado = ingerir_incremental(rutas['entrega.csv'], rutas['acumuladores.json'], rutas['resumen.json'],
+                                        chunksize=2, ruta_cuarentena=rutas['cuarentena.csv'])
+        print(f"Entrega: {resultado}")
+        cuarentena = pd.read_csv(rutas['cuarentena.csv'], sep=';', encoding='utf-8-sig')
+
+        # Las claves quedan en la base indexada, no en el JSON de acumuladores;
+        # de un lote solo se devuelven sus claves ya registradas
+        with open(rutas['acumuladores.json'], encoding='utf-8') as f:
+            assert "claves_encuestados" not in json.load(f)
+        conexion = abrir_claves(ruta_claves(rutas['acumuladores.json']))
+        lote = crudo.iloc[[0, 1]].copy()
+        lote['EMAIL'] = ['nuevo@correo.com', lote['EMAIL'].iloc[1]]
+        registradas = claves_registradas(conexion, lote)
+        conexion.close()
+        assert len(registradas['CEDULA']) == 2 and len(registradas['EMAIL']) == 1
+
+    assert historico["filas_rechazadas"] == 0 and historico["duplicados_eliminados"] == 0
+    assert resultado["filas_rechazadas"] == 1 and resultado["duplicados_eliminados"] == 2
+    assert resultado["filas_nuevas"] == 2 and resultado["total_encuestas"] == len(crudo) - 1
+    assert len(cuarentena) == 1 and 'PREGUNTA_1' in cuarentena[COLUMNA_MOTIVO].iloc[0]
+
+def test_carga_excel():
+    """
+    Prueba que el libro .xlsx se lee por bloques con el mismo esquema y datos que el CSV
+    """
+    print("\n===== PRUEBA DE CARGA DESDE EXCEL =====")
+    df_csv = clean_data(load_data(DATA_PATH))
+    bloques = list(clean_chunks(load_data(EXCEL_PATH, chunksize=400)))
+    print(f"Bloques leídos del libro: {[len(b) for b in bloques]}")
+    assert len(bloques) == 3
+
+    df_excel = clean_data(load_data(EXCEL_PATH))
+    assert len(df_excel) == len(df_csv)
+    assert set(df_excel.columns) == set(df_csv.columns)
+    for col in ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']:
+        np.testing.assert_allclose(df_excel[col].to_numpy(), df_csv[col].to_numpy())
+    assert (df_excel['FECHA_ENCUESTA'] == df_csv['FECHA_ENCUESTA']).all()
+    for col in ['SEGMENTO', 'CIUDAD_AGENCIA', 'GENERO', 'ESTRATO']:
+        assert (df_excel[col] == df_csv[col]).all(), col
+
+    # Proyección y modo compacto también aplican al libro
+    df_compacto = load_data(EXCEL_PATH, columnas=['SEGMENTO', 'PREGUNTA_1'], compacto=True)
+    assert list(df_compacto.columns) == ['SEGMENTO', 'PREGUNTA_1']
+    assert isinstance(df_compacto['SEGMENTO'].dtype, pd.CategoricalDtype)
+
+def test_validacion_cuarentena():
+    """
+    Prueba que las filas inválidas se separan a cuarentena con su motivo
+    """
+    print("\n===== PRUEBA DE VALIDACIÓN Y CUARENTENA =====")
+    df = clean_data(load_data(DATA_PATH))
+    df.loc[0, 'PREGUNTA_1'] = 7
+    df.loc[1, 'PREGUNTA_3'] = 2.5
+    df.loc[1, 'FECHA_ENCUESTA'] = pd.Timestamp('2030-01-01')
+    df.loc[2, 'SEGMENTO'] = 'Desconocido'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'cuarentena.csv')
+        validos, reporte = validar_datos(df, ruta_cuarentena=ruta, fecha_referencia='2026-01-01')
+        print(resumen_reporte_validacion(reporte))
+        cuarentena = pd.read_csv(ruta, sep=';', encoding='utf-8-sig')
+
+    assert reporte["filas_rechazadas"] == 3 and len(validos) == len(df) - 3
+    assert reporte["por_regla"]["FECHA_ENCUESTA futura"] == 1
+    assert list(cuarentena['PREGUNTA_1'].iloc[:1]) == [7]
+    assert 'PREGUNTA_3' in cuarentena[COLUMNA_MOTIVO].iloc[1] and 'futura' in cuarentena[COLUMNA_MOTIVO].iloc[1]
+    assert cuarentena[COLUMNA_MOTIVO].iloc[2] == 'SEGMENTO desconocido'
+
+def test_deduplicacion():
+    """
+    Prueba que las respuestas repetidas de un encuestado (por cédula o correo) se reducen a una
+    """
+    print("\n===== PRUEBA DE DEDUPLICACIÓN =====")
+    df = clean_data(load_data(DATA_PATH))
+    original = len(df)
+
+    # Repetir tres encuestados: uno con la cédula con puntos, otro con el correo
+    # en mayúsculas y otro que enlaza a ambos (misma cédula del primero, correo del segundo)
+    repetidas = df.iloc[[0, 1, 0]].copy()
+    repetidas['CEDULA'] = [f"{int(df['CEDULA'].iloc[0]):,}".replace(',', '.'), '000', df['CEDULA'].iloc[0]]
+    repetidas['EMAIL'] = ['otro@correo.com', df['EMAIL'].iloc[1].upper(), df['EMAIL'].iloc[1]]
+    repetidas['FECHA_ENCUESTA'] = pd.to_datetime(['2025-06-01', '2025-06-02', '2025-05-01'])
+    repetidas['PREGUNTA_1'] = [1.0, 2.0, 3.0]
+    df = pd.concat([df, repetidas], ignore_index=True)
+
+    df_ultima, reporte = deduplicar(df, politica='ultima')
+    print(resumen_reporte_deduplicacion(reporte))
+    # Filas 0 y 1 originales y las tres repetidas son el mismo encuestado
+    assert reporte["duplicados_eliminados"] == 4 and reporte["encuestados_con_duplicados"] == 1
+    assert len(df_ultima) == original - 1
+    assert df_ultima['FECHA_ENCUESTA'].max() == pd.Timestamp('2025-06-02')
+
+    df_primera, _ = deduplicar(df, politica='primera')
+    conservada = df_primera.index.difference(range(2, original))
+    assert len(conservada) == 1
+    assert df_primera.loc[conservada[0], 'FECHA_ENCUESTA'] == df.loc[[0, 1], 'FECHA_ENCUESTA'].min()
+
+def test_carga_multiple():
+    """
+    Prueba la carga en paralelo de un directorio con archivos en ambos formatos de encabezados
+    """
+    print("\n===== PRUEBA DE CARGA DE MÚLTIPLES ARCHIVOS =====")
+    canonico = load_data(DATA_PATH)
+    exportacion = pd.read_csv(EXPORTACION_PATH, sep=';', encoding='utf-8-sig', dtype=str)
+    df_completo = clean_data(load_data(DATA_PATH))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Seis "meses": los pares con encabezados canónicos, los impares con los de la exportación
+        for mes, filas in enumerate(np.array_split(np.arange(len(canonico)), 6)):
+            origen = exportacion if mes % 2 else canonico
+            origen.iloc[filas].to_csv(os.path.join(tmp, f'mes_{mes:02d}.csv'), sep=';', index=False, encoding='utf-8-sig')
+
+        df_multiple = clean_data(load_data(tmp, compacto=True))
+        print(f"Registros cargados: {len(df_multiple)}")
+        assert len(df_multiple) == len(df_completo)
+        assert isinstance(df_multiple['SEGMENTO'].dtype, pd.CategoricalDtype)
+        for col in ['PREGUNTA_1', 'PREGUNTA_2', 'PREGUNTA_3', 'PREGUNTA_4']:
+            np.testing.assert_allclose(df_multiple[col].to_numpy(), df_completo[col].to_numpy())
+        assert (df_multiple['FECHA_ENCUESTA'] == df_completo['FECHA_ENCUESTA']).all()
+        for col in ['SEGMENTO', 'CIUDAD_AGENCIA', 'GENERO', 'ESTRATO']:
+            assert (df_multiple[col].astype(str) == df_completo[col].astype(str)).all(), col
+
+        # Un patrón glob selecciona solo parte de los archivos
+        assert len(load_data(os.path.join(tmp, 'mes_0[0-2].csv'))) == sum(
+            len(f) for f in np.array_split(np.arange(len(canonico)), 6)[:3])
+
+        # La caché de datos limpios acepta directorios y patrones: la clave es el
+        # digest de los archivos seleccionados
+        patron = os.path.join(tmp, 'mes_0[0-2].csv')
+        assert digest_datos(tmp) == digest_datos(os.path.join(tmp, '*.csv')) != digest_datos(patron)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            df_frio, info_frio = load_clean_data(tmp, cache_dir=cache_dir)
+            df_caliente, info_caliente = load_clean_data(tmp, cache_dir=cache_dir)
+            assert not info_frio["desde_cache"] and info_caliente["desde_cache"]
+            assert len(df_caliente) == len(df_completo)
+            assert ruta_cache(tmp, cache_dir) != ruta_cache(patron, cache_dir)
+
+def test_almacen_sql():
+    """
+    Prueba que los agregados calculados en el almacén SQLite coinciden con pandas
+    """
+    print("\n===== PRUEBA DE ALMACÉN SQL =====")
+    df = clean_data(load_data(DATA_PATH))
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'encuesta.sqlite')
+        conexion, reconstruido = preparar_almacen(df, ruta, 'digest-prueba')
+        conexion.close()
+        conexion, reconstruido_2 = preparar_almacen(df, ruta, 'digest-prueba')
+        assert reconstruido and not reconstruido_2
+        # Mismo número de filas y columnas pero otras filas (p. ej. otra política
+        # de deduplicación): la clave basada en los datos obliga a reconstruir
+        assert digest_dataframe(df.iloc[:-1]) != digest_dataframe(df.iloc[1:])
+        assert digest_dataframe(df.iloc[1:]) == digest_dataframe(df.iloc[1:].reset_index(drop=True))
+        conexion.close()
+        conexion, reconstruido_3 = preparar_almacen(df.iloc[1:], ruta, digest_dataframe(df.iloc[1:]))
+        assert reconstruido_3
+        conexion.close()
+        conexion, _ = preparar_almacen(df, ruta, digest_dataframe(df))
+        try:
+            top = top_categorias_sql(conexion, 'CIUDAD_AGENCIA', 3)
+            print(f"Top 3 ciudades: {top}")
+            assert top == list(df['CIUDAD_AGENCIA'].value_counts().nlargest(3).index)
+
+            tabla = tabla_contingencia_sql(conexion, 'CIUDAD_AGENCIA', 'SEGMENTO', top)
+            df_top = df[df['CIUDAD_AGENCIA'].isin(top)]
+            esperada = pd.crosstab(df_top['CIUDAD_AGENCIA'], df_top['SEGMENTO'])
+            assert (tabla.to_numpy() == esperada.to_numpy()).all()
+
+            agregados = agregados_grupo_sql(conexion, 'ESTRATO', 'PREGUNTA_1')
+            esperados = df.groupby('ESTRATO')['PREGUNTA_1'].agg(['count', 'mean', 'std', 'min', 'max'])
+            assert list(agregados.index) == list(esperados.index)
+            np.testing.assert_allclose(agregados['cantidad'], esperados['count'])
+            np.testing.assert_allclose(agregados['Promedio'], esperados['mean'])
+            np.testing.assert_allclose(agregados['Desviacion'], esperados['std'])
+            np.testing.assert_allclose(agregados['Maximo'], esperados['max'])
+        finally:
+            conexion.close()
+
+if __name__ == "__main__":
+    print("PRUEBAS DE CARGA Y LIMPIEZA DE DATOS")
+    print("====================================")
+
+    test_carga_por_bloques()
+    test_cache_datos_limpios()
+    test_reporte_limpieza()
+    test_modo_compacto()
+    test_ingesta_incremental()
+    test_ingesta_validacion_deduplicacion()
+    test_carga_excel()
+    test_validacion_cuarentena()
+    test_deduplicacion()
+    test_carga_multiple()
+    test_almacen_sql()
+
+    print("\n¡Pruebas completadas!")
@@ -9,8 +9,20 @@ from src.analysis_bivariado import (
     calcular_chi2_contingency, 
     calcular_potencia_estadistica,
     bivariado_cat_cat,
-    bivariado_cat_num
+    bivariado_cat_num,
+    verificar_normalidad_por_grupos
 )
+from scipy.stats import shapiro, chi2_contingency, f_oneway, bootstrap as bootstrap_scipy
+from src.asociacion import matriz_asociacion
+from src.chi2_montecarlo import chi2_monte_carlo
+import src.permutaciones as permutaciones
+import src.bootstrap as bootstrap
+import src.simulacion as simulacion
+from src.planificador import _inicializar_trabajador
+from concurrent.futures import ProcessPoolExecutor
+from src.inferencia import comparar_grupos
+from src.contexto import ContextoAnalisis
+from src.normalidad import shapiro_por_grupos
 
 def test_potencia_estadistica():
     """
@@ -196,6 +208,272 @@ def test_visualizacion_mejorada():
     plt.close('all')
     print("Se generaron visualizaciones en el directorio 'graficos'")
 
+def test_normalidad_por_grupos():
+    """
+    Prueba que las pruebas de normalidad por grupo coinciden con Shapiro-Wilk
+    sobre cada grupo filtrado y que se calculan una sola vez por contexto
+    """
+    print("\n===== PRUEBA DE NORMALIDAD POR GRUPOS =====")
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'grupo': rng.choice(['A', 'B', 'C', 'D'], size=400, p=[0.5, 0.3, 0.195, 0.005]),
+        'valor': rng.normal(3, 1, 400).round(),
+    })
+    df.loc[rng.choice(400, 20, replace=False), 'valor'] = np.nan
+    df.loc[df.index[-2:], 'grupo'] = 'E'  # grupo con menos de 3 observaciones
+
+    contexto = ContextoAnalisis(df)
+    pruebas = shapiro_por_grupos(contexto, 'grupo', 'valor')
+    for grupo, (n, estadistico, p_valor) in pruebas.items():
+        datos = df[df['grupo'] == grupo]['valor'].dropna()
+        assert n == len(datos)
+        if n < 3:
+            assert p_valor is None
+        else:
+            assert (estadistico, p_valor) == tuple(shapiro(datos))
+        print(f"{grupo}: n={n}, p={p_valor}")
+
+    resultado = verificar_normalidad_por_grupos(df, 'grupo', 'valor', contexto=contexto)
+    assert resultado["resultados_por_grupo"]["E"]["interpretacion"] == "Insuficientes observaciones"
+    assert not resultado["todos_normales"]
+    # Un segundo análisis de los mismos datos reutiliza las pruebas del contexto
+    memo = contexto.pruebas[('shapiro', 'grupo', 'valor')]
+    repetidas = shapiro_por_grupos(contexto, 'grupo', 'valor', ['A', 'B'])
+    assert all(repetidas[g] is memo[g] for g in ['A', 'B'])
+    assert calcular_diferencias_grupos(df, 'grupo', 'valor', 'A', 'B', contexto=contexto)["normalidad"] == resultado
+
+def test_matriz_asociacion():
+    """
+    Prueba que la matriz de asociación por conteo de códigos coincide con
+    pd.crosstab y chi2_contingency en cada par, incluidas tablas 2x2 y nulos
+    """
+    print("\n===== PRUEBA DE LA MATRIZ DE ASOCIACIÓN =====")
+    rng = np.random.default_rng(11)
+    n = 500
+    df = pd.DataFrame({
+        'ciudad': rng.choice(['Bogotá', 'Medellín', 'Cali', 'Pereira'], n),
+        'segmento': rng.choice(['Personas', 'Empresas'], n, p=[0.8, 0.2]),
+        'genero': rng.choice(['F', 'M'], n),
+        'estrato': pd.array(rng.integers(1, 7, n), dtype='Int8'),
+    })
+    df['canal'] = np.where(df['segmento'] == 'Empresas', 'Asesor', rng.choice(['Web', 'Asesor'], n))
+    df.loc[rng.choice(n, 30, replace=False), 'genero'] = np.nan
+    df['ciudad'] = df['ciudad'].astype('category')
+    variables = list(df.columns)
+
+    resultado = matriz_asociacion(df, variables)
+    for _, par in resultado["pares"].iterrows():
+        chi2, p_valor, dof, _ = chi2_contingency(pd.crosstab(df[par["var1"]], df[par["var2"]]))
+        assert np.isclose(par["chi2"], chi2) and np.isclose(par["p_valor"], p_valor) and par["grados_libertad"] == dof
+        assert resultado["v_cramer"].loc[par["var2"], par["var1"]] == par["v_cramer"]
+    print(resultado["pares"].round(4).to_string(index=False))
+    assert (np.diag(resultado["v_cramer"]) == 1).all()
+    assert resultado["pares"].iloc[0][["var1", "var2"]].tolist() == ['segmento', 'canal']
+    # El resultado detallado de un par usa el mismo estadístico
+    detalle = calcular_chi2_contingency(df, 'segmento', 'canal')
+    assert np.isclose(detalle["v_cramer"], resultado["v_cramer"].loc['segmento', 'canal'])
+
+def _simular_en_trabajador(prueba, argumentos):
+    """Ejecuta una prueba por simulación con 3 procesos y cuenta los pools que abre (en un proceso de trabajo)."""
+    pools = []
+
+    class PoolEspia(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get('max_workers'))
+            super().__init__(*args, **kwargs)
+
+    simulacion.ProcessPoolExecutor = PoolEspia
+    resultado = prueba(*argumentos, trabajadores=3)
+    return len(pools), resultado
+
+def test_simulacion_en_trabajador():
+    """
+    Prueba que dentro de un proceso de trabajo del plan las pruebas por
+    simulación no abren un pool propio y dan el mismo resultado
+    """
+    print("\n===== PRUEBA DE SIMULACIÓN EN UN PROCESO DEL PLAN =====")
+    tabla = np.array([[3, 2, 5, 1, 5], [0, 3, 3, 5, 1], [5, 4, 5, 1, 4], [5, 0, 2, 3, 0]])
+    # Con alpha igual al p-valor no hay parada temprana: hacen falta todos los lotes
+    secuencial = chi2_monte_carlo(tabla, semilla=7, max_simulaciones=6000, trabajadores=1)
+    argumentos = (tabla, secuencial["p_valor"], 7, 6000)
+    with ProcessPoolExecutor(max_workers=1, initializer=_inicializar_trabajador, initargs=(None, None, None)) as pool:
+        pools, resultado = pool.submit(_simular_en_trabajador, chi2_monte_carlo, argumentos).result()
+    print(f"Pools abiertos en el proceso del plan: {pools}")
+    assert pools == 0 and resultado["simulaciones"] == 6000
+    assert resultado["p_valor"] == secuencial["p_valor"]
+    # Fuera del plan sí se reparten los lotes
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(_simular_en_trabajador, chi2_monte_carlo, argumentos).result()[0] == 1
+
+    # Lo mismo para las pruebas de permutación (calcular_diferencias_grupos con metodo='permutacion')
+    rng = np.random.default_rng(11)
+    grupos = [rng.integers(1, 6, 60).astype(float), rng.integers(1, 6, 50).astype(float)]
+    alpha = permutaciones.prueba_permutacion(grupos, max_permutaciones=6000, trabajadores=1)["p_valor"]
+    argumentos = (grupos, 'medias', alpha, permutaciones.SEMILLA, 6000)
+    secuencial = permutaciones.prueba_permutacion(*argumentos, trabajadores=1)
+    with ProcessPoolExecutor(max_workers=1, initializer=_inicializar_trabajador, initargs=(None, None, None)) as pool:
+        pools, resultado = pool.submit(_simular_en_trabajador, permutaciones.prueba_permutacion, argumentos).result()
+    assert pools == 0 and resultado["simulaciones"] == 6000
+    assert resultado["p_valor"] == secuencial["p_valor"]
+
+def test_chi2_monte_carlo():
+    """
+    Prueba el p-valor Monte Carlo del Chi-cuadrado: reproducible con la misma
+    semilla sin importar el número de procesos, cercano al asintótico cuando
+    este es válido y usado en tablas RxC con frecuencias esperadas bajas
+    """
+    print("\n===== PRUEBA DEL CHI-CUADRADO MONTE CARLO =====")
+    # Tabla con frecuencias altas: el p-valor asintótico es fiable
+    tabla = np.array([[30, 22, 18], [25, 30, 26], [20, 25, 34]])
+    _, p_asintotico, _, _ = chi2_contingency(tabla)
+    resultado = chi2_monte_carlo(tabla, semilla=7, trabajadores=1)
+    print(resultado)
+    assert resultado["intervalo_p_valor"][0] <= p_asintotico <= resultado["intervalo_p_valor"][1]
+    assert np.isclose(resultado["estadistico_chi2"], chi2_contingency(tabla)[0])
+
+    # p-valor cercano a alpha: hacen falta varios lotes; el resultado no depende de los procesos
+    tabla = np.array([[3, 2, 5, 1, 5], [0, 3, 3, 5, 1], [5, 4, 5, 1, 4], [5, 0, 2, 3, 0]])
+    secuencial = chi2_monte_carlo(tabla, semilla=7, max_simulaciones=20000, trabajadores=1)
+    paralelo = chi2_monte_carlo(tabla, semilla=7, max_simulaciones=20000, trabajadores=2)
+    print(secuencial)
+    assert secuencial == paralelo
+    assert secuencial["simulaciones"] > 2000
+
+    # Con filas y columnas vacías o una sola fila
+    assert chi2_monte_carlo(np.array([[4, 0, 3]]))["p_valor"] == 1.0
+
+    # Tabla 4x4 con frecuencias esperadas < 5: p-valor simulado
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'a': rng.choice(list('ABCD'), 40), 'b': rng.choice(list('WXYZ'), 40)})
+    detalle = calcular_chi2_contingency(df, 'a', 'b')
+    print(f"Prueba utilizada: {detalle['prueba_usada']}, p-valor: {detalle['p_valor']:.4f} "
+          f"(asintótico {detalle['p_valor_asintotico']:.4f}, {detalle['simulaciones_monte_carlo']} simulaciones)")
+    assert detalle["prueba_usada"] == "Chi-cuadrado (Monte Carlo)"
+    assert calcular_chi2_contingency(df, 'a', 'b')["p_valor"] == detalle["p_valor"]
+    sin_simulacion = calcular_chi2_contingency(df, 'a', 'b', monte_carlo=False)
+    assert sin_simulacion["prueba_usada"] == "Chi-cuadrado (con advertencia)"
+
+def test_permutaciones():
+    """
+    Prueba las pruebas de permutación: el estadístico observado coincide con
+    F de scipy y con las diferencias de medias y medianas, la simulación por
+    tablas de conteos (Likert) equivale a permutar los valores y el resultado
+    no depende del número de procesos
+    """
+    print("\n===== PRUEBA DE LAS PRUEBAS DE PERMUTACIÓN =====")
+    rng = np.random.default_rng(21)
+    a = rng.integers(1, 6, 60).astype(float)
+    b = np.clip(rng.integers(1, 6, 45) + (rng.random(45) < 0.3), 1, 5).astype(float)
+    c = rng.integers(2, 6, 40).astype(float)
+
+    resultado_f = permutaciones.prueba_permutacion([a, b, c], 'f', semilla=3)
+    print(resultado_f)
+    assert np.isclose(resultado_f["valor_observado"], f_oneway(a, b, c).statistic)
+    assert resultado_f["intervalo_p_valor"][0] <= resultado_f["p_valor"] <= resultado_f["intervalo_p_valor"][1]
+    medias = permutaciones.prueba_permutacion([a, b], 'medias', semilla=3)
+    assert np.isclose(medias["valor_observado"], abs(a.mean() - b.mean()))
+    medianas = permutaciones.prueba_permutacion([a, b[:44]], 'medianas', semilla=3)
+    assert medianas["valor_observado"] == abs(np.median(a) - np.median(b[:44]))
+
+    # Tablas de conteos frente a permutar los valores: mismo estadístico, p-valores compatibles
+    for estadistico, grupos in (('medias', [a, b]), ('medianas', [a, b[:44]]), ('f', [a, b, c])):
+        por_tabla = permutaciones.prueba_permutacion(grupos, estadistico, alpha=0, max_permutaciones=20000)
+        limite = permutaciones.MAX_VALORES_DISTINTOS
+        permutaciones.MAX_VALORES_DISTINTOS = 0
+        try:
+            por_valores = permutaciones.prueba_permutacion(grupos, estadistico, alpha=0, max_permutaciones=20000)
+        finally:
+            permutaciones.MAX_VALORES_DISTINTOS = limite
+        print(estadistico, por_tabla["p_valor"], por_valores["p_valor"])
+        assert np.isclose(por_tabla["valor_observado"], por_valores["valor_observado"])
+        assert abs(por_tabla["p_valor"] - por_valores["p_valor"]) < 0.03
+
+    # Valores continuos (reduceat) y reparto en procesos
+    x, y = rng.normal(0, 1, 300), rng.normal(0.15, 1, 250)
+    secuencial = permutaciones.prueba_permutacion([x, y], semilla=5, max_permutaciones=10000, trabajadores=1)
+    paralelo = permutaciones.prueba_permutacion([x, y], semilla=5, max_permutaciones=10000, trabajadores=2)
+    assert secuencial == paralelo
+
+    # Integración con calcular_diferencias_grupos
+    df = pd.DataFrame({'grupo': ['A'] * 60 + ['B'] * 45 + ['C'] * 40, 'valor': np.concatenate([a, b, c])})
+    tres = calcular_diferencias_grupos(df, 'grupo', 'valor', metodo='permutacion', semilla=3)
+    print(f"Prueba: {tres['prueba']} - {tres['interpretacion']}")
+    assert tres["prueba"] == "Permutación (estadístico F)" and tres["p_valor"] == resultado_f["p_valor"]
+    assert "normalidad" in tres and 0 <= tres["tamaño_efecto_eta_cuadrado"] <= 1
+    dos = calcular_diferencias_grupos(df, 'grupo', 'valor', 'A', 'B', metodo='permutacion', estadistico='medianas')
+    assert dos["prueba"] == "Permutación (diferencia de medianas)" and "tamaño_efecto_d" in dos
+    assert calcular_diferencias_grupos(df, 'grupo', 'valor', metodo='permutacion', estadistico='medias')["prueba"] == "Permutación (fallida)"
+    try:
+        calcular_diferencias_grupos(df, 'grupo', 'valor', metodo='bootstrap')
+        assert False, "Se esperaba ValueError"
+    except ValueError:
+        pass
+
+def test_intervalos_bootstrap():
+    """
+    Prueba los intervalos bootstrap: coinciden con scipy.stats.bootstrap
+    (percentil y BCa), no dependen del tamaño de bloque y se informan por
+    grupo en bivariado_cat_num y comparar_grupos
+    """
+    print("\n===== PRUEBA DE LOS INTERVALOS BOOTSTRAP =====")
+    rng = np.random.default_rng(8)
+    continuos = rng.exponential(2, 150)
+    likert = rng.integers(1, 6, 120).astype(float)
+    for metodo, metodo_scipy in (('percentil', 'percentile'), ('bca', 'BCa')):
+        intervalos = bootstrap.intervalos_bootstrap({'c': continuos, 'l': likert}, ('media', 'mediana'),
+                                                    metodo=metodo, remuestras=20000)
+        print(metodo, intervalos)
+        for grupo, datos, estadistico, funcion in (('c', continuos, 'media', np.mean), ('c', continuos, 'mediana', np.median),
+                                                   ('l', likert, 'media', np.mean)):
+            referencia = bootstrap_scipy((datos,), funcion, n_resamples=20000, method=metodo_scipy, random_state=1).confidence_interval
+            ancho = referencia.high - referencia.low
+            assert abs(intervalos[grupo][estadistico]["ic_inf"] - referencia.low) < 0.05 * ancho
+            assert abs(intervalos[grupo][estadistico]["ic_sup"] - referencia.high) < 0.05 * ancho
+
+    # Bloques pequeños: mismas remuestras y mismos intervalos
+    grupos = {'A': likert[:70], 'B': likert[70:], 'C': [4.0]}
+    completo = bootstrap.intervalos_bootstrap(grupos, ('q1', 'mediana', 'q3'), semilla=4)
+    limite = bootstrap.MAX_ELEMENTOS_BLOQUE
+    bootstrap.MAX_ELEMENTOS_BLOQUE = 500
+    try:
+        por_bloques = bootstrap.intervalos_bootstrap(grupos, ('q1', 'mediana', 'q3'), semilla=4)
+    finally:
+        bootstrap.MAX_ELEMENTOS_BLOQUE = limite
+    assert all(
+        np.allclose([completo[g][e]["ic_inf"], completo[g][e]["ic_sup"]], [por_bloques[g][e]["ic_inf"], por_bloques[g][e]["ic_sup"]], equal_nan=True)
+        for g in grupos for e in ('q1', 'mediana', 'q3'))
+    assert completo['C']['mediana']["estimacion"] == 4.0 and np.isnan(completo['C']['mediana']["ic_inf"])
+    try:
+        bootstrap.intervalos_bootstrap(grupos, metodo='t')
+        assert False, "Se esperaba ValueError"
+    except ValueError:
+        pass
+
+    # Intervalos por grupo en los análisis
+    df = pd.DataFrame({'grupo': ['A'] * 70 + ['B'] * 50, 'valor': likert})
+    resumen = bivariado_cat_num(df, 'grupo', 'valor', top_n=None, metodo_ic='bca')
+    plt.close('all')
+    for columna in ('Q1', 'Mediana', 'Q3'):
+        assert (resumen[f'IC_{columna}_inf'] <= resumen[columna]).all() and (resumen[columna] <= resumen[f'IC_{columna}_sup']).all()
+    resultado = comparar_grupos(df, 'grupo', 'valor', 'A', 'B', metodo_ic='percentil')
+    print(resultado['ic_bootstrap'])
+    assert resultado['ic_bootstrap']['grupo1']['media'][0] <= resultado['media1'] <= resultado['ic_bootstrap']['grupo1']['media'][1]
+
+def test_jackknife_bootstrap():
+    """
+    Prueba que el jackknife de la aceleración BCa coincide con omitir cada
+    observación una a una
+    """
+    print("\n===== PRUEBA DEL JACKKNIFE DEL BCa =====")
+    rng = np.random.default_rng(9)
+    muestras = (rng.exponential(2, 57), rng.integers(1, 6, 40).astype(float), np.array([3.0, 1.0]), np.array([2.0, 2.0, 5.0]))
+    # Media y cuartiles (fórmulas por rango) y un estadístico cualquiera (por valor distinto o general)
+    funciones = list(bootstrap.ESTADISTICOS.values()) + [bootstrap._cuantil(0.9), np.std]
+    for valores in muestras:
+        for funcion in funciones:
+            referencia = [funcion(np.delete(valores, i)) for i in range(len(valores))]
+            assert np.allclose(bootstrap._jackknife(valores, funcion), referencia)
+
 if __name__ == "__main__":
     print("PRUEBAS DE MEJORAS DE MAYO 2025")
     print("================================")
@@ -205,5 +483,12 @@ if __name__ == "__main__":
     test_chi2_mejorado()
     test_diferencias_grupos()
     test_visualizacion_mejorada()
+    test_normalidad_por_grupos()
+    test_matriz_asociacion()
+    test_chi2_monte_carlo()
+    test_simulacion_en_trabajador()
+    test_permutaciones()
+    test_intervalos_bootstrap()
+    test_jackknife_bootstrap()
     
     print("\n¡Pruebas completadas!")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# test_pipeline.py - Pruebas de la API run_pipeline y del modo headless
+
+import os
+import json
+import time
+import tempfile
+import webbrowser
+import subprocess
+import threading
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import main
+from src.data_loader import load_data
+from src.data_cache import digest_datos
+from benchmark_arranque import medir_importacion, ANALISIS_PEQUENO
+import demonio_analisis
+
+PLAN_PRUEBA = [
+    {"id": "univariado_SEGMENTO", "tipo": "univariado", "parametros": {"variable": "SEGMENTO"}},
+    {"id": "univariado_PREGUNTA_1", "tipo": "univariado", "parametros": {"variable": "PREGUNTA_1"}},
+    {"id": "tabla_PREGUNTA_1", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_1"},
+     "depende_de": ["univariado_PREGUNTA_1"]},
+]
+
+def config_temporal(tmp):
+    """Configuración con todas las salidas en un directorio temporal"""
+    ruta_plan = os.path.join(tmp, 'plan.json')
+    with open(ruta_plan, 'w', encoding='utf-8') as f:
+        json.dump(PLAN_PRUEBA, f)
+    return {
+        'PLAN_PATH': ruta_plan,
+        'EXPORT_EXCEL': os.path.join(tmp, 'resultados.xlsx'),
+        'EXPORT_PDF': os.path.join(tmp, 'graficos.pdf'),
+        'EXPORT_PNG_DIR': os.path.join(tmp, 'graficos'),
+        'EXPORT_JSON_DIR': os.path.join(tmp, 'data'),
+        'LOG_FILE': os.path.join(tmp, 'log.jsonl'),
+        'LOG_CONSOLA': False,
+        'CACHE_DIR': os.path.join(tmp, 'cache'),
+        'CACHE_ARTEFACTOS_DIR': os.path.join(tmp, 'cache', 'artefactos'),
+        'ACUMULADORES_PATH': os.path.join(tmp, 'acumuladores.json'),
+        'CUARENTENA_PATH': os.path.join(tmp, 'cuarentena.csv'),
+        'METRICAS_PATH': os.path.join(tmp, 'run_metrics.json'),
+        'MAX_TRABAJADORES': 1,
+    }
+
+def test_configuracion_invalida():
+    """
+    Prueba que run_pipeline rechaza claves de configuración desconocidas
+    """
+    print("\n===== PRUEBA DE CONFIGURACIÓN INVÁLIDA =====")
+    try:
+        main.run_pipeline({'RUTA_INEXISTENTE': 'x'})
+    except ValueError as e:
+        print(f"Configuración rechazada: {e}")
+    else:
+        raise AssertionError("Se esperaba un ValueError")
+
+def test_run_pipeline():
+    """
+    Prueba que run_pipeline devuelve los resultados y escribe todas las salidas
+    en las rutas configuradas
+    """
+    print("\n===== PRUEBA DE RUN_PIPELINE =====")
+    with tempfile.TemporaryDirectory() as tmp:
+        config = config_temporal(tmp)
+        resultados = main.run_pipeline(config)
+
+        assert resultados["configuracion"]["MAX_TRABAJADORES"] == 1
+        assert {id_nodo: r["estado"] for id_nodo, r in resultados["plan"].items()} == \
+            {nodo["id"]: "completado" for nodo in PLAN_PRUEBA}
+        assert len(resultados["datos"]) > 0 and resultados["metricas"]["fases"]
+        for clave in ('EXPORT_EXCEL', 'EXPORT_PDF', 'LOG_FILE', 'METRICAS_PATH', 'ACUMULADORES_PATH'):
+            assert os.path.exists(config[clave]), clave
+        archivos_json = os.listdir(config['EXPORT_JSON_DIR'])
+        assert 'tabla_PREGUNTA_1.json' in archivos_json
+        assert 'plotly_tabla_PREGUNTA_1.json' in archivos_json
+        with open(config['LOG_FILE'], encoding='utf-8') as f:
+            mensajes = [json.loads(linea)["mensaje"] for linea in f]
+        assert "ANÁLISIS DE SATISFACCIÓN COMPLETADO EXITOSAMENTE" in mensajes
+
+def test_run_pipeline_multiple():
+    """
+    Prueba run_pipeline con DATA_PATH como directorio y como patrón glob de
+    entregas: carga las mismas respuestas que el archivo único
+    """
+    print("\n===== PRUEBA DE RUN_PIPELINE CON VARIOS ARCHIVOS =====")
+    crudo = load_data(main.DATA_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        entregas = os.path.join(tmp, 'entregas')
+        os.makedirs(entregas)
+        for mes, filas in enumerate(np.array_split(np.arange(len(crudo)), 3), start=1):
+            crudo.iloc[filas].to_csv(os.path.join(entregas, f'2025-{mes:02d}.csv'), sep=';', index=False,
+                                     encoding='utf-8-sig')
+
+        referencia = main.run_pipeline(config_temporal(tmp))["datos"]
+        for i, datos in enumerate((entregas, os.path.join(entregas, '2025-*.csv'))):
+            salidas = os.path.join(tmp, f'salidas_{i}')
+            os.makedirs(salidas)
+            config = config_temporal(salidas)
+            config.update({'DATA_PATH': datos, 'USAR_ALMACEN_SQL': True,
+                           'ALMACEN_SQL_PATH': os.path.join(salidas, 'encuesta.sqlite')})
+            resultados = main.run_pipeline(config)
+
+            print(f"{datos}: {len(resultados['datos'])} registros")
+            assert all(r["estado"] == "completado" for r in resultados["plan"].values())
+            pd.testing.assert_series_equal(resultados["datos"]['PREGUNTA_1'].reset_index(drop=True),
+                                           referencia['PREGUNTA_1'].reset_index(drop=True))
+            with open(config['ACUMULADORES_PATH'], encoding='utf-8') as f:
+                assert json.load(f)["archivos_ingeridos"] == [digest_datos(datos)]
+
+def test_modo_headless():
+    """
+    Prueba que `main.py --headless` no inicia el servidor ni abre el navegador
+    """
+    print("\n===== PRUEBA DEL MODO HEADLESS =====")
+    llamadas = []
+    originales = {"open": webbrowser.open, "Popen": subprocess.Popen}
+
+    def popen(comando, *args, **kwargs):
+        # Solo se registra el servidor web; el resto de procesos (git) se ejecutan
+        if 'start_server.py' in comando or 'http.server' in comando:
+            llamadas.append(comando)
+            return None
+        return originales["Popen"](comando, *args, **kwargs)
+
+    webbrowser.open = lambda *args, **kwargs: llamadas.append(args)
+    subprocess.Popen = popen
+    with tempfile.TemporaryDirectory() as tmp:
+        # Los valores por defecto de run_pipeline son las constantes del módulo
+        config = config_temporal(tmp)
+        constantes = {clave: getattr(main, clave) for clave in config}
+        for clave, valor in config.items():
+            setattr(main, clave, valor)
+        try:
+            main.main(['--headless', '--trabajadores', '1'])
+        finally:
+            for clave, valor in constantes.items():
+                setattr(main, clave, valor)
+            webbrowser.open, subprocess.Popen = originales["open"], originales["Popen"]
+        assert os.path.exists(config['EXPORT_EXCEL'])
+    assert llamadas == []
+
+def test_importacion_diferida():
+    """
+    Prueba que un análisis con solo tablas de frecuencia no importa las
+    dependencias pesadas (keybert, statsmodels, seaborn, plotly...)
+    """
+    print("\n===== PRUEBA DE IMPORTACIÓN DIFERIDA =====")
+    medida = medir_importacion(ANALISIS_PEQUENO + ['src.analysis_bivariado', 'src.inferencia', 'src.visualizations'])
+    print(f"Importación: {medida['tiempo_s']:.2f} s; paquetes más costosos: {medida['paquetes_costosos']}")
+    assert medida["dependencias_pesadas"] == []
+
+def test_demonio_analisis():
+    """
+    Prueba que el demonio atiende varios trabajos por el socket y envía el
+    resultado de cada nodo antes del resumen final
+    """
+    print("\n===== PRUEBA DEL DEMONIO DE ANÁLISIS =====")
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_socket = os.path.join(tmp, 'demonio.sock')
+        demonio = threading.Thread(target=demonio_analisis.servir, args=(ruta_socket, False), daemon=True)
+        demonio.start()
+        for _ in range(50):
+            if os.path.exists(ruta_socket):
+                break
+            time.sleep(0.1)
+
+        config = config_temporal(tmp)
+        plan = config.pop('PLAN_PATH')
+        for trabajo in range(2):
+            mensajes = list(demonio_analisis.analizar(plan=plan, config=config, ruta_socket=ruta_socket))
+            print(f"Trabajo {trabajo + 1}: {mensajes[-1]}")
+            assert [m["tipo"] for m in mensajes] == ["nodo"] * len(PLAN_PRUEBA) + ["fin"]
+            assert {m["id"] for m in mensajes[:-1]} == {nodo["id"] for nodo in PLAN_PRUEBA}
+            assert mensajes[-1]["completados"] == len(PLAN_PRUEBA)
+        # El segundo trabajo reutiliza la caché de artefactos del primero
+        assert all(m["desde_cache"] for m in mensajes[:-1])
+
+        errores = list(demonio_analisis.analizar(config={'CLAVE_INVALIDA': 1}, ruta_socket=ruta_socket))
+        assert errores[-1]["tipo"] == "error"
+        estado = list(demonio_analisis.enviar_peticion({"accion": "estado"}, ruta_socket))[0]
+        assert estado["trabajos"] == 3 and estado["pid"] == os.getpid()
+        assert list(demonio_analisis.enviar_peticion({"accion": "detener"}, ruta_socket))[0]["tipo"] == "detenido"
+        demonio.join(timeout=10)
+        assert not demonio.is_alive() and not os.path.exists(ruta_socket)
+
+if __name__ == "__main__":
+    print("PRUEBAS DE LA API DEL ANÁLISIS")
+    print("==============================")
+
+    test_configuracion_invalida()
+    test_run_pipeline()
+    test_run_pipeline_multiple()
+    test_modo_headless()
+    test_importacion_diferida()
+    test_demonio_analisis()
+
+    print("\n¡Pruebas completadas!")
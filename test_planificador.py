@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+# test_planificador.py - Pruebas del plan declarativo de análisis y su ejecución en paralelo
+
+import atexit
+import multiprocessing
+import os
+import json
+import signal
+import tempfile
+import time
+import matplotlib
+matplotlib.use('Agg')
+import openpyxl
+import numpy as np
+import pandas as pd
+from src.data_loader import load_data
+from src.data_cleaner import clean_data
+from src import planificador
+from src.planificador import cargar_plan, validar_plan, orden_topologico, columnas_plan, ejecutar_plan, prioridades_efectivas
+from src.cache_artefactos import limpiar_obsoletos
+from src.bitacora import iniciar_bitacora, registrar, cerrar_bitacora
+from src.contexto import ContextoAnalisis
+from src.analysis_univariado import analisis_univariado
+from src.memoria_compartida import compartir_dataframe, adjuntar_dataframe, liberar_bloque
+from src.metricas import iniciar_registro, iniciar_fase, registrar_analisis, guardar_metricas, opciones_medicion
+
+DATA_PATH = 'data/Base encuesta de satisfacción.csv'
+
+PLAN_PRUEBA = [
+    {"id": "univariado_SEGMENTO", "tipo": "univariado", "parametros": {"variable": "SEGMENTO"}},
+    {"id": "univariado_PREGUNTA_1", "tipo": "univariado", "parametros": {"variable": "PREGUNTA_1"}},
+    {"id": "tabla_PREGUNTA_1", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_1"},
+     "depende_de": ["univariado_PREGUNTA_1"]},
+    {"id": "univariado_EDAD", "tipo": "univariado", "parametros": {"variable": "EDAD"}},
+    {"id": "tabla_EDAD", "tipo": "tabla_pregunta", "parametros": {"pregunta": "EDAD"},
+     "depende_de": ["univariado_EDAD"]},
+]
+
+def test_validacion_plan():
+    """
+    Prueba la lectura del plan del proyecto y la detección de planes inválidos
+    """
+    print("\n===== PRUEBA DE VALIDACIÓN DEL PLAN =====")
+    nodos = cargar_plan('plan_analisis.json')
+    print(f"Nodos en plan_analisis.json: {len(nodos)}")
+    assert {'SEGMENTO', 'PREGUNTA_1', 'PREGUNTA_5'} <= columnas_plan(nodos)
+
+    orden = orden_topologico(PLAN_PRUEBA)
+    assert orden.index("univariado_PREGUNTA_1") < orden.index("tabla_PREGUNTA_1")
+
+    invalidos = [
+        PLAN_PRUEBA + [{"id": "univariado_SEGMENTO", "tipo": "univariado", "parametros": {"variable": "GENERO"}}],
+        [{"id": "a", "tipo": "desconocido", "parametros": {}}],
+        [{"id": "a", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_1"}, "depende_de": ["b"]},
+         {"id": "b", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_1"}, "depende_de": ["a"]}],
+    ]
+    for plan in invalidos:
+        try:
+            validar_plan(plan)
+        except ValueError as e:
+            print(f"Plan rechazado: {e}")
+        else:
+            raise AssertionError("Se esperaba un plan inválido")
+
+def test_ejecucion_paralela():
+    """
+    Prueba que la ejecución en paralelo produce los mismos archivos que la secuencial
+    """
+    print("\n===== PRUEBA DE EJECUCIÓN PARALELA DEL PLAN =====")
+    df = clean_data(load_data(DATA_PATH))
+    salidas = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for max_workers in (1, 2):
+            directorio = os.path.join(tmp, f'trabajadores_{max_workers}')
+            rutas = {
+                "export_excel_path": os.path.join(directorio, 'resultados.xlsx'),
+                "export_pdf_path": None,
+                "export_png_dir": directorio,
+                "export_json_dir": directorio,
+            }
+            resultados = ejecutar_plan(df, PLAN_PRUEBA, rutas, max_workers=max_workers)
+            print({id_nodo: r["estado"] for id_nodo, r in resultados.items()})
+
+            assert resultados["tabla_PREGUNTA_1"]["estado"] == "completado"
+            # EDAD no está en los datos: su nodo y el que depende de él se omiten
+            assert resultados["univariado_EDAD"]["estado"] == "omitido"
+            assert resultados["tabla_EDAD"]["estado"] == "omitido"
+
+            with open(os.path.join(directorio, 'tabla_PREGUNTA_1.json'), encoding='utf-8') as f:
+                tabla = json.load(f)
+            # La tabla ordenada por valor reemplaza a la del univariado (ordenada por frecuencia)
+            assert [fila['PREGUNTA_1'] for fila in tabla] == sorted(fila['PREGUNTA_1'] for fila in tabla)
+            hojas = openpyxl.load_workbook(rutas["export_excel_path"]).sheetnames
+            salidas[max_workers] = (tabla, hojas)
+
+    assert salidas[1] == salidas[2]
+    assert salidas[2][1] == ['SEGMENTO', 'PREGUNTA_1']
+
+def test_cache_artefactos():
+    """
+    Prueba que solo se vuelven a ejecutar los nodos cuyos datos cambiaron y que
+    se eliminan las salidas que dejaron de generarse
+    """
+    print("\n===== PRUEBA DE LA CACHÉ DE ARTEFACTOS =====")
+    df = clean_data(load_data(DATA_PATH))
+    plan = PLAN_PRUEBA[:3]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'cache')
+        rutas = {
+            "export_excel_path": os.path.join(tmp, 'resultados.xlsx'),
+            "export_pdf_path": None,
+            "export_png_dir": os.path.join(tmp, 'graficos'),
+            "export_json_dir": os.path.join(tmp, 'data'),
+        }
+
+        def ejecutar(datos, nodos):
+            resultados = ejecutar_plan(datos, nodos, rutas, max_workers=1, cache_dir=cache_dir)
+            archivos = [archivo for r in resultados.values() for archivo in r.get("archivos", [])]
+            return resultados, limpiar_obsoletos(cache_dir, archivos)
+
+        primera, _ = ejecutar(df, plan)
+        assert not any(r["desde_cache"] for r in primera.values())
+        ruta_tabla = os.path.join(rutas["export_json_dir"], 'tabla_PREGUNTA_1.json')
+        with open(ruta_tabla, encoding='utf-8') as f:
+            tabla = json.load(f)
+
+        segunda, eliminados = ejecutar(df, plan)
+        assert all(r["desde_cache"] for r in segunda.values())
+        assert eliminados == []
+        with open(ruta_tabla, encoding='utf-8') as f:
+            assert json.load(f) == tabla
+        assert openpyxl.load_workbook(rutas["export_excel_path"]).sheetnames == ['SEGMENTO', 'PREGUNTA_1']
+
+        # Un cambio en PREGUNTA_1 invalida solo sus nodos
+        modificado = df.copy()
+        modificado.loc[modificado.index[0], 'PREGUNTA_1'] = 1 if modificado['PREGUNTA_1'].iloc[0] != 1 else 2
+        tercera, _ = ejecutar(modificado, plan)
+        print({id_nodo: r["desde_cache"] for id_nodo, r in tercera.items()})
+        assert tercera["univariado_SEGMENTO"]["desde_cache"]
+        assert not tercera["univariado_PREGUNTA_1"]["desde_cache"]
+        assert not tercera["tabla_PREGUNTA_1"]["desde_cache"]
+
+        # Al quitar nodos del plan sus salidas se eliminan
+        _, eliminados = ejecutar(df, plan[:1])
+        print(f"Salidas obsoletas eliminadas: {len(eliminados)}")
+        assert os.path.normpath(ruta_tabla) in eliminados
+        assert not os.path.exists(ruta_tabla)
+
+def test_metricas_ejecucion():
+    """
+    Prueba el registro de métricas por fase y por análisis, con memoria y perfilado
+    """
+    print("\n===== PRUEBA DE MÉTRICAS DE EJECUCIÓN =====")
+    with tempfile.TemporaryDirectory() as tmp:
+        metricas = iniciar_registro(memoria=True, perfilar=True, perfiles_dir=os.path.join(tmp, 'perfiles'))
+        iniciar_fase(metricas, "FASE 1: CARGA Y LIMPIEZA DE DATOS")
+        df = clean_data(load_data(DATA_PATH))
+        iniciar_fase(metricas, "FASES 2-6: EJECUCIÓN DEL PLAN DE ANÁLISIS")
+        rutas = {"export_excel_path": None, "export_pdf_path": None, "export_png_dir": None, "export_json_dir": tmp}
+        ejecutar_plan(df, PLAN_PRUEBA, rutas, max_workers=2, opciones_metricas=opciones_medicion(metricas),
+                      al_terminar_nodo=lambda nodo, resultado, *_: registrar_analisis(metricas, nodo, resultado))
+        resumen = guardar_metricas(metricas, os.path.join(tmp, 'run_metrics.json'))
+
+        with open(os.path.join(tmp, 'run_metrics.json'), encoding='utf-8') as f:
+            assert json.load(f) == resumen
+        assert [fase["nombre"] for fase in resumen["fases"]] == ["FASE 1: CARGA Y LIMPIEZA DE DATOS",
+                                                                 "FASES 2-6: EJECUCIÓN DEL PLAN DE ANÁLISIS"]
+        for fase in resumen["fases"]:
+            print(f"{fase['nombre']}: {fase['tiempo_s']:.2f} s, CPU {fase['cpu_s']:.2f} s, "
+                  f"memoria pico {fase['memoria_pico_mb']:.1f} MB")
+            assert fase["memoria_pico_mb"] >= 0 and os.path.exists(fase["perfil"])
+            assert fase["funciones_costosas"]
+
+        medidos = {a["id"]: a for a in resumen["analisis"] if a["estado"] == "completado"}
+        assert set(medidos) == {"univariado_SEGMENTO", "univariado_PREGUNTA_1", "tabla_PREGUNTA_1"}
+        # Cada análisis se perfila en su proceso de trabajo
+        for analisis in medidos.values():
+            assert analisis["tiempo_s"] > 0 and analisis["memoria_pico_mb"] is not None
+            assert os.path.exists(analisis["perfil"])
+        assert resumen["cpu_analisis_s"] > 0
+
+def test_bitacora_procesos():
+    """
+    Prueba que los mensajes del proceso principal y de los procesos de trabajo
+    llegan completos al archivo de líneas JSON
+    """
+    print("\n===== PRUEBA DE LA BITÁCORA =====")
+    df = clean_data(load_data(DATA_PATH))
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_log = os.path.join(tmp, 'log.jsonl')
+        cola = iniciar_bitacora(ruta_log, consola=False)
+        for i in range(1000):
+            registrar(f"Mensaje {i}", "INFO", indice=i)
+        rutas = {"export_excel_path": None, "export_pdf_path": None, "export_png_dir": None, "export_json_dir": tmp}
+        ejecutar_plan(df, PLAN_PRUEBA, rutas, max_workers=2, cola_log=cola)
+        registrar("Fin", "ÉXITO")
+        cerrar_bitacora()
+
+        with open(ruta_log, encoding='utf-8') as f:
+            registros = [json.loads(linea) for linea in f]
+        print(f"{len(registros)} mensajes en el log")
+        assert [r["indice"] for r in registros if "indice" in r] == list(range(1000))
+        inicios = [r for r in registros if r["mensaje"].startswith("Iniciando análisis")]
+        assert {r["nodo"] for r in inicios} == {"univariado_SEGMENTO", "univariado_PREGUNTA_1", "tabla_PREGUNTA_1"}
+        assert all(r["pid"] != os.getpid() for r in inicios)
+        assert registros[-1]["mensaje"] == "Fin" and registros[-1]["tipo"] == "ÉXITO"
+
+        # Reiniciar la bitácora (un trabajo del demonio cada vez) no acumula manejadores de salida
+        manejadores = atexit._ncallbacks()
+        for _ in range(3):
+            iniciar_bitacora(ruta_log, consola=False)
+            cerrar_bitacora()
+        assert atexit._ncallbacks() == manejadores
+
+def test_contexto_analisis():
+    """
+    Prueba que los índices por grupo del contexto dan los mismos valores que
+    filtrar el DataFrame con una máscara, con grupos nulos y categóricos
+    """
+    print("\n===== PRUEBA DEL CONTEXTO DE ANÁLISIS =====")
+    df = clean_data(load_data(DATA_PATH))
+    df.loc[df.index[:5], 'CIUDAD_AGENCIA'] = np.nan
+    df['SEGMENTO'] = df['SEGMENTO'].astype('category')
+    contexto = ContextoAnalisis(df)
+    for columna in ('CIUDAD_AGENCIA', 'SEGMENTO', 'PREGUNTA_2'):
+        grupos = df[columna].dropna().unique()
+        print(f"{columna}: {len(grupos)} grupos")
+        for grupo in grupos:
+            esperado = df[df[columna] == grupo]['PREGUNTA_1'].dropna().astype('float64')
+            pd.testing.assert_series_equal(contexto.valores_grupo(columna, 'PREGUNTA_1', grupo), esperado)
+        top = contexto.conteos(columna).nlargest(3).index
+        pd.testing.assert_frame_equal(contexto.filas_grupos(columna, top), df[df[columna].isin(top)])
+    assert contexto.valores_grupo('CIUDAD_AGENCIA', 'PREGUNTA_1', 'No existe').empty
+    # Los conteos se calculan una vez y se reutilizan
+    assert contexto.conteos('PREGUNTA_1') is contexto.conteos('PREGUNTA_1')
+    pd.testing.assert_series_equal(contexto.conteos('PREGUNTA_1'), df['PREGUNTA_1'].value_counts())
+
+    # Una categoría sin filas (p. ej. rechazadas todas por la validación) no se cuenta
+    df['SEGMENTO'] = df['SEGMENTO'].cat.add_categories(['Gobierno'])
+    conteos = ContextoAnalisis(df).conteos('SEGMENTO')
+    assert 'Gobierno' not in conteos.index and 'Gobierno' not in conteos.index.categories
+    assert (conteos > 0).all() and conteos.sum() == df['SEGMENTO'].notna().sum()
+    with tempfile.TemporaryDirectory() as tmp:
+        analisis_univariado(df, 'SEGMENTO', export_json_dir=tmp)
+        with open(os.path.join(tmp, 'tabla_SEGMENTO.json'), encoding='utf-8') as f:
+            assert [fila['SEGMENTO'] for fila in json.load(f)] == list(conteos.index)
+
+def _tarea_lenta(contexto, p, rutas, conexion_sql):
+    if p.get("ignorar_alarma"):
+        # Como el código en C que no atiende la alarma: solo se detiene terminando el proceso
+        signal.signal(signal.SIGALRM, signal.SIG_IGN)
+    time.sleep(p["segundos"])
+    return p["segundos"]
+
+def test_limites_de_tiempo():
+    """
+    Prueba que los nodos que superan su límite o el presupuesto del plan se
+    omiten con un timeout sin detener el plan, y que se respeta la prioridad
+    """
+    print("\n===== PRUEBA DE LÍMITES DE TIEMPO Y PRIORIDADES =====")
+    df = clean_data(load_data(DATA_PATH))
+    plan = [
+        {"id": "lento", "tipo": "lento", "parametros": {"segundos": 30}, "limite_s": 0.5, "prioridad": -1},
+        {"id": "despues_de_lento", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_2"},
+         "depende_de": ["lento"]},
+        {"id": "univariado_PREGUNTA_1", "tipo": "univariado", "parametros": {"variable": "PREGUNTA_1"}},
+        {"id": "tabla_PREGUNTA_1", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_1"},
+         "depende_de": ["univariado_PREGUNTA_1"], "prioridad": 5},
+    ]
+    prioridades = prioridades_efectivas(plan)
+    # Cada nodo hereda la prioridad de los que dependen de él
+    assert prioridades["univariado_PREGUNTA_1"] == 5 and prioridades["lento"] == 0
+    try:
+        validar_plan([{"id": "a", "tipo": "univariado", "parametros": {"variable": "SEGMENTO"}, "limite_s": 0}])
+    except ValueError as e:
+        print(f"Plan rechazado: {e}")
+    else:
+        raise AssertionError("Se esperaba un límite inválido")
+
+    planificador.TAREAS["lento"] = _tarea_lenta
+    planificador.COLUMNAS_POR_TIPO["lento"] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            rutas = {"export_excel_path": None, "export_pdf_path": None, "export_png_dir": tmp, "export_json_dir": tmp}
+            # Secuencial: la alarma interrumpe el nodo lento y se omite el que depende de él
+            orden = []
+            inicio = time.perf_counter()
+            resultados = ejecutar_plan(df, plan, rutas, max_workers=1,
+                                       al_terminar_nodo=lambda nodo, resultado, *_: orden.append(nodo["id"]))
+            print({id_nodo: (r["estado"], r.get("error")) for id_nodo, r in resultados.items()})
+            assert time.perf_counter() - inicio < 10
+            assert orden == ["univariado_PREGUNTA_1", "tabla_PREGUNTA_1", "lento", "despues_de_lento"]
+            assert resultados["lento"]["estado"] == "omitido" and resultados["lento"]["tiempo_agotado"]
+            assert resultados["lento"]["error"].startswith("timeout:")
+            assert resultados["despues_de_lento"]["estado"] == "omitido"
+            assert resultados["tabla_PREGUNTA_1"]["estado"] == "completado"
+
+            # En paralelo, un nodo que ignora la alarma se cancela terminando el pool
+            # cuando los demás nodos en curso terminaron, sin volver a lanzarlos
+            plan[0]["parametros"]["ignorar_alarma"] = True
+            inicio = time.perf_counter()
+            resultados = ejecutar_plan(df, plan, rutas, max_workers=2)
+            print({id_nodo: (r["estado"], r.get("error")) for id_nodo, r in resultados.items()})
+            assert time.perf_counter() - inicio < 15
+            assert not multiprocessing.active_children()
+            assert resultados["lento"]["tiempo_agotado"]
+            assert resultados["tabla_PREGUNTA_1"]["estado"] == "completado"
+            assert resultados["univariado_PREGUNTA_1"]["estado"] == "completado"
+
+            # Presupuesto del plan: lo prioritario termina y lo demás se omite por timeout
+            plan[0].update({"limite_s": None, "prioridad": 10})
+            del plan[0]["limite_s"]
+            plan[0]["parametros"]["ignorar_alarma"] = False
+            resultados = ejecutar_plan(df, plan, rutas, max_workers=1, presupuesto_s=1.0)
+            print({id_nodo: (r["estado"], r.get("error")) for id_nodo, r in resultados.items()})
+            assert all(r["estado"] == "omitido" for r in resultados.values())
+            assert resultados["univariado_PREGUNTA_1"]["error"].startswith("timeout:")
+    finally:
+        del planificador.TAREAS["lento"]
+        del planificador.COLUMNAS_POR_TIPO["lento"]
+
+def _tarea_caida(contexto, p, rutas, conexion_sql):
+    time.sleep(0.2)
+    # Como un proceso que muere por falta de memoria: el pool queda roto
+    os._exit(1)
+
+def test_proceso_caido():
+    """
+    Prueba que si un proceso de trabajo muere, fallan solo los nodos que estaban
+    en curso y el plan sigue con un pool nuevo
+    """
+    print("\n===== PRUEBA DE PROCESO DE TRABAJO CAÍDO =====")
+    df = clean_data(load_data(DATA_PATH))
+    plan = [
+        {"id": "caida", "tipo": "caida", "parametros": {}, "prioridad": 10},
+        {"id": "despues_de_caida", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_2"},
+         "depende_de": ["caida"]},
+        {"id": "en_curso", "tipo": "lento", "parametros": {"segundos": 2}, "prioridad": 5},
+        {"id": "univariado_PREGUNTA_1", "tipo": "univariado", "parametros": {"variable": "PREGUNTA_1"}},
+        {"id": "tabla_PREGUNTA_1", "tipo": "tabla_pregunta", "parametros": {"pregunta": "PREGUNTA_1"},
+         "depende_de": ["univariado_PREGUNTA_1"]},
+    ]
+    planificador.TAREAS.update({"caida": _tarea_caida, "lento": _tarea_lenta})
+    planificador.COLUMNAS_POR_TIPO.update({"caida": [], "lento": []})
+    planificador.MODULOS_POR_TIPO.update({"caida": (), "lento": ()})
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            rutas = {"export_excel_path": None, "export_pdf_path": None, "export_png_dir": tmp, "export_json_dir": tmp}
+            cache_dir = os.path.join(tmp, "cache")
+            resultados = ejecutar_plan(df, plan, rutas, max_workers=2, cache_dir=cache_dir)
+            print({id_nodo: (r["estado"], r.get("error")) for id_nodo, r in resultados.items()})
+            # El nodo caído y el que se ejecutaba a la vez fallan; los lanzados después no
+            assert resultados["caida"]["estado"] == "error"
+            assert resultados["en_curso"]["estado"] == "error"
+            assert resultados["despues_de_caida"]["estado"] == "omitido"
+            assert resultados["univariado_PREGUNTA_1"]["estado"] == "completado"
+            assert resultados["tabla_PREGUNTA_1"]["estado"] == "completado"
+            assert not multiprocessing.active_children()
+            # Sin directorios temporales huérfanos en la caché
+            assert not [nombre for nombre in os.listdir(cache_dir) if nombre.startswith("tmp")]
+    finally:
+        for tipo in ("caida", "lento"):
+            del planificador.TAREAS[tipo]
+            del planificador.COLUMNAS_POR_TIPO[tipo]
+            del planificador.MODULOS_POR_TIPO[tipo]
+
+def test_memoria_compartida():
+    """
+    Prueba que el DataFrame reconstruido sobre la memoria compartida es igual al
+    original sin copiar sus arreglos, y que el plan da los mismos resultados
+    """
+    print("\n===== PRUEBA DE DATOS EN MEMORIA COMPARTIDA =====")
+    df = clean_data(load_data(DATA_PATH))
+    df['SEGMENTO'] = df['SEGMENTO'].astype('category')
+    df['ESTRATO'] = df['ESTRATO'].astype('Int8')
+    df['PREGUNTA_1'] = df['PREGUNTA_1'].astype('float32')
+    df = df.iloc[::2]  # índice que no es un rango
+    bloque, descripcion = compartir_dataframe(df)
+    try:
+        compartido, bloque_adjunto = adjuntar_dataframe(descripcion)
+        pd.testing.assert_frame_equal(compartido, df)
+        memoria = np.frombuffer(bloque_adjunto.buf, dtype=np.uint8)
+        for columna in ('SEGMENTO', 'ESTRATO', 'PREGUNTA_1', 'FECHA_ENCUESTA'):
+            arreglo = compartido[columna].array
+            datos = getattr(arreglo, 'codes', getattr(arreglo, '_data', None))
+            datos = compartido[columna].to_numpy() if datos is None else datos
+            assert np.shares_memory(datos, memoria), columna
+        print(f"Descripción enviada a cada proceso: {len(descripcion['columnas'])} columnas, bloque de {bloque.size} bytes")
+        # Modificar una copia no altera los datos compartidos
+        copia = compartido.copy()
+        copia.iloc[0, copia.columns.get_loc('PREGUNTA_1')] = 99
+        assert compartido['PREGUNTA_1'].iloc[0] == df['PREGUNTA_1'].iloc[0]
+        del compartido, copia, arreglo, datos, memoria
+        bloque_adjunto.close()
+    finally:
+        liberar_bloque(bloque)
+
+    salidas = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for memoria_compartida in (False, True):
+            directorio = os.path.join(tmp, f'compartida_{memoria_compartida}')
+            rutas = {"export_excel_path": os.path.join(directorio, 'resultados.xlsx'), "export_pdf_path": None,
+                     "export_png_dir": directorio, "export_json_dir": directorio}
+            resultados = ejecutar_plan(df, PLAN_PRUEBA, rutas, max_workers=2, memoria_compartida=memoria_compartida)
+            assert resultados["tabla_PREGUNTA_1"]["estado"] == "completado"
+            salidas[memoria_compartida] = {}
+            for archivo in sorted(os.listdir(directorio)):
+                if archivo.endswith('.json'):
+                    with open(os.path.join(directorio, archivo), encoding='utf-8') as f:
+                        salidas[memoria_compartida][archivo] = json.load(f)
+    print(f"Tablas JSON comparadas: {', '.join(salidas[True])}")
+    assert salidas[True] and salidas[True] == salidas[False]
+
+if __name__ == "__main__":
+    print("PRUEBAS DEL PLAN DE ANÁLISIS")
+    print("============================")
+
+    test_validacion_plan()
+    test_ejecucion_paralela()
+    test_cache_artefactos()
+    test_metricas_ejecucion()
+    test_bitacora_procesos()
+    test_contexto_analisis()
+    test_limites_de_tiempo()
+    test_proceso_caido()
+    test_memoria_compartida()
+
+    print("\n¡Pruebas completadas!")